@@ -1,6 +1,7 @@
 import torch
 from torch import nn, optim
 import random
+from profiler import NULL_TIMER
 
 class DQN(nn.Module):
     def __init__(self, state_dim=4, n_actions=2):
@@ -29,6 +30,9 @@ class Agent:
         self.target_net.load_state_dict(self.policy_net.state_dict())
 
         self.optimizer = optim.Adam(self.policy_net.parameters(), lr=lr)
+        # Called with policy_net between backward and clipping, e.g. to all-reduce gradients
+        # across ranks (distributed.py). None on a single process
+        self.grad_hook = None
 
     def act(self, state, epsilon=0.1):
         # epsilon-greedy
@@ -45,12 +49,12 @@ class Agent:
         # batch: (states, actions, rewards, next_states, dones)
         states, actions, rewards, next_states, dones = batch
 
-        # Convert to tensors and move to device
-        states_v = torch.tensor(states, dtype=torch.float32).to(self.device)
-        actions_v = torch.tensor(actions, dtype=torch.int64).unsqueeze(1).to(self.device)
-        rewards_v = torch.tensor(rewards, dtype=torch.float32).to(self.device)
-        next_states_v = torch.tensor(next_states, dtype=torch.float32).to(self.device)
-        dones_v = torch.tensor(dones, dtype=torch.float32).to(self.device)
+        # Convert to tensors and move to device (tensors from PrefetchSampler pass through)
+        states_v = torch.as_tensor(states, dtype=torch.float32, device=self.device)
+        actions_v = torch.as_tensor(actions, dtype=torch.int64, device=self.device).unsqueeze(1)
+        rewards_v = torch.as_tensor(rewards, dtype=torch.float32, device=self.device)
+        next_states_v = torch.as_tensor(next_states, dtype=torch.float32, device=self.device)
+        dones_v = torch.as_tensor(dones, dtype=torch.float32, device=self.device)
 
         # Q(s,a)
         q_values = self.policy_net(states_v).gather(1, actions_v).squeeze(1)
@@ -70,23 +74,30 @@ class Agent:
         loss = nn.functional.smooth_l1_loss(q_values, expected_q) 
         return loss
 
-    def update(self, replay_buffer, batch_size=64, target_update=1000):
+    def update(self, replay_buffer, batch_size=64, target_update=1000, timer=NULL_TIMER):
         if len(replay_buffer) < batch_size:
             return None
-        batch = replay_buffer.sample(batch_size)
-        loss = self.compute_loss(batch)
-        self.optimizer.zero_grad()
-        loss.backward()
-        # gradient clipping
-        torch.nn.utils.clip_grad_norm_(self.policy_net.parameters(), 10.0)
-        self.optimizer.step()
+        with timer.phase("agent.update/sample"):
+            batch = replay_buffer.sample(batch_size)
+        with timer.phase("agent.update/forward"):
+            loss = self.compute_loss(batch)
+        with timer.phase("agent.update/backward"):
+            self.optimizer.zero_grad()
+            loss.backward()
+            if self.grad_hook is not None:
+                with timer.phase("agent.update/grad_hook"):
+                    self.grad_hook(self.policy_net)
+            # gradient clipping
+            torch.nn.utils.clip_grad_norm_(self.policy_net.parameters(), 10.0)
+            self.optimizer.step()
 
         # Soft target update
         tau = 0.001  
-        for target_param, policy_param in zip(self.target_net.parameters(), self.policy_net.parameters()):
-            target_param.data.copy_(
-                target_param.data * (1.0 - tau) + policy_param.data * tau
-            )
+        with timer.phase("agent.update/soft_update"):
+            for target_param, policy_param in zip(self.target_net.parameters(), self.policy_net.parameters()):
+                target_param.data.copy_(
+                    target_param.data * (1.0 - tau) + policy_param.data * tau
+                )
         return loss.item()
 
     def save(self, path):
@@ -0,0 +1,182 @@
+import os
+import copy
+import random
+import numpy as np
+import torch
+from torch import nn, optim
+from torch.func import functional_call, stack_module_state, vmap
+
+from agent import DQN
+
+
+class EnsembleReplayBuffer:
+    """
+    One replay ring per ensemble member, stored as (E, capacity, ...) arrays.
+    Members push in lockstep (one env each) and sample their own indices, uniformly without
+    replacement within each member's buffer, like ReplayBuffer.sample.
+    Parameters:
+        num_members (int): E
+        capacity (int): transitions per member
+    """
+    def __init__(self, num_members, capacity=50000, state_dim=4):
+        self.num_members = num_members
+        self.capacity = capacity
+        self.states = np.zeros((num_members, capacity, state_dim), dtype=np.float32)
+        self.next_states = np.zeros((num_members, capacity, state_dim), dtype=np.float32)
+        self.actions = np.zeros((num_members, capacity), dtype=np.int64)
+        self.rewards = np.zeros((num_members, capacity), dtype=np.float32)
+        self.dones = np.zeros((num_members, capacity), dtype=np.float32)
+        self.pos = 0
+        self.size = 0
+        self._rows = np.arange(num_members)[:, None]
+
+    def push(self, states, actions, rewards, next_states, dones):
+        """Push one transition per member; every argument has a leading E axis."""
+        i = self.pos
+        self.states[:, i] = states
+        self.actions[:, i] = actions
+        self.rewards[:, i] = rewards
+        self.next_states[:, i] = next_states
+        self.dones[:, i] = dones
+        self.pos = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample_indices(self, batch_size):
+        idx = np.random.randint(0, self.size, size=(self.num_members, batch_size))
+        # Draws with a repeated index are redrawn without replacement (rare for batch << size)
+        srt = np.sort(idx, axis=1)
+        for e in np.nonzero((srt[:, 1:] == srt[:, :-1]).any(axis=1))[0]:
+            idx[e] = random.sample(range(self.size), batch_size)
+        return idx
+
+    def sample(self, batch_size):
+        idx = self.sample_indices(batch_size)
+        rows = self._rows
+        return (self.states[rows, idx], self.actions[rows, idx], self.rewards[rows, idx],
+                self.next_states[rows, idx], self.dones[rows, idx])
+
+    def __len__(self):
+        return self.size
+
+
+class EnsembleAgent:
+    """
+    E independent DQN agents whose parameters are stacked along a leading axis.
+    All E losses come from one vmapped functional_call forward/backward; Adam is elementwise, so
+    one optimizer over the stacked tensors is the same as E separate optimizers. Gradient clipping
+    and soft target updates are applied per member.
+    Member i's checkpoint (save_member) loads with Agent.load.
+    Parameters:
+        num_members (int): E
+        lr, gamma: as in Agent
+        double (bool): Double-DQN targets (as agent_ddqn.py). Default: False
+        seed (int|None): member i is initialised after torch.manual_seed(seed + i), matching
+            train_loop(seed=seed + i). Default: None
+    """
+    TAU = 0.001
+    MAX_GRAD_NORM = 10.0
+
+    def __init__(self, num_members=8, state_dim=4, n_actions=2, lr=1e-3, gamma=0.99, device=None, double=False,
+                 seed=None):
+        self.device = torch.device(device) if device is not None else (
+            torch.device("cuda") if torch.cuda.is_available() else torch.device("cpu")
+        )
+        self.num_members = num_members
+        self.n_actions = n_actions
+        self.gamma = gamma
+        self.double = double
+
+        nets = []
+        for i in range(num_members):
+            if seed is not None:
+                torch.manual_seed(seed + i)
+            nets.append(DQN(state_dim, n_actions).to(self.device))
+        params, _ = stack_module_state(nets)
+        self.params = {k: nn.Parameter(v.detach().clone()) for k, v in params.items()}
+        self.target_params = {k: v.detach().clone() for k, v in params.items()}
+        self.base = copy.deepcopy(nets[0]).to("meta")
+        self.optimizer = optim.Adam(self.params.values(), lr=lr)
+
+        def q_single(p, x):
+            return functional_call(self.base, p, (x,))
+
+        self._q = vmap(q_single)
+        self._loss = vmap(self._member_loss)
+
+    def _member_loss(self, params, target_params, states, actions, rewards, next_states, dones):
+        q_values = functional_call(self.base, params, (states,)).gather(1, actions.unsqueeze(1)).squeeze(1)
+        next_q_target = functional_call(self.base, target_params, (next_states,))
+        if self.double:
+            next_actions = functional_call(self.base, params, (next_states,)).argmax(dim=1, keepdim=True)
+            next_q = next_q_target.gather(1, next_actions).squeeze(1)
+        else:
+            next_q = next_q_target.max(1)[0]
+        expected_q = rewards + self.gamma * next_q.detach() * (1.0 - dones)
+        return nn.functional.smooth_l1_loss(q_values, expected_q)
+
+    def q_values(self, states):
+        """(E, N, state_dim) -> (E, N, n_actions)."""
+        with torch.inference_mode():
+            return self._q(self.params, torch.as_tensor(states, dtype=torch.float32, device=self.device))
+
+    def act(self, states, epsilon=0.1):
+        """One state per member, (E, state_dim) -> (E,) actions, epsilon-greedy per member."""
+        actions = self.q_values(np.asarray(states)[:, None, :])[:, 0].argmax(dim=1).cpu().numpy()
+        if epsilon > 0.0:
+            explore = np.random.random(self.num_members) < epsilon
+            actions[explore] = np.random.randint(0, self.n_actions, int(explore.sum()))
+        return actions
+
+    def update(self, replay_buffer, batch_size=64):
+        """One gradient step for every member. Returns the per-member losses as an (E,) array."""
+        if len(replay_buffer) < batch_size:
+            return None
+        batch = [torch.as_tensor(x, device=self.device) for x in replay_buffer.sample(batch_size)]
+        losses = self._loss(self.params, self.target_params, *batch)
+
+        self.optimizer.zero_grad()
+        # Sum, not mean: each member's gradient is exactly the gradient of its own loss
+        losses.sum().backward()
+        self._clip_per_member()
+        self.optimizer.step()
+
+        with torch.no_grad():
+            policy = list(self.params.values())
+            target = list(self.target_params.values())
+            torch._foreach_mul_(target, 1.0 - self.TAU)
+            torch._foreach_add_(target, policy, alpha=self.TAU)
+        return losses.detach().cpu().numpy()
+
+    def _clip_per_member(self):
+        # Same rule as clip_grad_norm_(member.parameters(), MAX_GRAD_NORM), for every member at once
+        grads = [p.grad for p in self.params.values()]
+        sq = sum(g.pow(2).reshape(self.num_members, -1).sum(dim=1) for g in grads)
+        scale = (self.MAX_GRAD_NORM / (sq.sqrt() + 1e-6)).clamp(max=1.0)
+        for g in grads:
+            g.mul_(scale.view(-1, *([1] * (g.dim() - 1))))
+
+    def member_state_dict(self, i):
+        return {
+            'policy_state_dict': {k: v[i].detach().clone() for k, v in self.params.items()},
+            'target_state_dict': {k: v[i].clone() for k, v in self.target_params.items()},
+        }
+
+    def save_member(self, i, path):
+        torch.save(self.member_state_dict(i), path)
+
+    def save(self, prefix):
+        """Write one Agent-compatible checkpoint per member: <prefix>_member<i>.pth."""
+        paths = [f"{prefix}_member{i}.pth" for i in range(self.num_members)]
+        if os.path.dirname(prefix):
+            os.makedirs(os.path.dirname(prefix), exist_ok=True)
+        for i, path in enumerate(paths):
+            self.save_member(i, path)
+        return paths
+
+    def load_member(self, i, path):
+        data = torch.load(path, map_location=self.device, weights_only=True)
+        with torch.no_grad():
+            for k, v in data['policy_state_dict'].items():
+                self.params[k][i].copy_(v)
+            for k, v in data['target_state_dict'].items():
+                self.target_params[k][i].copy_(v)
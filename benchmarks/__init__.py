@@ -0,0 +1,12 @@
+"""
+Repeatable microbenchmarks for the env, replay buffer, agent and renderer.
+
+Run from the repository root:
+    python -m benchmarks run --out benchmarks/results/current.json
+    python -m benchmarks compare benchmarks/baseline.json benchmarks/results/current.json
+"""
+import os
+
+# Rendering benchmarks need a display; use SDL's dummy driver unless told otherwise.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
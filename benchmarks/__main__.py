@@ -0,0 +1,39 @@
+import sys
+import argparse
+
+from benchmarks.core import run_benchmarks, save_results, load_results, compare_results, print_comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Flappy DQN microbenchmarks.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    run_p = sub.add_parser("run", help="run benchmarks and write JSON results")
+    run_p.add_argument("--filter", default=None, help="only run benchmarks whose name contains this")
+    run_p.add_argument("--quick", action="store_true", help="fewer iterations (smoke test)")
+    run_p.add_argument("--out", default="benchmarks/results/latest.json")
+
+    cmp_p = sub.add_parser("compare", help="compare a run against a stored baseline")
+    cmp_p.add_argument("baseline")
+    cmp_p.add_argument("current")
+    cmp_p.add_argument("--threshold", type=float, default=0.10, help="relative regression threshold")
+
+    args = parser.parse_args(argv)
+
+    if args.cmd == "run":
+        data = run_benchmarks(args.filter, args.quick)
+        save_results(data, args.out)
+        print(f"\nResults written to {args.out}")
+        return 0
+
+    rows = compare_results(load_results(args.baseline), load_results(args.current), args.threshold)
+    print_comparison(rows)
+    regressions = [r for r in rows if r[4] == "REGRESSION"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
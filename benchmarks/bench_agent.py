@@ -0,0 +1,141 @@
+import os
+import tempfile
+
+import numpy as np
+import torch
+
+from benchmarks.core import benchmark, result, measure_rate, measure_latency_us
+from agent import Agent
+from agent_ddqn import Agent as DDQNAgent
+from utils import ReplayBuffer
+
+BATCH_SIZE = 64
+
+
+def _filled_buffer(size=10_000):
+    buf = ReplayBuffer(size)
+    rng = np.random.default_rng(0)
+    states = rng.standard_normal((size + 1, 4)).astype(np.float32)
+    for i in range(size):
+        buf.push(states[i], int(rng.integers(2)), float(rng.standard_normal()), states[i + 1], float(i % 200 == 0))
+    return buf
+
+
+@benchmark("act_latency", "agent")
+def bench_act(quick):
+    torch.manual_seed(0)
+    agent = Agent(device="cpu")
+    state = np.zeros(4, dtype=np.float32)
+
+    def run(n):
+        for _ in range(n):
+            agent.act(state, epsilon=0.0)
+
+    return result(measure_latency_us(run, 500 if quick else 5_000), "us/call", higher_is_better=False)
+
+
+def _update_bench(agent_cls):
+    def bench(quick):
+        torch.manual_seed(0)
+        agent = agent_cls(device="cpu")
+        buf = _filled_buffer()
+
+        def run(n):
+            for _ in range(n):
+                agent.update(buf, batch_size=BATCH_SIZE)
+
+        return result(measure_rate(run, 100 if quick else 1_000), "updates/s", batch_size=BATCH_SIZE)
+    return bench
+
+
+benchmark("update_dqn", "agent")(_update_bench(Agent))
+benchmark("update_ddqn", "agent")(_update_bench(DDQNAgent))
+
+
+@benchmark("checkpoint_save", "agent")
+def bench_save(quick):
+    agent = Agent(device="cpu")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.pth")
+
+        def run(n):
+            for _ in range(n):
+                agent.save(path)
+
+        return result(measure_latency_us(run, 20 if quick else 200) / 1000, "ms/save", higher_is_better=False)
+
+
+@benchmark("checkpoint_load", "agent")
+def bench_load(quick):
+    agent = Agent(device="cpu")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.pth")
+        agent.save(path)
+
+        def run(n):
+            for _ in range(n):
+                agent.load(path)
+
+        return result(measure_latency_us(run, 20 if quick else 200) / 1000, "ms/load", higher_is_better=False)
+
+
+def _train_step_bench(prefetch):
+    def bench(quick):
+        from env import FlappyBirdEnv
+        from utils import PrefetchSampler
+
+        torch.manual_seed(0)
+        agent = Agent(device="cpu")
+        buf = _filled_buffer(50_000)
+        env = FlappyBirdEnv(render_mode=False, seed=0)
+        sampler = PrefetchSampler(buf, BATCH_SIZE, depth=prefetch) if prefetch else buf
+        state = env.reset()
+
+        # One train_loop step: act, env.step, push, update
+        def run(n):
+            nonlocal state
+            for _ in range(n):
+                action = agent.act(state, epsilon=0.1)
+                next_state, reward, done, _ = env.step(action)
+                buf.push(state, action, reward, next_state, float(done))
+                agent.update(sampler, batch_size=BATCH_SIZE)
+                state = env.reset() if done else next_state
+
+        try:
+            return result(measure_rate(run, 100 if quick else 1_000), "steps/s", batch_size=BATCH_SIZE,
+                          prefetch=prefetch)
+        finally:
+            if prefetch:
+                sampler.close()
+            env.close()
+    return bench
+
+
+benchmark("train_step_sync", "agent")(_train_step_bench(0))
+benchmark("train_step_prefetch", "agent")(_train_step_bench(4))
+
+
+def _ensemble_update_bench(members):
+    def bench(quick):
+        from agent_ensemble import EnsembleAgent, EnsembleReplayBuffer
+
+        agent = EnsembleAgent(members, device="cpu", seed=0)
+        buf = EnsembleReplayBuffer(members, 10_000)
+        rng = np.random.default_rng(0)
+        for _ in range(10_000):
+            s = rng.standard_normal((members, 4)).astype(np.float32)
+            buf.push(s, rng.integers(0, 2, members), rng.standard_normal(members).astype(np.float32), s,
+                     np.zeros(members, dtype=np.float32))
+
+        def run(n):
+            for _ in range(n):
+                agent.update(buf, batch_size=BATCH_SIZE)
+
+        # Member-updates/s, comparable with update_dqn
+        return result(members * measure_rate(run, 20 if quick else 200), "member-updates/s",
+                      batch_size=BATCH_SIZE, members=members)
+    return bench
+
+
+benchmark("ensemble_update_8", "agent")(_ensemble_update_bench(8))
+benchmark("ensemble_update_32", "agent")(_ensemble_update_bench(32))
@@ -0,0 +1,41 @@
+import numpy as np
+
+from benchmarks.core import benchmark, result, measure_rate
+from env import FlappyBirdEnv
+
+DIFFICULTIES = ("easy", "normal", "hard", "extreme")
+
+
+def _make_step_bench(difficulty):
+    def bench(quick):
+        env = FlappyBirdEnv(difficulty=difficulty, render_mode=False, seed=0)
+        rng = np.random.default_rng(0)
+        # Flap ~1 in 12 frames: keeps the bird alive long enough to exercise pipe logic
+        actions = (rng.random(100_000) < 1 / 12).astype(np.int64).tolist()
+
+        def run(n):
+            env.reset(seed=0)
+            for i in range(n):
+                _, _, done, _ = env.step(actions[i % len(actions)])
+                if done:
+                    env.reset()
+
+        return result(measure_rate(run, 5_000 if quick else 50_000), "steps/s")
+    return bench
+
+
+def _make_reset_bench(difficulty):
+    def bench(quick):
+        env = FlappyBirdEnv(difficulty=difficulty, render_mode=False, seed=0)
+
+        def run(n):
+            for _ in range(n):
+                env.reset()
+
+        return result(measure_rate(run, 2_000 if quick else 20_000), "resets/s")
+    return bench
+
+
+for _dif in DIFFICULTIES:
+    benchmark(f"step_{_dif}", "env")(_make_step_bench(_dif))
+    benchmark(f"reset_{_dif}", "env")(_make_reset_bench(_dif))
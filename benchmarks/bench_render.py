@@ -0,0 +1,21 @@
+from benchmarks.core import benchmark, result, measure_rate
+from env import FlappyBirdEnv
+
+
+@benchmark("render_fps", "render")
+def bench_render(quick):
+    env = FlappyBirdEnv(difficulty="normal", render_mode=True, seed=0)
+    # Measure drawing only, not the FPS cap
+    env.FPS = 0
+    try:
+        def run(n):
+            env.reset(seed=0)
+            for i in range(n):
+                _, _, done, _ = env.step(1 if i % 12 == 0 else 0)
+                if done:
+                    env.reset()
+                env.render()
+
+        return result(measure_rate(run, 200 if quick else 2_000), "frames/s")
+    finally:
+        env.close()
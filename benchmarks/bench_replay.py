@@ -0,0 +1,46 @@
+import numpy as np
+
+from benchmarks.core import benchmark, result, measure_rate
+from utils import ReplayBuffer
+
+CAPACITIES = (10_000, 50_000, 200_000)
+BATCH_SIZE = 64
+
+
+def _filled_buffer(capacity):
+    buf = ReplayBuffer(capacity)
+    rng = np.random.default_rng(0)
+    states = rng.standard_normal((capacity, 4)).astype(np.float32)
+    for i in range(capacity):
+        buf.push(states[i], i & 1, 0.1, states[i], 0.0)
+    return buf
+
+
+def _make_push_bench(capacity):
+    def bench(quick):
+        buf = ReplayBuffer(capacity)
+        state = np.zeros(4, dtype=np.float32)
+
+        def run(n):
+            for i in range(n):
+                buf.push(state, i & 1, 0.1, state, 0.0)
+
+        return result(measure_rate(run, 20_000 if quick else 200_000), "push/s")
+    return bench
+
+
+def _make_sample_bench(capacity):
+    def bench(quick):
+        buf = _filled_buffer(capacity)
+
+        def run(n):
+            for _ in range(n):
+                buf.sample(BATCH_SIZE)
+
+        return result(measure_rate(run, 200 if quick else 2_000), "batches/s", batch_size=BATCH_SIZE)
+    return bench
+
+
+for _cap in CAPACITIES:
+    benchmark(f"push_{_cap}", "replay")(_make_push_bench(_cap))
+    benchmark(f"sample_{_cap}", "replay")(_make_sample_bench(_cap))
@@ -0,0 +1,74 @@
+"""
+Cold-start benchmarks for the entry points, in fresh interpreters.
+
+    python -m benchmarks run --filter startup/
+    python -m benchmarks.bench_startup console_main   # -X importtime breakdown
+"""
+import os
+import sys
+import time
+import statistics
+import subprocess
+
+from benchmarks.core import benchmark, result
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Target for `python console_main.py` -> menu printed -> "6" (quit). The menu only
+# needs config.py, so this should stay close to bare interpreter startup.
+TIME_TO_MENU_TARGET_MS = 300.0
+
+
+def _run_ms(args, stdin=None, repeat=5):
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, input=stdin, cwd=REPO_ROOT, env=env,
+                       capture_output=True, text=True, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+@benchmark("python_bare", "startup")
+def bench_bare(quick):
+    return result(_run_ms(["-c", "pass"], repeat=3 if quick else 7), "ms", higher_is_better=False)
+
+
+@benchmark("console_time_to_menu", "startup")
+def bench_console_menu(quick):
+    ms = _run_ms(["console_main.py"], stdin="6\n", repeat=3 if quick else 7)
+    return result(ms, "ms", higher_is_better=False, target_ms=TIME_TO_MENU_TARGET_MS,
+                  meets_target=ms <= TIME_TO_MENU_TARGET_MS)
+
+
+@benchmark("gui_import", "startup")
+def bench_gui_import(quick):
+    # Window creation needs a display; module import is what the entry point adds on top of Tk
+    return result(_run_ms(["-c", "import main"], repeat=3 if quick else 7), "ms", higher_is_better=False)
+
+
+@benchmark("import_play", "startup")
+def bench_import_play(quick):
+    return result(_run_ms(["-c", "import play"], repeat=3 if quick else 7), "ms", higher_is_better=False)
+
+
+def importtime_breakdown(module, top=15):
+    """Run `python -X importtime -c 'import <module>'` and return the slowest (cumulative_us, name)."""
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=REPO_ROOT,
+                          env=env, capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cum_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cum_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+if __name__ == "__main__":
+    for mod in sys.argv[1:] or ["console_main", "main"]:
+        print(f"\n{mod}: slowest imports (cumulative)")
+        for cum_us, name in importtime_breakdown(mod):
+            print(f"  {cum_us / 1000:9.1f} ms  {name}")
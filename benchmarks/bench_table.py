@@ -0,0 +1,40 @@
+import numpy as np
+import torch
+
+from benchmarks.core import benchmark, result, measure_latency_us, measure_rate
+from agent import DQN
+from table_policy import compile_table, state_bounds
+
+BINS = (16, 16, 16, 16)
+
+
+def _table():
+    torch.manual_seed(0)
+    return compile_table(DQN(), BINS, verbose=False)
+
+
+@benchmark("act_latency", "table")
+def bench_table_act(quick):
+    table = _table()
+    lows, highs = state_bounds()
+    states = list(np.random.default_rng(0).uniform(lows, highs, size=(1024, 4)).astype(np.float32))
+
+    def run(n):
+        for i in range(n):
+            table.act(states[i & 1023])
+
+    return result(measure_latency_us(run, 5_000 if quick else 100_000), "us/call", higher_is_better=False)
+
+
+@benchmark("compile_rate", "table")
+def bench_compile(quick):
+    torch.manual_seed(0)
+    net = DQN()
+    shape = (16, 16, 16, 16) if quick else (32, 32, 32, 32)
+
+    def run(n):
+        for _ in range(n // int(np.prod(shape))):
+            compile_table(net, shape, verbose=False)
+
+    cells = int(np.prod(shape))
+    return result(measure_rate(run, cells, repeat=3, warmup=0), "cells/s", bins=list(shape))
@@ -0,0 +1,165 @@
+import os
+import sys
+import json
+import time
+import platform
+import importlib
+import statistics
+from datetime import datetime, timezone
+
+# "group/name" -> fn. fn(quick) returns a result dict, see `result()`.
+REGISTRY = {}
+
+# Modules imported by run_benchmarks; importing one registers its benchmarks.
+BENCH_MODULES = [
+    "benchmarks.bench_env",
+    "benchmarks.bench_replay",
+    "benchmarks.bench_agent",
+    "benchmarks.bench_render",
+    "benchmarks.bench_startup",
+    "benchmarks.bench_table",
+]
+
+
+def benchmark(name, group):
+    """Register a benchmark function under `group/name`."""
+    def wrap(fn):
+        REGISTRY[f"{group}/{name}"] = fn
+        return fn
+    return wrap
+
+
+def result(value, unit, higher_is_better=True, **extra):
+    """Standard result record returned by every benchmark."""
+    out = {"value": float(value), "unit": unit, "higher_is_better": higher_is_better}
+    out.update(extra)
+    return out
+
+
+def measure_rate(fn, n, repeat=5, warmup=1):
+    """
+    Call `fn(n)` `repeat` times and return the median rate in ops/sec.
+    `fn(n)` must perform n operations.
+    """
+    for _ in range(warmup):
+        fn(max(1, n // 10))
+    rates = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(n)
+        rates.append(n / (time.perf_counter() - start))
+    return statistics.median(rates)
+
+
+def measure_latency_us(fn, n, repeat=5, warmup=1):
+    """Median per-call latency of `fn(n)` in microseconds."""
+    return 1e6 / measure_rate(fn, n, repeat, warmup)
+
+
+def machine_metadata():
+    meta = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        import torch
+        meta["torch"] = torch.__version__
+        meta["torch_threads"] = torch.get_num_threads()
+        meta["cuda"] = torch.cuda.is_available()
+    except ImportError:
+        pass
+    try:
+        import numpy as np
+        meta["numpy"] = np.__version__
+    except ImportError:
+        pass
+    try:
+        import subprocess
+        meta["git_rev"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                         text=True, timeout=5).stdout.strip()
+    except Exception:
+        pass
+    return meta
+
+
+def run_benchmarks(pattern=None, quick=False):
+    """
+    Run every registered benchmark whose name contains `pattern`.
+    Returns:
+        {"metadata": {...}, "results": {name: result}}
+    """
+    for mod in BENCH_MODULES:
+        importlib.import_module(mod)
+
+    results = {}
+    for name in sorted(REGISTRY):
+        if pattern and pattern not in name:
+            continue
+        try:
+            res = REGISTRY[name](quick)
+        except Exception as e:
+            print(f"{name:45s} FAILED: {e}")
+            continue
+        results[name] = res
+        print(f"{name:45s} {res['value']:14.2f} {res['unit']}")
+    return {"metadata": machine_metadata(), "results": results}
+
+
+def save_results(data, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(baseline, current, threshold=0.10):
+    """
+    Compare two result files.
+    Parameters:
+        baseline (dict): stored baseline, as written by save_results
+        current (dict): new run
+        threshold (float): relative change counted as a regression. Default: 10%
+    Returns:
+        list of (name, baseline_value, current_value, relative_change, status)
+        status is one of "ok", "REGRESSION", "improved", "new", "missing"
+    """
+    rows = []
+    base_res = baseline["results"]
+    cur_res = current["results"]
+    for name in sorted(set(base_res) | set(cur_res)):
+        if name not in base_res:
+            rows.append((name, None, cur_res[name]["value"], None, "new"))
+            continue
+        if name not in cur_res:
+            rows.append((name, base_res[name]["value"], None, None, "missing"))
+            continue
+        b = base_res[name]["value"]
+        c = cur_res[name]["value"]
+        change = (c - b) / b if b else 0.0
+        # Normalize so a positive change is always "better"
+        better = change if base_res[name].get("higher_is_better", True) else -change
+        if better < -threshold:
+            status = "REGRESSION"
+        elif better > threshold:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((name, b, c, change, status))
+    return rows
+
+
+def print_comparison(rows):
+    print(f"{'benchmark':45s} {'baseline':>14s} {'current':>14s} {'change':>9s}  status")
+    for name, b, c, change, status in rows:
+        b_s = f"{b:14.2f}" if b is not None else f"{'-':>14s}"
+        c_s = f"{c:14.2f}" if c is not None else f"{'-':>14s}"
+        ch_s = f"{change:+8.1%}" if change is not None else f"{'-':>8s}"
+        print(f"{name:45s} {b_s} {c_s} {ch_s}  {status}")
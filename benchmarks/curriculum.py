@@ -0,0 +1,73 @@
+"""
+Curriculum vs direct training: env steps and wall-clock until the policy reaches a
+target rolling score on the final preset. Slow (full training runs), so it is a
+standalone script rather than part of `python -m benchmarks run`.
+
+    python -m benchmarks.curriculum --difficulty hard --target 20 --seeds 0 1 2
+"""
+import os
+import time
+import argparse
+import tempfile
+
+import benchmarks  # noqa: F401  (SDL dummy driver)
+from benchmarks.core import machine_metadata, save_results
+from config import CURRICULUM_WINDOW
+from train import train_loop
+
+
+def time_to_target(difficulty, target, max_episodes, seed, curriculum):
+    """
+    Train until the rolling average score on `difficulty` reaches `target`. The average only
+    counts once it spans a full CURRICULUM_WINDOW episodes on that stage: right after a promotion
+    it covers just a few episodes and would hand the curriculum arm an early, noisy finish.
+    """
+    reached = {}
+    start = time.perf_counter()
+
+    def on_log(info):
+        if (info["difficulty"] == difficulty and info["stage_episodes"] >= CURRICULUM_WINDOW
+                and info["stage_avg_score"] >= target):
+            reached.update(steps=info["steps"], episodes=info["episode"], seconds=time.perf_counter() - start)
+            return True
+        return False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        train_loop(num_episodes=max_episodes, difficulty=difficulty, curriculum=curriculum, seed=seed,
+                   checkpoint_path=os.path.join(tmp, "bench.pth"), callback=on_log)
+    return {
+        "reached": bool(reached),
+        "steps": reached.get("steps"),
+        "episodes": reached.get("episodes"),
+        "seconds": reached.get("seconds", time.perf_counter() - start),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--difficulty", default="hard")
+    parser.add_argument("--target", type=float, default=20.0, help="rolling score to reach on --difficulty")
+    parser.add_argument("--max-episodes", type=int, default=5000)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+    parser.add_argument("--out", default="benchmarks/results/curriculum.json")
+    args = parser.parse_args(argv)
+
+    runs = {"direct": [], "curriculum": []}
+    for seed in args.seeds:
+        for mode in ("direct", "curriculum"):
+            res = time_to_target(args.difficulty, args.target, args.max_episodes, seed, mode == "curriculum")
+            res["seed"] = seed
+            runs[mode].append(res)
+
+    print(f"\nTime to avg score {args.target} on '{args.difficulty}':")
+    for mode, results in runs.items():
+        for r in results:
+            status = f"{r['steps']} steps / {r['seconds']:.0f}s" if r["reached"] else f"not reached ({r['seconds']:.0f}s)"
+            print(f"  {mode:10s} seed {r['seed']}: {status}")
+
+    save_results({"metadata": machine_metadata(), "args": vars(args), "runs": runs}, args.out)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Data-parallel scaling: updates/s and samples/s for 1..N local Gloo ranks (distributed.py).
+'learner' times Agent.update + gradient all-reduce on pre-filled shards; 'train' runs
+train_distributed end to end (env stepping, act, push, update) after warmup.
+
+    python -m benchmarks.distributed --ranks 1 2 4 --updates 2000
+"""
+import os
+import argparse
+import tempfile
+
+import benchmarks  # noqa: F401  (SDL dummy driver)
+from benchmarks.core import machine_metadata, save_results
+
+
+def _worker(rank, world_size, queue, mode, kwargs):
+    from distributed import learner_throughput, train_distributed
+
+    if mode == "learner":
+        out = learner_throughput(rank, world_size, **kwargs)
+    else:
+        out = {}
+        # The closing log line covers every step after warmup
+        train_distributed(rank, world_size, callback=out.update, **kwargs)
+    if rank == 0:
+        queue.put(out)
+
+
+def run(mode, ranks, **kwargs):
+    import torch.multiprocessing as tmp
+    from distributed import launch
+
+    queue = tmp.get_context("spawn").SimpleQueue()
+    launch(_worker, ranks, queue, mode, kwargs)
+    return queue.get()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ranks", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--updates", type=int, default=2000, help="timed updates per rank")
+    parser.add_argument("--batch-size", type=int, default=64, help="per rank")
+    parser.add_argument("--modes", nargs="+", default=["learner", "train"], choices=["learner", "train"])
+    parser.add_argument("--out", default="benchmarks/results/distributed.json")
+    args = parser.parse_args(argv)
+
+    results = {mode: {} for mode in args.modes}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in args.ranks:
+            if "learner" in args.modes:
+                results["learner"][n] = run("learner", n, updates=args.updates, batch_size=args.batch_size)
+            if "train" in args.modes:
+                results["train"][n] = run("train", n, steps=args.updates, batch_size=args.batch_size,
+                                          warmup_steps=2000, log_every_steps=None,
+                                          checkpoint_every_steps=None, checkpoint_every_seconds=None,
+                                          checkpoint_path=os.path.join(tmp, "dist.pth"))
+
+    print(f"\nData-parallel scaling ({os.cpu_count()} cores, batch {args.batch_size} per rank):")
+    for mode, runs in results.items():
+        base = runs.get(args.ranks[0])
+        for n, r in runs.items():
+            speedup = r["samples_per_s"] / base["samples_per_s"]
+            print(f"  {mode:8s} {n:3d} ranks  {r['updates_per_s']:8.0f} updates/s  "
+                  f"{r['samples_per_s']:10.0f} samples/s  ({speedup:.2f}x samples/s vs {args.ranks[0]} rank)")
+
+    save_results({"metadata": machine_metadata(), "args": vars(args), "results": results}, args.out)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
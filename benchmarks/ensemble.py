@@ -0,0 +1,104 @@
+"""
+Ensemble vs independent processes: member-updates/s for E stacked members trained by one
+EnsembleAgent, against E separate processes each running Agent.update on the same cores
+(one torch thread per process, as parallel train_loop seeds would run).
+
+    python -m benchmarks.ensemble --members 8 16 32 --updates 300
+"""
+import os
+import time
+import argparse
+import multiprocessing as mp
+
+import numpy as np
+
+import benchmarks  # noqa: F401  (SDL dummy driver)
+from benchmarks.core import machine_metadata, save_results
+
+BATCH_SIZE = 64
+FILL = 10_000
+
+
+def _filled(num_members=None):
+    from utils import ReplayBuffer
+    from agent_ensemble import EnsembleReplayBuffer
+
+    rng = np.random.default_rng(0)
+    buf = EnsembleReplayBuffer(num_members, FILL) if num_members else ReplayBuffer(FILL)
+    shape = (num_members, 4) if num_members else (4,)
+    lead = (num_members,) if num_members else ()
+    for _ in range(FILL):
+        buf.push(rng.standard_normal(shape).astype(np.float32), rng.integers(0, 2, lead),
+                 rng.standard_normal(lead).astype(np.float32), rng.standard_normal(shape).astype(np.float32),
+                 np.zeros(lead, dtype=np.float32))
+    return buf
+
+
+def _single_process(updates, start_barrier, end_barrier):
+    import torch
+    from agent import Agent
+
+    torch.set_num_threads(1)
+    agent = Agent(device="cpu")
+    buf = _filled()
+    agent.update(buf, BATCH_SIZE)
+    start_barrier.wait()
+    for _ in range(updates):
+        agent.update(buf, BATCH_SIZE)
+    end_barrier.wait()
+
+
+def independent_rate(num_members, updates):
+    """Aggregate member-updates/s of E concurrent single-agent processes."""
+    ctx = mp.get_context("spawn")
+    # Barriers around the timed loop keep process start-up and interpreter exit out of the measurement
+    start_barrier, end_barrier = ctx.Barrier(num_members + 1), ctx.Barrier(num_members + 1)
+    procs = [ctx.Process(target=_single_process, args=(updates, start_barrier, end_barrier))
+             for _ in range(num_members)]
+    for p in procs:
+        p.start()
+    start_barrier.wait()
+    start = time.perf_counter()
+    end_barrier.wait()
+    elapsed = time.perf_counter() - start
+    for p in procs:
+        p.join()
+    return num_members * updates / elapsed
+
+
+def ensemble_rate(num_members, updates, threads):
+    import torch
+    from agent_ensemble import EnsembleAgent
+
+    torch.set_num_threads(threads)
+    agent = EnsembleAgent(num_members, device="cpu", seed=0)
+    buf = _filled(num_members)
+    agent.update(buf, BATCH_SIZE)
+    start = time.perf_counter()
+    for _ in range(updates):
+        agent.update(buf, BATCH_SIZE)
+    return num_members * updates / (time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--members", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--updates", type=int, default=300, help="updates per member")
+    parser.add_argument("--out", default="benchmarks/results/ensemble.json")
+    args = parser.parse_args(argv)
+
+    cores = os.cpu_count() or 1
+    rows = []
+    print(f"{'E':>4} {'ensemble':>12} {'processes':>12} {'speedup':>8}   (member-updates/s, {cores} cores)")
+    for e in args.members:
+        ens = ensemble_rate(e, args.updates, cores)
+        ind = independent_rate(e, args.updates)
+        rows.append({"members": e, "ensemble": ens, "independent": ind, "speedup": ens / ind})
+        print(f"{e:>4} {ens:12.0f} {ind:12.0f} {ens / ind:7.1f}x")
+
+    save_results({"metadata": machine_metadata(), "args": vars(args), "rows": rows}, args.out)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+ES vs DQN: wall-clock and env steps until the policy reaches a target score, for the
+evolution-strategies trainer at 1, 4 and all cores and for train_loop (single process).
+ES progress is the greedy score of theta on fixed evaluation courses; DQN progress is the
+rolling training score, as in benchmarks.pretrain.
+
+    python -m benchmarks.es --target 20 --workers 1 4 0
+"""
+import os
+import time
+import argparse
+import tempfile
+
+import benchmarks  # noqa: F401  (SDL dummy driver)
+from benchmarks.core import machine_metadata, save_results
+from benchmarks.pretrain import time_to_target
+from es import train_es
+
+
+def es_time_to_target(target, workers, difficulty, max_generations, population, max_steps, seed):
+    reached = {}
+    last = {"avg_score": 0.0}
+    start = time.perf_counter()
+
+    def on_log(info):
+        last["avg_score"] = info["avg_score"]
+        if info["avg_score"] >= target:
+            reached.update(steps=info["steps"], generations=info["generation"], seconds=time.perf_counter() - start)
+            return True
+        return False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        train_es(generations=max_generations, population=population, workers=workers, difficulty=difficulty,
+                 max_steps=max_steps, checkpoint_path=os.path.join(tmp, "es.pth"), seed=seed, eval_every=1,
+                 callback=on_log)
+    return {
+        "reached": bool(reached),
+        "steps": reached.get("steps"),
+        "generations": reached.get("generations"),
+        "seconds": reached.get("seconds", time.perf_counter() - start),
+        "final_avg_score": last["avg_score"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--difficulty", default="normal")
+    parser.add_argument("--target", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 0], help="ES pool sizes; 0 = all cores")
+    parser.add_argument("--population", type=int, default=32)
+    parser.add_argument("--max-generations", type=int, default=300)
+    parser.add_argument("--max-steps", type=int, default=5000, help="ES episode cap (must allow the target)")
+    parser.add_argument("--max-episodes", type=int, default=3000, help="DQN budget")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-dqn", action="store_true")
+    parser.add_argument("--out", default="benchmarks/results/es.json")
+    args = parser.parse_args(argv)
+
+    cores = os.cpu_count() or 1
+    runs = {}
+    for w in args.workers:
+        w = w or cores
+        runs[f"es_{w}"] = es_time_to_target(args.target, w, args.difficulty, args.max_generations,
+                                            args.population, args.max_steps, args.seed)
+    if not args.skip_dqn:
+        runs["dqn"] = time_to_target(args.difficulty, args.target, args.max_episodes, args.seed)
+
+    print(f"\nTime to score {args.target} on '{args.difficulty}' ({cores} cores):")
+    for name, r in runs.items():
+        if r["reached"]:
+            print(f"  {name:8s} {r['seconds']:8.1f}s  {r['steps']:>10,} env steps")
+        else:
+            print(f"  {name:8s} not reached in {r['seconds']:.1f}s (last score {r['final_avg_score']:.2f})")
+
+    save_results({"metadata": machine_metadata(), "args": vars(args), "runs": runs}, args.out)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Fast-forward vs frame-by-frame: replays oracle-planned courses with env.advance() and with
+step(), checks that every chunk between flaps ends in the identical state (positions, pipes,
+score, RNG) and that the final crash happens on the same frame, then reports the speedup.
+
+    python -m benchmarks.fast_forward --difficulty normal hard --target-score 300 --seeds 0 1 2
+"""
+import time
+import argparse
+
+import benchmarks  # noqa: F401  (SDL dummy driver)
+from benchmarks.core import machine_metadata, save_results
+from env import FlappyBirdEnv
+from oracle import SearchOracle
+
+
+def env_key(env):
+    """Everything step() mutates; scored pipes as positions since ids differ between envs."""
+    return (env.bird_y, env.bird_vel, env.bird_frame, env.anim_timer, env.bg_x, env.base_x,
+            [tuple(p) for p in env.pipes], [id(p) in env.scored_pipes for p in env.pipes],
+            env.score, env.done, env.rng.getstate())
+
+
+def check_course(difficulty, seed, actions):
+    """Replay `actions` chunk by chunk (a flap plus the no-flap run after it) in both modes."""
+    ref = FlappyBirdEnv(difficulty=difficulty, render_mode=False)
+    ff = FlappyBirdEnv(difficulty=difficulty, render_mode=False)
+    ref.reset(seed=seed)
+    ff.reset(seed=seed)
+    i = 0
+    while i < len(actions):
+        j = i + 1
+        while j < len(actions) and not actions[j]:
+            j += 1
+        for a in actions[i:j]:
+            ref.step(a)
+        ff.advance(actions[i:j])
+        if env_key(ref) != env_key(ff):
+            raise AssertionError(f"{difficulty} seed {seed}: state differs after frame {j}")
+        i = j
+    # No more flaps: both must crash on the same frame in the same state
+    while not ref.done:
+        ref.step(0)
+    ff.fast_forward(10 ** 7)
+    if env_key(ref) != env_key(ff):
+        raise AssertionError(f"{difficulty} seed {seed}: final crash differs")
+
+
+def time_replay(difficulty, seed, actions, fast):
+    env = FlappyBirdEnv(difficulty=difficulty, render_mode=False)
+    env.reset(seed=seed)
+    start = time.perf_counter()
+    if fast:
+        env.advance(actions)
+    else:
+        for a in actions:
+            env.step(a)
+    return time.perf_counter() - start, env.score
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--difficulty", nargs="+", default=["easy", "normal", "hard", "extreme"])
+    parser.add_argument("--target-score", type=int, default=300)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0, 1, 2])
+    parser.add_argument("--out", default="benchmarks/results/fast_forward.json")
+    args = parser.parse_args(argv)
+
+    rows = []
+    print(f"{'difficulty':10s} {'seed':>4s} {'frames':>8s} {'flaps':>6s} {'step s':>8s} {'advance s':>9s} {'speedup':>7s}")
+    for dif in args.difficulty:
+        oracle = SearchOracle(dif)
+        for seed in args.seeds:
+            actions, _ = oracle.plan(seed, target_score=args.target_score)
+            check_course(dif, seed, actions)
+            t_step, score = time_replay(dif, seed, actions, fast=False)
+            t_ff, score_ff = time_replay(dif, seed, actions, fast=True)
+            assert score == score_ff
+            rows.append({"difficulty": dif, "seed": seed, "frames": len(actions), "flaps": sum(actions),
+                         "score": score, "step_s": t_step, "advance_s": t_ff, "speedup": t_step / t_ff})
+            print(f"{dif:10s} {seed:4d} {len(actions):8d} {sum(actions):6d} {t_step:8.3f} {t_ff:9.3f} "
+                  f"{t_step / t_ff:6.1f}x")
+        oracle.close()
+
+    # Pure glide: one long no-flap run per course, the case a "won't flap for k frames" policy hits
+    env = FlappyBirdEnv(render_mode=False)
+    start = time.perf_counter()
+    frames = 0
+    for seed in range(200):
+        env.reset(seed=seed)
+        frames += env.fast_forward(10 ** 7)[2]["frames"]
+    glide = frames / (time.perf_counter() - start)
+    print(f"\nEquivalence OK on {len(rows)} courses. No-flap glide: {glide:,.0f} frames/s")
+
+    save_results({"metadata": machine_metadata(), "args": vars(args), "rows": rows, "glide_frames_per_s": glide},
+                 args.out)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Policy server vs per-process models: aggregate act() calls/s for C concurrent client processes
+answered by one batching PolicyServer (policy_server.py), against C processes that each load
+the checkpoint and call InferencePolicy.act one state at a time.
+
+    python -m benchmarks.policy_server --clients 1 4 16 --latency-ms 0 2
+"""
+import os
+import time
+import argparse
+import tempfile
+import multiprocessing as mp
+
+import numpy as np
+
+import benchmarks  # noqa: F401  (SDL dummy driver)
+from benchmarks.core import machine_metadata, save_results
+
+
+def _client(address, checkpoint, acts, start_barrier, end_barrier):
+    states = np.random.default_rng(os.getpid()).standard_normal((acts, 4)).astype(np.float32)
+    if address is None:
+        import torch
+        from model_cache import get_policy
+
+        torch.set_num_threads(1)
+        policy = get_policy(checkpoint, device="cpu", verbose=False)
+    else:
+        from policy_server import PolicyClient
+        policy = PolicyClient(address)
+    policy.act(states[0])
+    start_barrier.wait()
+    for s in states:
+        policy.act(s)
+    end_barrier.wait()
+
+
+def acts_per_second(clients, acts, checkpoint, address=None):
+    """Aggregate act() calls/s of `clients` concurrent processes (local models when address is None)."""
+    ctx = mp.get_context("spawn")
+    # Barriers around the timed loop keep process start-up and model loading out of the measurement
+    start_barrier, end_barrier = ctx.Barrier(clients + 1), ctx.Barrier(clients + 1)
+    procs = [ctx.Process(target=_client, args=(address, checkpoint, acts, start_barrier, end_barrier))
+             for _ in range(clients)]
+    for p in procs:
+        p.start()
+    start_barrier.wait()
+    start = time.perf_counter()
+    end_barrier.wait()
+    elapsed = time.perf_counter() - start
+    for p in procs:
+        p.join()
+    return clients * acts / elapsed
+
+
+def main(argv=None):
+    import torch
+    from agent import Agent
+    from policy_server import PolicyServer
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--latency-ms", type=float, nargs="+", default=[0.0, 2.0], help="server batching windows")
+    parser.add_argument("--acts", type=int, default=2000, help="act() calls per client")
+    parser.add_argument("--out", default="benchmarks/results/policy_server.json")
+    args = parser.parse_args(argv)
+
+    runs = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        checkpoint = os.path.join(tmp, "policy.pth")
+        torch.manual_seed(0)
+        Agent(device="cpu").save(checkpoint)
+        for c in args.clients:
+            runs[f"local_{c}"] = {"clients": c, "acts_per_s": acts_per_second(c, args.acts, checkpoint)}
+            for ms in args.latency_ms:
+                address = f"unix:{os.path.join(tmp, 'policy.sock')}"
+                with PolicyServer(checkpoint, address, max_latency_ms=ms, reload_seconds=None).start() as server:
+                    rate = acts_per_second(c, args.acts, checkpoint, address)
+                    stats = server.stats()
+                runs[f"server_{ms:g}ms_{c}"] = {
+                    "clients": c, "max_latency_ms": ms, "acts_per_s": rate, "mean_batch": stats["mean_batch"],
+                    "latency_p50_us": stats["latency_us"]["p50"], "latency_p99_us": stats["latency_us"]["p99"],
+                }
+
+    print(f"\nact() calls/s ({os.cpu_count()} cores):")
+    for name, r in runs.items():
+        extra = (f"  mean batch {r['mean_batch']:5.1f}  server latency p50 {r['latency_p50_us']:6.0f} us "
+                 f"p99 {r['latency_p99_us']:6.0f} us" if "mean_batch" in r else "")
+        print(f"  {name:18s} {r['acts_per_s']:9.0f}/s{extra}")
+
+    save_results({"metadata": machine_metadata(), "args": vars(args), "runs": runs}, args.out)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Oracle pretraining vs plain DQN: demonstrations/sec from the search oracle, then env steps
+and wall-clock until the rolling score reaches a target with and without behavior-cloning
+pretraining on those demonstrations. Slow (full training runs), so it is a standalone script.
+
+    python -m benchmarks.pretrain --difficulty normal --target 20 --seeds 0 1 2
+"""
+import os
+import time
+import argparse
+import tempfile
+
+import benchmarks  # noqa: F401  (SDL dummy driver)
+from benchmarks.core import machine_metadata, save_results
+from dataset import ShardWriter, write_manifest
+from oracle import generate_demos
+from train import train_loop
+
+
+def time_to_target(difficulty, target, max_episodes, seed, demo_dir=None, bc_updates=0, epsilon_start=1.0):
+    """Train until the rolling average score reaches `target`."""
+    reached = {}
+    last = {"avg_score": 0.0}
+    start = time.perf_counter()
+
+    def on_log(info):
+        last["avg_score"] = info["avg_score"]
+        if info["avg_score"] >= target:
+            reached.update(steps=info["steps"], episodes=info["episode"], seconds=time.perf_counter() - start)
+            return True
+        return False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        train_loop(num_episodes=max_episodes, difficulty=difficulty, seed=seed, callback=on_log,
+                   checkpoint_path=os.path.join(tmp, "bench.pth"), demo_dir=demo_dir, bc_updates=bc_updates,
+                   epsilon_start=epsilon_start)
+    return {
+        "reached": bool(reached),
+        "steps": reached.get("steps"),
+        "episodes": reached.get("episodes"),
+        "seconds": reached.get("seconds", time.perf_counter() - start),
+        "final_avg_score": last["avg_score"],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--difficulty", default="normal")
+    parser.add_argument("--target", type=float, default=20.0, help="rolling score to reach")
+    parser.add_argument("--max-episodes", type=int, default=3000)
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+    parser.add_argument("--demo-episodes", type=int, default=20)
+    parser.add_argument("--demo-target", type=int, default=50, help="score each demonstration course is planned to")
+    parser.add_argument("--bc-updates", type=int, default=3000)
+    parser.add_argument("--pretrained-epsilon", type=float, default=0.02, help="epsilon_start after pretraining")
+    parser.add_argument("--out", default="benchmarks/results/pretrain.json")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as demo_dir:
+        # Demonstration courses use seeds disjoint from the training seeds' pipe streams
+        writer = ShardWriter(demo_dir, prefix="oracle")
+        demo_stats = generate_demos(writer, args.demo_episodes, 10_000, args.demo_target, args.difficulty,
+                                    verbose=False)
+        write_manifest(demo_dir, writer.close(), meta=demo_stats)
+        print(f"Oracle: {demo_stats['transitions']:,} demo transitions in {demo_stats['seconds']:.1f}s "
+              f"({demo_stats['demos_per_sec']:,.0f}/s)")
+
+        runs = {"scratch": [], "pretrained": []}
+        for seed in args.seeds:
+            res = time_to_target(args.difficulty, args.target, args.max_episodes, seed)
+            res["seed"] = seed
+            runs["scratch"].append(res)
+            res = time_to_target(args.difficulty, args.target, args.max_episodes, seed, demo_dir,
+                                 args.bc_updates, args.pretrained_epsilon)
+            res["seed"] = seed
+            runs["pretrained"].append(res)
+
+    print(f"\nTime to avg score {args.target} on '{args.difficulty}':")
+    for mode, results in runs.items():
+        for r in results:
+            if r["reached"]:
+                status = f"{r['steps']} steps / {r['seconds']:.0f}s"
+            else:
+                status = f"not reached ({r['seconds']:.0f}s, final avg {r['final_avg_score']:.2f})"
+            print(f"  {mode:10s} seed {r['seed']}: {status}")
+
+    save_results({"metadata": machine_metadata(), "args": vars(args), "oracle": demo_stats, "runs": runs}, args.out)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Background evaluation of training snapshots with best-k retention.
+
+The learner hands weight snapshots to BackgroundEvaluator.submit(), which returns at once;
+a separate process plays seeded greedy episodes on each snapshot, keeps the k best by mean
+score as <out_dir>/step_<N>.pth and atomically promotes the leader to `best_path`. When the
+evaluator falls behind, pending snapshots are replaced by newer ones instead of piling up.
+
+    python checkpoint_eval.py --dir checkpoints      # print the leaderboard
+"""
+import os
+import glob
+import json
+import queue
+import shutil
+import filecmp
+import argparse
+import multiprocessing as mp
+
+from config import CHECKPOINT_PATH
+import config as cf
+
+
+def atomic_save(agent, path):
+    """agent.save to a temp file in the same directory, then os.replace: readers never see a partial file."""
+    tmp = f"{path}.tmp{os.getpid()}"
+    agent.save(tmp)
+    os.replace(tmp, path)
+
+
+def _atomic_json(obj, path):
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(obj, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _atomic_copy(src, path):
+    tmp = f"{path}.tmp{os.getpid()}"
+    shutil.copyfile(src, tmp)
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _remove_stale_tmp(pattern):
+    """Delete temp files (<name>.tmp<pid>) left by writers that were killed mid-write."""
+    for path in glob.glob(pattern):
+        pid = path.rsplit(".tmp", 1)[1]
+        if pid.isdigit() and int(pid) != os.getpid() and _pid_alive(int(pid)):
+            continue
+        os.remove(path)
+
+
+class Leaderboard:
+    """
+    The k best snapshots by evaluated score, persisted as <out_dir>/leaderboard.json.
+    Entries that no longer make the cut have their files deleted. Ties go to the later step.
+    leaderboard.json is the commit record: an offer saves the new snapshot, rewrites the json,
+    and only then deletes evicted files and promotes the leader. An evaluator killed part-way
+    (close(wait=False)) therefore leaves at most unlisted files and a stale best_path, which the
+    next Leaderboard on the same directory deletes / re-promotes from the json.
+    Parameters:
+        out_dir (str): where step_<N>.pth files and leaderboard.json live
+        keep (int): snapshots retained
+        best_path (str|None): the leader is also written here (atomically) whenever it changes
+    """
+    def __init__(self, out_dir, keep=3, best_path=CHECKPOINT_PATH):
+        self.out_dir = out_dir
+        self.keep = keep
+        self.best_path = best_path
+        self.path = os.path.join(out_dir, "leaderboard.json")
+        os.makedirs(out_dir, exist_ok=True)
+        self.entries = []
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                # A resumed run keeps competing against the snapshots that are still on disk
+                self.entries = [e for e in json.load(f)["entries"] if os.path.exists(e["path"])]
+        self._reconcile()
+
+    def _reconcile(self):
+        """Bring the files back in line with leaderboard.json after an interrupted offer."""
+        _remove_stale_tmp(os.path.join(self.out_dir, "*.tmp*"))
+        if self.best_path:
+            _remove_stale_tmp(f"{self.best_path}.tmp*")
+        listed = {os.path.abspath(e["path"]) for e in self.entries}
+        for path in glob.glob(os.path.join(self.out_dir, "step_*.pth")):
+            if os.path.abspath(path) not in listed:
+                os.remove(path)
+        leader = self.best()
+        if leader is not None and self.best_path and not (
+                os.path.exists(self.best_path) and filecmp.cmp(leader["path"], self.best_path, shallow=False)):
+            self._promote(leader["path"])
+
+    def _promote(self, src):
+        if os.path.dirname(self.best_path):
+            os.makedirs(os.path.dirname(self.best_path), exist_ok=True)
+        _atomic_copy(src, self.best_path)
+
+    @staticmethod
+    def _key(entry):
+        return entry["score"], entry["step"]
+
+    def offer(self, agent, step, score, summary=None):
+        """
+        Keep the agent's weights if they rank in the top k.
+        Returns:
+            tuple: (kept, promoted) booleans
+        """
+        entry = {"step": int(step), "score": float(score), "summary": summary or {},
+                 "path": os.path.join(self.out_dir, f"step_{int(step):09d}.pth")}
+        # A re-evaluated step (e.g. the final snapshot of a run) replaces its earlier entry
+        others = [e for e in self.entries if e["path"] != entry["path"]]
+        ranked = sorted(others + [entry], key=self._key, reverse=True)
+        if not any(e is entry for e in ranked[:self.keep]):
+            return False, False
+        atomic_save(agent, entry["path"])
+        self.entries = ranked[:self.keep]
+        _atomic_json({"best_path": self.best_path, "entries": self.entries}, self.path)  # commit point
+        for old in ranked[self.keep:]:
+            if os.path.exists(old["path"]):
+                os.remove(old["path"])
+        promoted = ranked[0] is entry
+        if promoted and self.best_path:
+            self._promote(entry["path"])
+        return True, promoted
+
+    def best(self):
+        return max(self.entries, key=self._key) if self.entries else None
+
+
+# =========================================================================
+# EVALUATOR PROCESS
+# =========================================================================
+
+def _evaluator(snapshots, results, out_dir, keep, best_path, episodes, difficulty, max_steps, seed,
+               env_overrides, torch_threads):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import torch
+    from agent import Agent
+    from evaluate import evaluate_agent, summarize_scores
+
+    torch.set_num_threads(torch_threads)
+    board = Leaderboard(out_dir, keep, best_path)
+    agent = Agent(device="cpu")
+    agent.policy_net.eval()
+    while True:
+        item = snapshots.get()
+        if item is None:
+            break
+        step, policy_state, target_state = item
+        agent.policy_net.load_state_dict({k: torch.from_numpy(v) for k, v in policy_state.items()})
+        agent.target_net.load_state_dict({k: torch.from_numpy(v) for k, v in target_state.items()})
+        runs = evaluate_agent(agent, episodes, difficulty, max_steps=max_steps, seed=seed,
+                              env_overrides=env_overrides)
+        summary = summarize_scores([r["score"] for r in runs])
+        kept, promoted = board.offer(agent, step, summary["mean"],
+                                     {k: summary[k] for k in ("mean", "ci_low", "ci_high")})
+        results.put({"step": step, "score": summary["mean"], "ci_low": summary["ci_low"],
+                     "ci_high": summary["ci_high"], "kept": kept, "promoted": promoted,
+                     "best_step": board.best()["step"], "best_score": board.best()["score"]})
+
+
+class BackgroundEvaluator:
+    """
+    Learner-side handle of the evaluator process.
+    Parameters:
+        out_dir (str): snapshot directory. Default: SNAPSHOT_DIR
+        keep (int): best snapshots retained. Default: BEST_K (or 3 when that is 0)
+        best_path (str): the leading snapshot is promoted here. Default: CHECKPOINT_PATH
+        episodes (int): seeded greedy episodes per snapshot (seeds seed .. seed + episodes - 1). Default: SNAPSHOT_EVAL_EPISODES
+        difficulty (str): evaluation difficulty; keep it fixed across a run so scores are comparable
+        max_steps (int|None): episode cap during evaluation
+        max_pending (int): snapshots waiting for the evaluator; a new submit replaces the oldest
+            one when the queue is full. Default: SNAPSHOT_QUEUE
+        torch_threads (int): threads for the evaluator's forward passes. Default: 1
+
+    Example:
+        >>> evaluator = BackgroundEvaluator("checkpoints", keep=3)
+        >>> evaluator.submit(agent, total_steps)      # returns immediately
+        >>> for r in evaluator.poll(): print(r)
+        >>> evaluator.close()
+    """
+    def __init__(self, out_dir=cf.SNAPSHOT_DIR, keep=cf.BEST_K or 3, best_path=CHECKPOINT_PATH,
+                 episodes=cf.SNAPSHOT_EVAL_EPISODES, difficulty="normal", max_steps=None, seed=10_000,
+                 env_overrides=None, max_pending=cf.SNAPSHOT_QUEUE, torch_threads=1):
+        ctx = mp.get_context("spawn")
+        self._snapshots = ctx.Queue(maxsize=max_pending)
+        self._results = ctx.Queue()
+        self.submitted = 0
+        self.dropped = 0
+        self._warned = False
+        self._board_args = (out_dir, keep, best_path)
+        self._proc = ctx.Process(target=_evaluator, name="checkpoint-evaluator", daemon=True, args=(
+            self._snapshots, self._results, out_dir, keep, best_path, episodes, difficulty, max_steps, seed,
+            env_overrides, torch_threads))
+        self._proc.start()
+
+    def submit(self, agent, step):
+        """Queue a copy of the agent's weights for evaluation without waiting. Returns False if one was dropped."""
+        if not self._proc.is_alive():
+            if not self._warned:
+                print(f"[checkpoint eval] evaluator process exited (code {self._proc.exitcode}); snapshots are not evaluated")
+                self._warned = True
+            return False
+        item = (int(step),
+                {k: v.detach().cpu().numpy().copy() for k, v in agent.policy_net.state_dict().items()},
+                {k: v.detach().cpu().numpy().copy() for k, v in agent.target_net.state_dict().items()})
+        self.submitted += 1
+        fresh = True
+        for _ in range(2):
+            try:
+                self._snapshots.put_nowait(item)
+                return fresh
+            except queue.Full:
+                try:
+                    self._snapshots.get_nowait()  # stale: a newer snapshot supersedes it
+                    self.dropped += 1
+                    fresh = False
+                except queue.Empty:
+                    pass
+        self.dropped += 1
+        return False
+
+    def poll(self):
+        """Results finished since the last poll (dicts with step, score, CI, kept, promoted, best_*)."""
+        out = []
+        while True:
+            try:
+                out.append(self._results.get_nowait())
+            except queue.Empty:
+                return out
+
+    def close(self, wait=True):
+        """
+        Stop the evaluator. With wait=True the snapshots already queued are evaluated first
+        and their results returned. Otherwise the process is terminated at once, abandoning the
+        snapshot in progress too, and the snapshot files are reconciled with leaderboard.json
+        (see Leaderboard) in case it was killed part-way through an offer.
+        """
+        if not wait:
+            # Unread snapshots must not keep this process waiting on the queue's feeder thread at exit
+            self._snapshots.cancel_join_thread()
+            # SIGKILL: once the evaluator has an env, SDL's SIGTERM handler turns terminate() into a no-op
+            self._proc.kill()
+            self._proc.join()
+            Leaderboard(*self._board_args)
+            return self.poll()
+        while self._proc.is_alive():
+            try:
+                self._snapshots.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        out = []
+        while self._proc.is_alive() or not self._results.empty():
+            try:
+                out.append(self._results.get(timeout=0.1))
+            except queue.Empty:
+                continue
+        self._proc.join()
+        return out
+
+
+def format_result(r):
+    status = "promoted to best" if r["promoted"] else ("kept" if r["kept"] else "discarded")
+    return (f"Snapshot @ {r['step']} steps: mean score {r['score']:.2f} [{r['ci_low']:.2f}, {r['ci_high']:.2f}] "
+            f"-> {status} (best {r['best_score']:.2f} @ {r['best_step']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the best-k snapshot leaderboard.")
+    parser.add_argument("--dir", default=cf.SNAPSHOT_DIR)
+    args = parser.parse_args()
+
+    path = os.path.join(args.dir, "leaderboard.json")
+    if not os.path.exists(path):
+        print(f"No leaderboard in {args.dir}")
+    else:
+        with open(path) as f:
+            board = json.load(f)
+        print(f"Best snapshots in {args.dir} (leader promoted to {board['best_path']}):")
+        for i, e in enumerate(sorted(board["entries"], key=lambda e: (e["score"], e["step"]), reverse=True), 1):
+            s = e.get("summary", {})
+            print(f"  {i}. step {e['step']:9d} | mean score {e['score']:7.2f} "
+                  f"[{s.get('ci_low', e['score']):.2f}, {s.get('ci_high', e['score']):.2f}] | {e['path']}")
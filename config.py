@@ -9,6 +9,45 @@ FPS = 60                 # Frames per second
 EPI_NUMS = 2000          # Number of episodes for training
 ASSET_DIR_NAME = "assets"  # Directory containing game assets
 CHECKPOINT_PATH = "best.pth"  # Path to save/load model weights
+MODEL_CACHE_SIZE = 4          # Inference models kept warm by model_cache.py (LRU)
+
+# Watch mode (play.watch_model)
+WATCH_SPEED = 8.0             # Simulated steps per displayed frame at start (1 = real time)
+WATCH_LOOKAHEAD = 90          # Frames simulated ahead of the display; a crash this close plays in real time
+WATCH_CLOSE_CALL_PX = 12      # Bird this close to a pipe edge while inside the pipe -> real time
+WATCH_JUMP_STEPS = 3600       # Frames skipped by the J hotkey (one minute of game time)
+WATCH_MAX_RENDER_FPS = 30     # Display rate in "as fast as possible" mode
+
+# Policy inference server (policy_server.py)
+POLICY_SERVER_ADDRESS = "127.0.0.1:50707"  # "host:port" or "unix:/path/to.sock"
+POLICY_SERVER_MAX_LATENCY_MS = 2.0   # Longest the first request of a batch waits for others to join
+POLICY_SERVER_MAX_BATCH = 256        # Requests per batched forward
+POLICY_SERVER_RELOAD_SECONDS = 1.0   # Checkpoint mtime poll interval for hot reload
+
+# Curriculum training (train_loop(curriculum=True))
+CURRICULUM_STAGES = ["easy", "normal", "hard", "extreme"]  # Promotion order
+CURRICULUM_PROMOTE_SCORE = 20.0  # Rolling average score needed to move to the next stage
+CURRICULUM_WINDOW = 20           # Episodes in the rolling average (also min episodes per stage)
+
+# Episode length and train_loop cadence (step / wall-clock triggers fire mid-episode too; None = off)
+MAX_EPISODE_STEPS = None          # Truncate training episodes after this many steps (bootstrapped, not terminal)
+LOG_EVERY_EPISODES = 10           # Log line (+ checkpoint and callback) every N finished episodes
+LOG_EVERY_STEPS = None            # Extra mid-episode log line (+ checkpoint) every N env steps ...
+LOG_EVERY_SECONDS = None          # ... or every N seconds; callbacks stay on the episode cadence
+DISTRIBUTED_LOG_EVERY_STEPS = 10_000  # distributed.py global log line every N updates
+CHECKPOINT_EVERY_STEPS = 50_000   # Extra checkpoint saves between log lines
+CHECKPOINT_EVERY_SECONDS = 300
+EVAL_EVERY_STEPS = None           # Greedy evaluation on seeded courses (evaluate.evaluate_agent)
+EVAL_EVERY_SECONDS = None
+EVAL_EPISODES = 5
+
+# Background snapshot evaluation (train_loop(best_k=K), checkpoint_eval.py)
+BEST_K = 0                        # Snapshots kept by evaluated score; 0 = off (CHECKPOINT_PATH overwritten on every save)
+SNAPSHOT_DIR = "checkpoints"      # step_<N>.pth for the k best, leaderboard.json and last.pth (resume)
+SNAPSHOT_EVERY_STEPS = 25_000     # Snapshot handed to the evaluator process every N env steps ...
+SNAPSHOT_EVERY_SECONDS = None     # ... and / or every N seconds
+SNAPSHOT_EVAL_EPISODES = 10       # Seeded greedy episodes per snapshot
+SNAPSHOT_QUEUE = 1                # Snapshots waiting for the evaluator; older ones are dropped when it falls behind
 
 # Game layout constants
 INIT_PIPE_OFFSET = 100   # Initial distance of first pipe from screen edge
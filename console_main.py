@@ -1,6 +1,7 @@
-from train import train_loop
 from config import EPI_NUMS
-from play import play_model, play_model_no_render
+
+# train / play (torch, pygame, matplotlib) are imported inside the branch that needs them,
+# so the menu appears immediately and "Quit" costs nothing.
 
 def main():
     """Main menu interface for Flappy Bird DQN."""
@@ -11,20 +12,29 @@ def main():
     print("2: Continue training from checkpoint (headless)")
     print("3: Play with trained model (render)")
     print("4: Play with trained model (NO render)")
-    print("5: Quit")
+    print("5: Watch trained model (fast-forward render)")
+    print("6: Quit")
     print("\nNote: Press ESC to quit during render mode.")
     
-    choice = input("Your choice (1-5): ").strip()
+    choice = input("Your choice (1-6): ").strip()
     
     if choice == "1":
+        from train import train_loop
         train_loop(num_episodes=EPI_NUMS, render=False, resume=False, difficulty="normal")
     elif choice == "2":
+        from train import train_loop
         train_loop(num_episodes=EPI_NUMS, render=False, resume=True)
     elif choice == "3":
+        from play import play_model
         play_model(render=True, dif="normal") # hidden difficulty level
     elif choice == "4":
+        from play import play_model_no_render
         play_model_no_render(target_score=1000, num_episodes=1, dif="normal") # hidden difficulty level
     elif choice == "5":
+        from play import watch_model
+        print("Hotkeys: UP/DOWN speed, 1 real time, M max speed, J jump ahead, SPACE pause, ESC quit")
+        watch_model(dif="normal") # hidden difficulty level
+    elif choice == "6":
         print("Exiting...")
     else:
         print("Unknown choice. Exiting.")
@@ -0,0 +1,318 @@
+import os
+import json
+import time
+import queue
+import random
+import argparse
+import threading
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from reward_shaping import EVENT_UNKNOWN, recompute_rewards
+
+# One record per transition; shards are plain .npy files of this dtype, so they memory-map.
+# features / event are the inputs of the env's shaped reward, so training can recompute rewards
+# under other shaping constants (reward_shaping.py); version 1 datasets lack them.
+TRANSITION_DTYPE = np.dtype([
+    ("state", "<f4", (4,)), ("action", "<i8"), ("reward", "<f4"),
+    ("next_state", "<f4", (4,)), ("done", "<f4"),
+    ("features", "<f8", (3,)), ("event", "i1"),
+])
+MANIFEST = "manifest.json"
+
+
+# =========================================================================
+# WRITING
+# =========================================================================
+
+class ShardWriter:
+    """
+    Buffers transitions and writes them as fixed-size .npy shards.
+    push() has the same signature as ReplayBuffer.push, so it can record any loop that fills a buffer.
+    Parameters:
+        out_dir (str): dataset directory
+        shard_size (int): transitions per shard (the last shard may be shorter)
+        prefix (str): shard file prefix, e.g. one per actor
+    """
+    stores_reward_features = True
+
+    def __init__(self, out_dir, shard_size=100_000, prefix="shard"):
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.shard_size = shard_size
+        self.prefix = prefix
+        self.shards = []
+        self._buf = np.zeros(shard_size, dtype=TRANSITION_DTYPE)
+        self._n = 0
+
+    def push(self, state, action, reward, next_state, done, features=None, event=EVENT_UNKNOWN):
+        row = self._buf[self._n]
+        row["state"] = state
+        row["action"] = action
+        row["reward"] = reward
+        row["next_state"] = next_state
+        row["done"] = done
+        row["features"] = features if features is not None else 0.0
+        row["event"] = event
+        self._n += 1
+        if self._n == self.shard_size:
+            self._flush()
+
+    def _flush(self):
+        if self._n == 0:
+            return
+        name = f"{self.prefix}_{len(self.shards):05d}.npy"
+        np.save(os.path.join(self.out_dir, name), self._buf[:self._n])
+        self.shards.append({"file": name, "rows": int(self._n)})
+        self._n = 0
+
+    def close(self):
+        """Write the last partial shard. Returns the shard entries for the manifest."""
+        self._flush()
+        return self.shards
+
+
+def write_manifest(out_dir, shards, meta=None):
+    manifest = {
+        "version": 2,
+        "dtype": TRANSITION_DTYPE.descr,
+        "rows": int(sum(s["rows"] for s in shards)),
+        "shards": shards,
+        "meta": meta or {},
+    }
+    with open(os.path.join(out_dir, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _collect_worker(out_dir, prefix, num_steps, checkpoint_path, epsilon, difficulty, seed, shard_size):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import torch
+    from env import FlappyBirdEnv
+
+    torch.set_num_threads(1)
+    random.seed(seed)
+    policy = None
+    if checkpoint_path:
+        from model_cache import get_policy
+        policy = get_policy(checkpoint_path, device="cpu", verbose=False)
+
+    env = FlappyBirdEnv(difficulty=difficulty, render_mode=False, seed=seed)
+    writer = ShardWriter(out_dir, shard_size, prefix)
+    state = env.reset()
+    episodes = 0
+    for _ in range(num_steps):
+        action = policy.act(state, epsilon) if policy is not None else random.randrange(2)
+        next_state, reward, done, _ = env.step(action)
+        writer.push(state, action, reward, next_state, float(done), env.reward_features, env.reward_event)
+        if done:
+            episodes += 1
+            state = env.reset()
+        else:
+            state = next_state
+    env.close()
+    return writer.close(), episodes
+
+
+def collect_dataset(out_dir, num_steps=200_000, checkpoint_path=None, epsilon=0.1, difficulty="normal", seed=0,
+                    workers=1, shard_size=100_000):
+    """
+    Record transitions from `workers` independent actors into a sharded dataset.
+    Parameters:
+        out_dir (str): dataset directory (manifest.json + <actor>_<n>.npy shards)
+        num_steps (int): total transitions across all actors
+        checkpoint_path (str|None): epsilon-greedy policy to act with; None = uniform random actions
+        epsilon (float): exploration rate for the checkpoint policy
+        difficulty (str): difficulty preset
+        seed (int): actor i uses seed + i
+        workers (int): actor processes
+        shard_size (int): transitions per shard
+    Returns:
+        manifest dict
+    """
+    per_actor = [num_steps // workers + (i < num_steps % workers) for i in range(workers)]
+    jobs = [(out_dir, f"actor{i:02d}", n, checkpoint_path, epsilon, difficulty, seed + i, shard_size)
+            for i, n in enumerate(per_actor)]
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_collect_worker(*jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as pool:
+            results = list(pool.map(_collect_worker, *zip(*jobs)))
+    elapsed = time.perf_counter() - start
+
+    shards = [s for actor_shards, _ in results for s in actor_shards]
+    episodes = sum(n for _, n in results)
+    manifest = write_manifest(out_dir, shards, meta={
+        "checkpoint": checkpoint_path, "epsilon": epsilon, "difficulty": difficulty, "seed": seed,
+        "actors": workers, "episodes": episodes,
+    })
+    print(f"Collected {manifest['rows']:,} transitions ({episodes} episodes) into {len(shards)} shards "
+          f"in {elapsed:.1f}s ({manifest['rows'] / elapsed:,.0f} transitions/s)")
+    return manifest
+
+
+# =========================================================================
+# READING
+# =========================================================================
+
+class ShardedDataset:
+    """Read side of a dataset directory; shards are opened memory-mapped on demand."""
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST)) as f:
+            self.manifest = json.load(f)
+        self.shards = self.manifest["shards"]
+
+    def __len__(self):
+        return self.manifest["rows"]
+
+    def shard(self, i):
+        return np.load(os.path.join(self.path, self.shards[i]["file"]), mmap_mode="r")
+
+    @property
+    def has_reward_features(self):
+        return "event" in [field[0] for field in self.manifest["dtype"]]
+
+
+def _to_batch(records, reward_params=None):
+    # Fields of a record slice are strided views; copy them out contiguous (and torch-compatible)
+    batch = tuple(np.ascontiguousarray(records[name]) for name in ("state", "action", "reward", "next_state", "done"))
+    if reward_params is None:
+        return batch
+    rewards = recompute_rewards(batch[2], records["features"], records["event"], reward_params)
+    return batch[:2] + (rewards,) + batch[3:]
+
+
+def iter_minibatches(dataset, batch_size=64, epochs=1, shards_in_memory=2, seed=None, prefetch=True,
+                     reward_params=None):
+    """
+    Stream shuffled minibatches across shards with bounded memory.
+    Each epoch visits shards in a random order; `shards_in_memory` shards at a time are read into
+    RAM, shuffled together and cut into batches. With `prefetch`, the next group is read on a
+    background thread while the current one is being consumed, so the learner does not wait on disk.
+    Peak memory is about (shards_in_memory * 2) shards. A trailing partial batch per group is dropped.
+    With `reward_params` (reward_shaping.reward_params) the rewards of each batch are recomputed
+    from the recorded features instead of the stored ones.
+    Yields:
+        (states, actions, rewards, next_states, dones) arrays, as ReplayBuffer.sample returns
+    """
+    if reward_params is not None and not dataset.has_reward_features:
+        raise ValueError(f"{dataset.path} has no reward features (recorded before manifest version 2); "
+                         "re-collect it to recompute rewards")
+    rng = np.random.default_rng(seed)
+    order = [i for _ in range(epochs) for i in rng.permutation(len(dataset.shards))]
+    groups = [order[i:i + shards_in_memory] for i in range(0, len(order), shards_in_memory)]
+
+    def load(group):
+        records = np.concatenate([np.asarray(dataset.shard(i)) for i in group])
+        return records[rng.permutation(len(records))]
+
+    if not prefetch:
+        for group in groups:
+            records = load(group)
+            for i in range(0, len(records) - batch_size + 1, batch_size):
+                yield _to_batch(records[i:i + batch_size], reward_params)
+        return
+
+    loaded = queue.Queue(maxsize=1)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                loaded.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def reader():
+        try:
+            for group in groups:
+                if not put(load(group)):
+                    return
+        except BaseException as e:
+            # A missing / truncated shard is re-raised by the consumer instead of starving it
+            put(e)
+            return
+        put(None)
+
+    thread = threading.Thread(target=reader, name="dataset-reader", daemon=True)
+    thread.start()
+    try:
+        while True:
+            try:
+                records = loaded.get(timeout=0.1)
+            except queue.Empty:
+                if not thread.is_alive() and loaded.empty():
+                    raise RuntimeError("dataset reader thread exited without finishing")
+                continue
+            if records is None:
+                break
+            if isinstance(records, BaseException):
+                raise records
+            for i in range(0, len(records) - batch_size + 1, batch_size):
+                yield _to_batch(records[i:i + batch_size], reward_params)
+    finally:
+        stop.set()
+        thread.join()
+
+
+class BatchStream:
+    """
+    Adapts a minibatch iterator to the replay-buffer interface Agent.update expects.
+    sample() raises StopIteration once the iterator is exhausted.
+    """
+    def __init__(self, batches, size):
+        self._batches = batches
+        self._size = size
+
+    def sample(self, batch_size):
+        return next(self._batches)
+
+    def __len__(self):
+        return self._size
+
+
+def loader_throughput(path, batch_size=64, max_batches=20_000):
+    """Minibatches/s the loader alone can deliver, to compare with learner updates/s."""
+    dataset = ShardedDataset(path)
+    start = time.perf_counter()
+    n = 0
+    for _ in iter_minibatches(dataset, batch_size, seed=0):
+        n += 1
+        if n >= max_batches:
+            break
+    return n / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded offline transition datasets.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_collect = sub.add_parser("collect", help="record transitions from actors")
+    p_collect.add_argument("out")
+    p_collect.add_argument("--steps", type=int, default=200_000)
+    p_collect.add_argument("--checkpoint", default=None, help="act with this checkpoint (default: random actions)")
+    p_collect.add_argument("--epsilon", type=float, default=0.1)
+    p_collect.add_argument("--difficulty", default="normal", choices=["easy", "normal", "hard", "extreme"])
+    p_collect.add_argument("--seed", type=int, default=0)
+    p_collect.add_argument("--workers", type=int, default=1)
+    p_collect.add_argument("--shard-size", type=int, default=100_000)
+
+    p_info = sub.add_parser("info", help="print the manifest summary and loader throughput")
+    p_info.add_argument("path")
+    p_info.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    if args.cmd == "collect":
+        collect_dataset(args.out, args.steps, args.checkpoint, args.epsilon, args.difficulty, args.seed,
+                        args.workers, args.shard_size)
+    else:
+        ds = ShardedDataset(args.path)
+        print(f"{args.path}: {len(ds):,} transitions in {len(ds.shards)} shards | meta {ds.manifest['meta']}")
+        print(f"Loader: {loader_throughput(args.path, args.batch_size):,.0f} minibatches/s "
+              f"(batch size {args.batch_size})")
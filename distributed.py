@@ -0,0 +1,330 @@
+"""
+Data-parallel DQN training over torch.distributed (Gloo, CPU).
+
+Every rank owns its envs and its replay shard and runs the usual act / push / Agent.update
+loop. Agent.grad_hook all-reduces the policy gradients before clipping and the optimizer step,
+so with identical initial weights (broadcast from rank 0) every rank applies the same update
+and the replicas never drift. Only rank 0 writes checkpoints.
+
+    python distributed.py --nproc 4 --steps 100000                 # 4 local ranks over localhost
+    python distributed.py --nproc 4 --nnodes 2 --node-rank 0 --master-addr 10.0.0.1
+    torchrun --nproc-per-node 4 distributed.py --steps 100000      # RANK / WORLD_SIZE from the env
+"""
+import os
+import time
+import socket
+import random
+import argparse
+from datetime import timedelta
+
+import numpy as np
+import torch
+import torch.distributed as dist
+
+from config import CHECKPOINT_PATH
+import config as cf
+
+
+def free_port():
+    """An unused TCP port on this host, for single-machine launches."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def init_process_group(rank=None, world_size=None, master_addr="127.0.0.1", master_port=29500, timeout=300):
+    """
+    Join the Gloo process group. With rank / world_size None they are read from the environment
+    (RANK, WORLD_SIZE, MASTER_ADDR, MASTER_PORT), as set by torchrun.
+    Returns:
+        tuple: (rank, world_size)
+    """
+    if rank is None:
+        dist.init_process_group("gloo", init_method="env://", timeout=timedelta(seconds=timeout))
+    else:
+        os.environ["MASTER_ADDR"] = master_addr
+        os.environ["MASTER_PORT"] = str(master_port)
+        dist.init_process_group("gloo", rank=rank, world_size=world_size, timeout=timedelta(seconds=timeout))
+    return dist.get_rank(), dist.get_world_size()
+
+
+class GradientAllReduce:
+    """
+    Agent.grad_hook that replaces each rank's gradients with their mean over all ranks.
+    The gradients are packed into one flat tensor so a step costs a single all-reduce
+    (the DQN gradient is ~17k floats; one message beats six per-layer round trips).
+    """
+    def __init__(self, group=None):
+        self.group = group
+        self.world_size = dist.get_world_size(group)
+
+    def __call__(self, net):
+        grads = [p.grad for p in net.parameters()]
+        flat = torch.cat([g.reshape(-1) for g in grads])
+        dist.all_reduce(flat, op=dist.ReduceOp.SUM, group=self.group)
+        flat /= self.world_size
+        offset = 0
+        for g in grads:
+            n = g.numel()
+            g.copy_(flat[offset:offset + n].view_as(g))
+            offset += n
+
+
+def broadcast_agent(agent, src=0):
+    """Copy policy and target weights from rank `src` to every rank."""
+    for net in (agent.policy_net, agent.target_net):
+        for p in net.parameters():
+            dist.broadcast(p.data, src)
+
+
+def make_agent(agent_kwargs=None, checkpoint_path=None, resume=False):
+    """A CPU Agent whose weights match rank 0 (and its checkpoint when resuming) and whose gradients are averaged."""
+    from agent import Agent
+
+    agent = Agent(**{"device": "cpu", **(agent_kwargs or {})})
+    if resume and dist.get_rank() == 0 and checkpoint_path and os.path.exists(checkpoint_path):
+        agent.load(checkpoint_path)
+        print(f"Loaded {checkpoint_path} on rank 0")
+    broadcast_agent(agent)
+    agent.grad_hook = GradientAllReduce()
+    return agent
+
+
+# =========================================================================
+# TRAINING (runs on every rank)
+# =========================================================================
+
+def train_distributed(rank, world_size, steps=100_000, envs_per_rank=1, difficulty="normal", env_overrides=None,
+                      agent_kwargs=None, batch_size=64, buffer_size=50000, warmup_steps=5000, epsilon_decay=15000,
+                      epsilon_start=1.0, max_episode_steps=cf.MAX_EPISODE_STEPS, checkpoint_path=CHECKPOINT_PATH,
+                      resume=False, seed=0, log_every_steps=cf.DISTRIBUTED_LOG_EVERY_STEPS,
+                      checkpoint_every_steps=cf.CHECKPOINT_EVERY_STEPS,
+                      checkpoint_every_seconds=cf.CHECKPOINT_EVERY_SECONDS, callback=None, stop_event=None):
+    """
+    One rank of data-parallel DQN training; the process group must already be initialized.
+    A step is one transition from each of this rank's envs followed by one synchronized update,
+    so a step consumes batch_size * world_size samples in total.
+    Parameters:
+        rank, world_size (int): this process's rank and the number of ranks
+        steps (int): synchronized updates (every rank runs exactly this many). Default: 100000
+        envs_per_rank (int): envs stepped round-robin by this rank; they all feed its replay shard. Default: 1
+        batch_size (int): minibatch per rank per update. Default: 64
+        buffer_size (int): capacity of this rank's replay shard. Default: 50000
+        warmup_steps (int): random transitions pushed into each shard before the first update. Default: 5000
+        epsilon_decay (int): updates over which epsilon decays linearly. Default: 15000
+        seed (int): base seed; rank r seeds python / numpy / torch and its envs from seed + r. The network
+            initialization is broadcast from rank 0. Default: 0
+        log_every_steps (int|None): global log line (mean score / loss over all ranks, throughput) every N
+            updates. This is a collective, so it is step-based only. Default: DISTRIBUTED_LOG_EVERY_STEPS
+        checkpoint_every_steps, checkpoint_every_seconds (int|float|None): rank 0 checkpoint cadence.
+            Default: CHECKPOINT_EVERY_STEPS, CHECKPOINT_EVERY_SECONDS
+        callback (callable|None): called on rank 0 with progress metrics at every log line; returning
+            True stops all ranks at that step. Default: None
+        stop_event (threading.Event|None): when set on any rank, all ranks stop at the next log line
+        (other parameters as in train.train_loop)
+    Returns:
+        Agent: the trained agent (identical on every rank)
+    """
+    from env import FlappyBirdEnv
+    from utils import ReplayBuffer, IntervalTrigger
+
+    random.seed(seed + rank)
+    np.random.seed(seed + rank)
+    torch.manual_seed(seed + rank)
+
+    agent = make_agent(agent_kwargs, checkpoint_path, resume)
+    envs = [FlappyBirdEnv(difficulty=difficulty, render_mode=False, seed=(seed + rank) * envs_per_rank + i,
+                          overrides=env_overrides) for i in range(envs_per_rank)]
+    buffer = ReplayBuffer(buffer_size)
+    states = [env.reset() for env in envs]
+    ep_steps = [0] * envs_per_rank
+
+    # Every shard must hold a full batch before the first update, or the collectives would not line up
+    for step in range(max(warmup_steps, batch_size)):
+        i = step % envs_per_rank
+        action = np.random.randint(0, agent.n_actions)
+        next_state, reward, done, _ = envs[i].step(action)
+        buffer.push(states[i], action, reward, next_state, float(done))
+        states[i] = envs[i].reset() if done else next_state
+    states = [env.reset() for env in envs]
+    if rank == 0:
+        print(f"Warmup finished on {world_size} rank(s); {len(buffer)} transitions per shard, "
+              f"global batch {batch_size * world_size}")
+
+    epsilon_final = 0.02
+    save_due = IntervalTrigger(checkpoint_every_steps, checkpoint_every_seconds)
+    # score sum, episodes, loss sum, losses, stop flag: summed over ranks at every log line
+    stats = torch.zeros(5, dtype=torch.float64)
+    start = last = time.perf_counter()
+    last_step = 0
+    step = 0
+    for step in range(1, steps + 1):
+        epsilon = epsilon_final + (epsilon_start - epsilon_final) * max(0, (1 - step / epsilon_decay))
+        for i, env in enumerate(envs):
+            action = agent.act(states[i], epsilon)
+            next_state, reward, done, _ = env.step(action)
+            buffer.push(states[i], action, reward, next_state, float(done))
+            ep_steps[i] += 1
+            # Only a crash is terminal; a time-limit cut still bootstraps from next_state
+            if done or (max_episode_steps is not None and ep_steps[i] >= max_episode_steps):
+                stats[0] += env.score
+                stats[1] += 1
+                states[i] = env.reset()
+                ep_steps[i] = 0
+            else:
+                states[i] = next_state
+
+        loss = agent.update(buffer, batch_size=batch_size)
+        stats[2] += loss
+        stats[3] += 1
+
+        if rank == 0 and save_due(step):
+            agent.save(checkpoint_path)
+
+        if (log_every_steps and step % log_every_steps == 0) or step == steps:
+            if stop_event is not None and stop_event.is_set():
+                stats[4] = 1
+            dist.all_reduce(stats, op=dist.ReduceOp.SUM)
+            stop = stats[4] > 0
+            now = time.perf_counter()
+            if rank == 0:
+                n = step - last_step
+                info = {
+                    "steps": step, "env_steps": step * envs_per_rank * world_size,
+                    "avg_score": float(stats[0] / max(stats[1], 1)), "episodes": int(stats[1]),
+                    "avg_loss": float(stats[2] / max(stats[3], 1)), "epsilon": epsilon,
+                    "updates_per_s": n / (now - last),
+                    "samples_per_s": n * batch_size * world_size / (now - last),
+                    "env_steps_per_s": n * envs_per_rank * world_size / (now - last),
+                    "seconds": now - start,
+                }
+                print(f"Step {step:7d} | EnvSteps {info['env_steps']:9d} | Episodes {info['episodes']:5d} | "
+                      f"AvgScore {info['avg_score']:6.2f} | AvgLoss {info['avg_loss']:.4f} | "
+                      f"Epsilon {epsilon:.3f} | {info['updates_per_s']:.0f} updates/s | "
+                      f"{info['samples_per_s']:.0f} samples/s")
+                if callback is not None and callback(info):
+                    stop = True
+            # Rank 0's verdict (callback included) decides for everyone
+            flag = torch.tensor([float(stop)])
+            dist.broadcast(flag, 0)
+            stats.zero_()
+            last, last_step = now, step
+            if flag.item():
+                if rank == 0:
+                    print(f"Stopped at step {step}.")
+                break
+
+    for env in envs:
+        env.close()
+    if rank == 0:
+        if os.path.dirname(checkpoint_path):
+            os.makedirs(os.path.dirname(checkpoint_path), exist_ok=True)
+        agent.save(checkpoint_path)
+        print(f"Distributed training finished after {step} steps on {world_size} rank(s). "
+              f"Model saved to {checkpoint_path}")
+    dist.barrier()
+    return agent
+
+
+def learner_throughput(rank, world_size, updates=2000, batch_size=64, buffer_size=20000, agent_kwargs=None,
+                       warmup_updates=50, seed=0):
+    """
+    Time `updates` synchronized Agent.update calls on a shard of random transitions, without env
+    stepping, to isolate the learner (sample, backward, all-reduce, step).
+    Returns:
+        dict: updates/s and samples/s over all ranks (the slowest rank's wall time), on every rank
+    """
+    from utils import ReplayBuffer
+
+    rng = np.random.default_rng(seed + rank)
+    random.seed(seed + rank)
+    agent = make_agent(agent_kwargs)
+    buffer = ReplayBuffer(buffer_size)
+    states = rng.standard_normal((buffer_size + 1, 4)).astype(np.float32)
+    for i in range(buffer_size):
+        buffer.push(states[i], int(rng.integers(2)), float(rng.standard_normal()), states[i + 1], 0.0)
+
+    for _ in range(warmup_updates):
+        agent.update(buffer, batch_size=batch_size)
+    dist.barrier()
+    start = time.perf_counter()
+    for _ in range(updates):
+        agent.update(buffer, batch_size=batch_size)
+    elapsed = torch.tensor([time.perf_counter() - start], dtype=torch.float64)
+    dist.all_reduce(elapsed, op=dist.ReduceOp.MAX)
+    seconds = float(elapsed)
+    return {
+        "ranks": world_size, "updates": updates, "seconds": seconds,
+        "updates_per_s": updates / seconds,
+        "samples_per_s": updates * batch_size * world_size / seconds,
+    }
+
+
+# =========================================================================
+# LAUNCHER
+# =========================================================================
+
+def _entry(local_rank, fn, nproc, node_rank, world_size, master_addr, master_port, threads, args, kwargs):
+    # One intra-op thread per rank by default: N ranks on N cores, not N * cores threads
+    torch.set_num_threads(threads)
+    rank, _ = init_process_group(node_rank * nproc + local_rank, world_size, master_addr, master_port)
+    try:
+        fn(rank, world_size, *args, **kwargs)
+    finally:
+        dist.destroy_process_group()
+
+
+def launch(fn, nproc, *args, nnodes=1, node_rank=0, master_addr="127.0.0.1", master_port=None, threads=1, **kwargs):
+    """
+    Start `nproc` ranks on this machine and call fn(rank, world_size, *args, **kwargs) in each.
+    For several machines run the same command on every node with its own node_rank and the
+    address of node 0 as master_addr. fn and its arguments must be picklable (module-level).
+    Parameters:
+        nproc (int): ranks on this node
+        nnodes (int): number of machines. Default: 1
+        node_rank (int): index of this machine. Default: 0
+        master_port (int|None): rendezvous port on node 0. Default: a free port (single node), else 29500
+        threads (int): torch intra-op threads per rank. Default: 1
+    """
+    import torch.multiprocessing as tmp
+
+    if master_port is None:
+        master_port = free_port() if nnodes == 1 else 29500
+    world_size = nproc * nnodes
+    tmp.spawn(_entry, args=(fn, nproc, node_rank, world_size, master_addr, master_port, threads, args, kwargs),
+              nprocs=nproc, join=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Data-parallel DQN training over torch.distributed (Gloo).")
+    parser.add_argument("--nproc", type=int, default=2, help="ranks on this machine")
+    parser.add_argument("--nnodes", type=int, default=1)
+    parser.add_argument("--node-rank", type=int, default=0)
+    parser.add_argument("--master-addr", default="127.0.0.1")
+    parser.add_argument("--master-port", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=1, help="torch threads per rank")
+    parser.add_argument("--steps", type=int, default=100_000)
+    parser.add_argument("--envs-per-rank", type=int, default=1)
+    parser.add_argument("--difficulty", default="normal", choices=["easy", "normal", "hard", "extreme"])
+    parser.add_argument("--batch-size", type=int, default=64, help="per rank")
+    parser.add_argument("--buffer-size", type=int, default=50000, help="per rank")
+    parser.add_argument("--lr", type=float, default=1e-3)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    train_kwargs = dict(steps=args.steps, envs_per_rank=args.envs_per_rank, difficulty=args.difficulty,
+                        agent_kwargs={"lr": args.lr}, batch_size=args.batch_size, buffer_size=args.buffer_size,
+                        checkpoint_path=args.checkpoint, resume=args.resume, seed=args.seed)
+    if "RANK" in os.environ and "WORLD_SIZE" in os.environ:
+        # Started by torchrun: one process per rank, rendezvous from the environment
+        torch.set_num_threads(args.threads)
+        rank, world_size = init_process_group()
+        try:
+            train_distributed(rank, world_size, **train_kwargs)
+        finally:
+            dist.destroy_process_group()
+    else:
+        launch(train_distributed, args.nproc, nnodes=args.nnodes, node_rank=args.node_rank,
+               master_addr=args.master_addr, master_port=args.master_port, threads=args.threads, **train_kwargs)
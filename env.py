@@ -1,18 +1,29 @@
 import os
+import math
 import numpy as np
 import random
 import pygame
 import config as cf
+from reward_shaping import EVENT_ALIVE, EVENT_SCORED, EVENT_DIED
+
+# ===== Difficulty presets =====
+DIFFICULTY_PRESETS = {
+    "easy": {"PIPE_GAP": 220, "PIPE_SPACING": 300, "SCROLL_SPEED": 2},
+    "normal": {"PIPE_GAP": 180, "PIPE_SPACING": 280, "SCROLL_SPEED": 3},
+    "hard": {"PIPE_GAP": 150, "PIPE_SPACING": 260, "SCROLL_SPEED": 3},
+    "extreme": {"PIPE_GAP": 130, "PIPE_SPACING": 240, "SCROLL_SPEED": 4}
+}
 
 
 class FlappyBirdEnv:
-    def __init__(self, difficulty="normal", render_mode=False):
+    def __init__(self, difficulty="normal", render_mode=False, seed=None, overrides=None):
         # ===== Config values =====
         self.ASSET_DIR_NAME = cf.ASSET_DIR_NAME
         self.SCREEN_WIDTH = cf.SCREEN_WIDTH
         self.SCREEN_HEIGHT = cf.SCREEN_HEIGHT
         self.FPS = cf.FPS
         self.render_mode = render_mode
+        self.overrides = dict(overrides or {})
 
         # ===== Named constants =====
         self.INIT_PIPE_OFFSET = cf.INIT_PIPE_OFFSET 
@@ -20,18 +31,7 @@ class FlappyBirdEnv:
         self.GROUND_HEIGHT = cf.GROUND_HEIGHT 
 
         # ===== Difficulty presets =====
-        presets = {
-            "easy": {"PIPE_GAP": 220, "PIPE_SPACING": 300, "SCROLL_SPEED": 2},
-            "normal": {"PIPE_GAP": 180, "PIPE_SPACING": 280, "SCROLL_SPEED": 3},
-            "hard": {"PIPE_GAP": 150, "PIPE_SPACING": 260, "SCROLL_SPEED": 3},
-            "extreme": {"PIPE_GAP": 130, "PIPE_SPACING": 240, "SCROLL_SPEED": 4}
-        }
-        if difficulty not in presets:
-            raise ValueError("Difficulty must be 'easy', 'normal', or 'hard'.")
-
-        self.PIPE_GAP = presets[difficulty]["PIPE_GAP"]
-        self.PIPE_SPACING = presets[difficulty]["PIPE_SPACING"]
-        self.SCROLL_SPEED = presets[difficulty]["SCROLL_SPEED"]
+        self.set_difficulty(difficulty)
 
         # ===== Physics =====
         self.GRAVITY = cf.GRAVITY
@@ -50,6 +50,13 @@ class FlappyBirdEnv:
         self.APPROACHING_THRESHOLD = cf.APPROACHING_THRESHOLD
         self.APPROACHING_MULTIPLIER = cf.APPROACHING_MULTIPLIER
 
+        # ===== Per-instance overrides (e.g. from a sweep) =====
+        # Lets callers change any of the constants above without touching config.py globals.
+        for name, value in (overrides or {}).items():
+            if not name.isupper() or not hasattr(self, name):
+                raise ValueError(f"Unknown env override: {name}")
+            setattr(self, name, value)
+
         # ===== Color theme =====
         self.colors = {
             "bg": (135, 206, 235),
@@ -65,6 +72,7 @@ class FlappyBirdEnv:
             self.screen = pygame.display.set_mode((self.SCREEN_WIDTH, self.SCREEN_HEIGHT))
             pygame.display.set_caption("Flappy Bird RL")
             self.clock = pygame.time.Clock()
+        self._font = None
 
         # ===== Load assets =====
         base_dir = os.path.dirname(__file__)
@@ -72,9 +80,28 @@ class FlappyBirdEnv:
         self._asset_dir = asset_dir
         self._load_assets_safe()
 
+        # ===== Pipe RNG (per-env, so episodes can be seeded independently) =====
+        self.rng = random.Random(seed)
+
         # ===== State initialization =====
         self.reset()
 
+    def set_difficulty(self, difficulty):
+        """
+        Switch pipe gap / spacing / scroll speed to another preset.
+        Takes effect from the next reset(); used by curriculum training.
+        Constructor overrides of these constants win over every preset, so they persist across stages.
+        """
+        if difficulty not in DIFFICULTY_PRESETS:
+            raise ValueError("Difficulty must be 'easy', 'normal', 'hard', or 'extreme'.")
+        self.difficulty = difficulty
+        self.PIPE_GAP = DIFFICULTY_PRESETS[difficulty]["PIPE_GAP"]
+        self.PIPE_SPACING = DIFFICULTY_PRESETS[difficulty]["PIPE_SPACING"]
+        self.SCROLL_SPEED = DIFFICULTY_PRESETS[difficulty]["SCROLL_SPEED"]
+        for name in ("PIPE_GAP", "PIPE_SPACING", "SCROLL_SPEED"):
+            if name in self.overrides:
+                setattr(self, name, self.overrides[name])
+
     def _load_assets_safe(self):
         """Try to load images; fallback to shapes if failed."""
         try:
@@ -106,8 +133,17 @@ class FlappyBirdEnv:
             self.pipe_img = None
             self.pipe_width = cf.PIPE_WIDTH
 
-    def reset(self):
-        """Reset environment to initial state."""
+    def reset(self, seed=None):
+        """
+        Reset environment to initial state.
+
+        Args:
+            seed: optional seed for the pipe generator; the same seed always
+                  produces the same pipe sequence for the episode.
+        """
+        if seed is not None:
+            self.rng.seed(seed)
+
         # Bird
         self.bird_x = cf.BIRD_X_POS
         self.bird_y = self.SCREEN_HEIGHT // 2
@@ -127,15 +163,204 @@ class FlappyBirdEnv:
         self.pipes = []
         start_x = self.SCREEN_WIDTH + self.INIT_PIPE_OFFSET
         for i in range(3):
-            gap_y = random.randint(self.MIN_GAP_Y, self.SCREEN_HEIGHT - self.MIN_GAP_Y - self.PIPE_GAP - self.GROUND_HEIGHT)
+            gap_y = self.rng.randint(self.MIN_GAP_Y, self.SCREEN_HEIGHT - self.MIN_GAP_Y - self.PIPE_GAP - self.GROUND_HEIGHT)
             self.pipes.append([start_x + i * self.PIPE_SPACING, gap_y])
 
         self.done = False
         self.score = 0
         self.scored_pipes = set()
+        # Inputs of the last step's reward, for replay-time reshaping (reward_shaping.py)
+        self.reward_features = (0.0, 0.0, 0.0)
+        self.reward_event = EVENT_ALIVE
+
+        return self._get_state()
 
+    def snapshot(self):
+        """
+        Capture everything step() mutates, for search / planning.
+        Scored pipes are tracked by id(), so they are stored as per-pipe flags.
+        """
+        return (
+            self.bird_y, self.bird_vel, self.bird_frame, self.anim_timer, self.bg_x, self.base_x,
+            [(p[0], p[1], id(p) in self.scored_pipes) for p in self.pipes],
+            self.score, self.done, self.rng.getstate(),
+        )
+
+    def restore(self, snap):
+        """Return to a state captured by snapshot()."""
+        (self.bird_y, self.bird_vel, self.bird_frame, self.anim_timer, self.bg_x, self.base_x,
+         pipes, self.score, self.done, rng_state) = snap
+        self.pipes = [[x, gap_y] for x, gap_y, _ in pipes]
+        self.scored_pipes = {id(p) for p, (_, _, scored) in zip(self.pipes, pipes) if scored}
+        self.rng.setstate(rng_state)
         return self._get_state()
 
+    # =========================================================================
+    # FAST-FORWARD
+    # =========================================================================
+
+    def fast_forward(self, frames):
+        """
+        Advance up to `frames` frames without flapping, frame-exact with step(0).
+        Between events the bird follows a clamped-gravity trajectory and pipes / scrollers move
+        linearly, so the state is jumped forward in closed form. Only frames where something discrete
+        can happen go through step(0): a pipe spawn (pipe RNG draw), a pipe being passed (scoring),
+        a pipe the hitbox may overlap, and the first ground / ceiling hit (binary search on the
+        closed-form trajectory). Rewards are not computed for skipped frames.
+        Falls back to step(0) when a quantity is not exact in binary (e.g. a GRAVITY override of 0.3),
+        where the closed form could round differently from repeated addition.
+
+        Returns:
+            state, done, info (dict: frames advanced, frames that went through step)
+        """
+        advanced = stepped = 0
+        # Grid values stay on the grid under step(), so this holds for the whole call
+        exact = self._ff_exact()
+        while advanced < frames and not self.done:
+            left = frames - advanced
+            t = self._ff_next_event(left) if exact else 1
+            if t > left:
+                self._ff_jump(left)
+                advanced = frames
+                break
+            self._ff_jump(t - 1)
+            self.step(0)
+            advanced += t
+            stepped += 1
+        return self._get_state(), self.done, {"frames": advanced, "stepped": stepped}
+
+    def advance(self, actions):
+        """
+        Play a planned action sequence, frame-exact with step(). A flap only sets the velocity before
+        the usual physics, so each flap and the no-flap run after it is one fast_forward.
+        Stops at a crash.
+
+        Returns:
+            state, done, frames played
+        """
+        played, i, n = 0, 0, len(actions)
+        while i < n and not self.done:
+            j = i + 1
+            while j < n and not actions[j]:
+                j += 1
+            if actions[i]:
+                self.bird_vel = self.FLAP_VEL
+            _, _, info = self.fast_forward(j - i)
+            played += info["frames"]
+            i = j
+        return self._get_state(), self.done, played
+
+    def _ff_exact(self):
+        # Pipe x / gap and scroller positions stay on the grid when these do (reset positions are ints)
+        values = (self.GRAVITY, self.FLAP_VEL, self.MAX_VEL, self.bird_x, self.bird_y, self.bird_vel,
+                  self.SCROLL_SPEED / 2, self.PIPE_SPACING, self.INIT_PIPE_OFFSET, self.pipe_width, self.PIPE_GAP)
+        return (self.GRAVITY > 0 and self.bird_vel + self.GRAVITY >= -self.MAX_VEL
+                and self.anim_timer < self.ANIM_FREQ and all(float(v * 64).is_integer() for v in values))
+
+    @staticmethod
+    def _ff_cross(x0, speed, bound, strict=True):
+        """Smallest t >= 1 with x0 - t * speed < bound (<= when not strict); exact for on-grid values."""
+        q = (x0 - bound) / speed
+        return max(math.floor(q) + 1 if strict else math.ceil(q), 1)
+
+    def _ff_trajectory(self):
+        """Closed-form (vel, y) after t no-flap frames, and the last frame the bird still rises."""
+        g, vmax, v0, y0 = self.GRAVITY, self.MAX_VEL, self.bird_vel, self.bird_y
+        # First frame at the velocity cap, and number of frames with v < 0
+        t_cap = max(1, math.ceil((vmax - v0) / g))
+        while t_cap > 1 and v0 + (t_cap - 1) * g >= vmax:
+            t_cap -= 1
+        while v0 + t_cap * g < vmax:
+            t_cap += 1
+        rising = max(0, math.ceil(-v0 / g) - 1)
+        while rising > 0 and v0 + rising * g >= 0:
+            rising -= 1
+        while v0 + (rising + 1) * g < 0:
+            rising += 1
+        y_cap = y0 + (t_cap - 1) * v0 + g * ((t_cap - 1) * t_cap // 2)
+
+        def at(t):
+            if t == 0:
+                return v0, y0
+            if t < t_cap:
+                return v0 + t * g, y0 + t * v0 + g * (t * (t + 1) // 2)
+            return vmax, y_cap + (t - t_cap + 1) * vmax
+
+        return at, rising
+
+    @staticmethod
+    def _ff_first(pred, lo, hi):
+        """Smallest t in [lo, hi] with pred(t), for pred monotone False -> True; hi + 1 if none."""
+        if lo > hi or not pred(hi):
+            return hi + 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if pred(mid):
+                hi = mid
+            else:
+                lo = mid + 1
+        return lo
+
+    def _ff_next_event(self, horizon):
+        """First frame in [1, horizon] that has to go through step(0); horizon + 1 if none."""
+        at, rising = self._ff_trajectory()
+        r, S, w = self.bird_radius, self.SCROLL_SPEED, self.pipe_width
+        ground_y = self.SCREEN_HEIGHT - self.GROUND_HEIGHT
+        first = self._ff_first
+
+        # Ceiling can only be hit while the bird rises (frames 1..rising), the ground only after
+        best = first(lambda t: at(t)[1] - r <= 0, 1, min(rising, horizon))
+        if best > min(rising, horizon):
+            best = first(lambda t: at(t)[1] + r >= ground_y, rising + 1, horizon)
+
+        # Front pipe leaves the screen -> a new pipe is drawn from the RNG
+        cross = self._ff_cross
+        best = min(best, cross(self.pipes[0][0] + w, S, 0))
+
+        hitbox = pygame.Rect(0, 0, r * 2, r * 2)
+        hitbox.center = (int(self.bird_x), 0)
+        hitbox = hitbox.inflate(-6, -6)
+        for pipe in self.pipes:
+            x0, gap_y = pipe
+            if id(pipe) not in self.scored_pipes:
+                best = min(best, cross(x0 + w, S, self.bird_x))
+            # Frames where the hitbox may overlap the pipe columns (2 px margin for int() truncation)
+            a = cross(x0, S, hitbox.right + 2)
+            b = min(cross(x0 + w, S, hitbox.left - 2, strict=False) - 1, best - 1)
+            if a > b:
+                continue
+            ys = [at(a)[1], at(b)[1]] + ([at(rising)[1]] if a <= rising <= b else [])
+            # Safe if the hitbox stays inside the gap over the whole window even after truncation
+            if not (min(ys) - r + 2 >= gap_y and max(ys) + r - 2 <= gap_y + self.PIPE_GAP):
+                best = a
+        return best
+
+    def _ff_jump(self, n):
+        """Apply n event-free no-flap frames in closed form."""
+        if n <= 0:
+            return
+        at, _ = self._ff_trajectory()
+        self.bird_vel, self.bird_y = at(n)
+
+        total = self.anim_timer + n
+        self.anim_timer = total % self.ANIM_FREQ
+        self.bird_frame = (self.bird_frame + total // self.ANIM_FREQ) % 3
+
+        self.base_x = self._ff_scroll(self.base_x, self.SCROLL_SPEED, n)
+        self.bg_x = self._ff_scroll(self.bg_x, self.SCROLL_SPEED / 2, n)
+        for pipe in self.pipes:
+            pipe[0] -= n * self.SCROLL_SPEED
+
+    def _ff_scroll(self, x, speed, n):
+        # x -= speed, reset to 0 once x <= -SCREEN_WIDTH (as in step)
+        width, first = self.SCREEN_WIDTH, self._ff_first
+        first_reset = first(lambda t: x - t * speed <= -width, 1, n)
+        if first_reset > n:
+            return x - n * speed
+        period = first(lambda t: -t * speed <= -width, 1, math.ceil(width / speed) + 1)
+        r = (n - first_reset) % period
+        return 0 if r == 0 else -r * speed
+
     def step(self, action):
         """
         Main game loop step.
@@ -179,13 +404,14 @@ class FlappyBirdEnv:
             self.scored_pipes.discard(id(popped))
 
             new_x = self.pipes[-1][0] + self.PIPE_SPACING
-            new_gap_y = random.randint(self.MIN_GAP_Y, self.SCREEN_HEIGHT - self.MIN_GAP_Y - self.PIPE_GAP - self.GROUND_HEIGHT)
+            new_gap_y = self.rng.randint(self.MIN_GAP_Y, self.SCREEN_HEIGHT - self.MIN_GAP_Y - self.PIPE_GAP - self.GROUND_HEIGHT)
             self.pipes.append([new_x, new_gap_y])
 
         # ===== Collision check =====
         if self._check_collision():
             self.done = True
             reward = self._reward_death()
+            self.reward_event = EVENT_DIED
             return self._get_state(), reward, self.done, {}
 
         # ===== Scoring check =====
@@ -200,11 +426,14 @@ class FlappyBirdEnv:
 
         # ===== Calculate reward =====
         dy_norm, vel_norm, dx_norm = self._get_normalized_values()
+        self.reward_features = (dy_norm, vel_norm, dx_norm)
         
         if just_scored:
             reward = self._reward_score(dy_norm)
+            self.reward_event = EVENT_SCORED
         else:
             reward = self._reward_alive(dy_norm, vel_norm, dx_norm)
+            self.reward_event = EVENT_ALIVE
 
         return self._get_state(), reward, self.done, {}
 
@@ -320,8 +549,14 @@ class FlappyBirdEnv:
     # RENDERING
     # =========================================================================
 
-    def render(self):
-        """Render game state (only if render_mode=True)."""
+    def render(self, fps=None, hud=None):
+        """
+        Render game state (only if render_mode=True).
+
+        Args:
+            fps: frame cap for this frame; None uses self.FPS, 0 does not wait
+            hud: optional extra status line (e.g. playback speed)
+        """
         if not self.render_mode:
             return
 
@@ -370,19 +605,24 @@ class FlappyBirdEnv:
             pygame.draw.circle(self.screen, self.colors["bird"], 
                              (int(self.bird_x), int(self.bird_y)), self.bird_radius)
 
-        # UI text
-        font = pygame.font.SysFont("Fixedsys", 28)
+        # UI text (SysFont does a font lookup, so it is built once)
+        if self._font is None:
+            self._font = pygame.font.SysFont("Fixedsys", 28)
+        font = self._font
         score_img = font.render(f"Score: {self.score}", True, self.colors["ui"])
         self.screen.blit(score_img, (10, 10))
         hint_img = font.render("Press ESC to quit", True, self.colors["ui"])
         self.screen.blit(hint_img, (10, 40))
+        if hud:
+            self.screen.blit(font.render(hud, True, self.colors["ui"]), (10, 70))
 
         pygame.display.flip()
-        self.clock.tick(self.FPS)
+        self.clock.tick(self.FPS if fps is None else fps)
 
     def close(self):
         """Clean up pygame."""
         if self.render_mode:
+            self._font = None
             pygame.quit()
 
     def _get_state(self):
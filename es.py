@@ -0,0 +1,275 @@
+import os
+import time
+import argparse
+import multiprocessing as mp
+
+import numpy as np
+
+# DQN(4, 2) parameter shapes, in parameters_to_vector order
+LAYER_SHAPES = [(128, 4), (128,), (128, 128), (128,), (2, 128), (2,)]
+NUM_PARAMS = sum(int(np.prod(s)) for s in LAYER_SHAPES)
+
+
+def noise(seed, dim=NUM_PARAMS):
+    """The perturbation for `seed`; any process regenerates it from the seed alone."""
+    return np.random.default_rng(seed).standard_normal(dim, dtype=np.float32)
+
+
+def centered_ranks(x):
+    """Map returns to ranks in [-0.5, 0.5], so the update ignores the scale of the fitness."""
+    ranks = np.empty(x.size, dtype=np.float32)
+    ranks[x.ravel().argsort()] = np.arange(x.size, dtype=np.float32)
+    return (ranks / max(x.size - 1, 1) - 0.5).reshape(x.shape)
+
+
+class NumpyPolicy:
+    """Greedy DQN forward in NumPy from a flat parameter vector (workers never import torch)."""
+    def __init__(self, theta):
+        self.set_theta(theta)
+
+    def set_theta(self, theta):
+        layers, i = [], 0
+        for shape in LAYER_SHAPES:
+            n = int(np.prod(shape))
+            layers.append(theta[i:i + n].reshape(shape))
+            i += n
+        self.w1, self.b1, self.w2, self.b2, self.w3, self.b3 = layers
+
+    def act(self, state, epsilon=0.0):
+        h = np.maximum(self.w1 @ state + self.b1, 0.0)
+        h = np.maximum(self.w2 @ h + self.b2, 0.0)
+        q = self.w3 @ h + self.b3
+        return int(q[1] > q[0])
+
+
+class ESState:
+    """
+    Parameters plus Adam moments. The update is a deterministic function of (noise seeds, rank
+    weights), so the master and every worker apply it locally and stay bit-identical without
+    ever sending the 17k-float parameter vector.
+    """
+    def __init__(self, theta, lr=0.01, sigma=0.02, l2=0.005, beta1=0.9, beta2=0.999):
+        self.theta = np.asarray(theta, dtype=np.float32).copy()
+        self.lr, self.sigma, self.l2 = lr, sigma, l2
+        self.beta1, self.beta2 = beta1, beta2
+        self.m = np.zeros_like(self.theta)
+        self.v = np.zeros_like(self.theta)
+        self.t = 0
+
+    def apply(self, seeds, weights):
+        """Adam ascent step along sum_i weights[i] * noise(seeds[i]) / (n * sigma)."""
+        grad = np.zeros_like(self.theta)
+        for seed, w in zip(seeds, weights):
+            grad += np.float32(w) * noise(seed)
+        grad /= np.float32(len(seeds) * self.sigma)
+        grad -= np.float32(self.l2) * self.theta
+
+        self.t += 1
+        self.m = self.beta1 * self.m + (1 - self.beta1) * grad
+        self.v = self.beta2 * self.v + (1 - self.beta2) * grad * grad
+        step = self.lr * np.sqrt(1 - self.beta2 ** self.t) / (1 - self.beta1 ** self.t)
+        self.theta += (step * self.m / (np.sqrt(self.v) + 1e-8)).astype(np.float32)
+
+
+# =========================================================================
+# WORKER SIDE
+# =========================================================================
+
+def rollout(env, policy, course_seeds, max_steps, fitness="steps"):
+    """Fitness of one policy summed over seeded courses. Returns (fitness, env steps, mean score)."""
+    from evaluate import run_episode
+
+    total, steps, score = 0.0, 0, 0
+    for seed in course_seeds:
+        res = run_episode(env, policy, seed, target_score=float("inf"), max_steps=max_steps)
+        total += res[fitness]
+        steps += res["steps"]
+        score += res["score"]
+    return total, steps, score / len(course_seeds)
+
+
+def _worker(conn, state, difficulty, env_overrides, max_steps, fitness):
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from env import FlappyBirdEnv
+
+    env = FlappyBirdEnv(difficulty=difficulty, render_mode=False, overrides=env_overrides)
+    policy = NumpyPolicy(state.theta)
+    while True:
+        msg = conn.recv()
+        if msg is None:
+            break
+        update, seeds, course_seeds = msg
+        if update is not None:
+            state.apply(*update)
+        out = []
+        for seed in seeds:
+            eps = state.sigma * noise(seed)
+            policy.set_theta(state.theta + eps)
+            plus = rollout(env, policy, course_seeds, max_steps, fitness)
+            policy.set_theta(state.theta - eps)
+            minus = rollout(env, policy, course_seeds, max_steps, fitness)
+            out.append((seed, plus, minus))
+        conn.send(out)
+    env.close()
+    conn.close()
+
+
+# =========================================================================
+# DRIVER
+# =========================================================================
+
+def initial_theta(checkpoint_path=None, seed=0):
+    """Flat DQN parameters: from an Agent checkpoint if given, else a fresh torch init."""
+    import torch
+    from agent import DQN
+
+    torch.manual_seed(seed)
+    net = DQN()
+    es_state = None
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        data = torch.load(checkpoint_path, map_location="cpu", weights_only=True)
+        net.load_state_dict(data['policy_state_dict'])
+        es_state = data.get('es_state')
+    theta = torch.nn.utils.parameters_to_vector(net.parameters()).detach().numpy()
+    return theta, es_state
+
+
+def save_checkpoint(state, path):
+    """Agent.save layout (policy = target = theta), loadable by play.py, plus the Adam moments for resume."""
+    import torch
+    from agent import DQN
+
+    net = DQN()
+    torch.nn.utils.vector_to_parameters(torch.from_numpy(state.theta.copy()), net.parameters())
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    torch.save({
+        'policy_state_dict': net.state_dict(),
+        'target_state_dict': net.state_dict(),
+        'es_state': {'m': torch.from_numpy(state.m), 'v': torch.from_numpy(state.v), 't': state.t},
+    }, path)
+
+
+def train_es(generations=200, population=64, workers=None, difficulty="normal", env_overrides=None,
+             episodes_per_eval=2, max_steps=3000, fitness="steps", lr=0.01, sigma=0.02, l2=0.005,
+             checkpoint_path="es.pth", resume=False, seed=0, eval_every=5, eval_episodes=5,
+             callback=None, stop_event=None):
+    """
+    Evolution-strategies training of the DQN network (OpenAI-ES with antithetic pairs).
+    Each generation samples population / 2 noise seeds; workers evaluate theta +/- sigma * noise(seed)
+    on the same seeded courses and send back only (seed, fitness) pairs. The master turns the
+    returns into centered-rank weights and broadcasts (seeds, weights) with the next generation's
+    work, which every process applies to its own copy of theta.
+    Parameters:
+        generations (int): number of updates
+        population (int): perturbations per generation (rounded up to an even number)
+        workers (int|None): rollout processes. Default: os.cpu_count()
+        episodes_per_eval (int): courses each perturbation is scored on
+        max_steps (int): cap on episode length during search
+        fitness (str): 'steps' (frames survived), 'score' (pipes passed) or 'reward' (shaped episode
+            reward). The shaped reward has a local optimum at dying quickly that ES falls into; steps
+            gives a signal from the first generation, while score is flat at 0 until a pipe is passed
+        lr, sigma, l2: Adam step size, noise scale and weight decay
+        checkpoint_path (str): saved every eval_every generations in the Agent.save layout
+        resume (bool): start from checkpoint_path (an ES or DQN checkpoint)
+        eval_every (int): generations between greedy evaluations of theta / log lines
+        eval_episodes (int): seeded courses (10_000 + i) for those evaluations
+        callback (callable|None): called with progress metrics at every evaluation; returning True stops
+        stop_event (threading.Event|None): stop after the current generation when set
+    Returns:
+        ESState
+    """
+    from env import FlappyBirdEnv
+
+    workers = workers or os.cpu_count() or 1
+    pairs = (population + 1) // 2
+    theta, saved = initial_theta(checkpoint_path if resume else None, seed)
+    state = ESState(theta, lr=lr, sigma=sigma, l2=l2)
+    if saved is not None:
+        state.m, state.v, state.t = saved['m'].numpy(), saved['v'].numpy(), int(saved['t'])
+        print(f"Resumed ES from {checkpoint_path} (generation {state.t})")
+
+    ctx = mp.get_context("spawn")
+    conns, procs = [], []
+    for _ in range(workers):
+        parent, child = ctx.Pipe()
+        # The full state goes out once; after that only seeds and rank weights cross the pipe
+        p = ctx.Process(target=_worker, args=(child, state, difficulty, env_overrides, max_steps, fitness),
+                        daemon=True)
+        p.start()
+        conns.append(parent)
+        procs.append(p)
+
+    eval_env = FlappyBirdEnv(difficulty=difficulty, render_mode=False, overrides=env_overrides)
+    eval_policy = NumpyPolicy(state.theta)
+    # Keyed on the generation counter too, so a resumed run does not replay the same noise
+    rng = np.random.default_rng([seed, state.t])
+    update = None
+    total_steps = 0
+    start = time.perf_counter()
+    try:
+        for gen in range(1, generations + 1):
+            if stop_event is not None and stop_event.is_set():
+                print(f"ES cancelled at generation {gen}.")
+                break
+            seeds = rng.integers(0, 2 ** 31 - 1, pairs).tolist()
+            course_seeds = rng.integers(0, 2 ** 31 - 1, episodes_per_eval).tolist()
+            for i, conn in enumerate(conns):
+                conn.send((update, seeds[i::workers], course_seeds))
+            results = [r for conn in conns for r in conn.recv()]
+
+            order = [r[0] for r in results]
+            returns = np.array([[r[1][0], r[2][0]] for r in results], dtype=np.float64)
+            total_steps += sum(r[1][1] + r[2][1] for r in results)
+            ranks = centered_ranks(returns)
+            # Workers apply the same update when it arrives with the next generation's seeds
+            update = (order, (ranks[:, 0] - ranks[:, 1]).tolist())
+            state.apply(*update)
+
+            if gen % eval_every == 0 or gen == generations:
+                eval_policy.set_theta(state.theta)
+                _, _, avg_score = rollout(eval_env, eval_policy, range(10_000, 10_000 + eval_episodes),
+                                          max_steps)
+                elapsed = time.perf_counter() - start
+                print(f"Gen {gen:4d} | Steps {total_steps:9d} | MeanFitness {returns.mean():8.2f} | "
+                      f"BestFitness {returns.max():8.2f} | EvalScore {avg_score:6.2f} | "
+                      f"{total_steps / elapsed:.0f} steps/s")
+                save_checkpoint(state, checkpoint_path)
+                if callback is not None and callback({
+                    "generation": gen, "steps": total_steps, "avg_score": avg_score,
+                    "mean_fitness": float(returns.mean()), "seconds": elapsed,
+                }):
+                    print(f"Stopped early by callback at generation {gen}.")
+                    break
+    finally:
+        for conn in conns:
+            conn.send(None)
+        for p in procs:
+            p.join()
+        eval_env.close()
+
+    save_checkpoint(state, checkpoint_path)
+    print(f"ES finished in {time.perf_counter() - start:.1f}s. Model saved to {checkpoint_path}")
+    return state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evolution-strategies training of the DQN policy network.")
+    parser.add_argument("--generations", type=int, default=200)
+    parser.add_argument("--population", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--difficulty", default="normal", choices=["easy", "normal", "hard", "extreme"])
+    parser.add_argument("--episodes-per-eval", type=int, default=2)
+    parser.add_argument("--max-steps", type=int, default=3000)
+    parser.add_argument("--fitness", default="steps", choices=["steps", "score", "reward"])
+    parser.add_argument("--lr", type=float, default=0.01)
+    parser.add_argument("--sigma", type=float, default=0.02)
+    parser.add_argument("--checkpoint", default="es.pth")
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    train_es(generations=args.generations, population=args.population, workers=args.workers,
+             difficulty=args.difficulty, episodes_per_eval=args.episodes_per_eval, max_steps=args.max_steps,
+             fitness=args.fitness, lr=args.lr, sigma=args.sigma, checkpoint_path=args.checkpoint,
+             resume=args.resume, seed=args.seed)
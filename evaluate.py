@@ -0,0 +1,246 @@
+import os
+import time
+import argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from config import CHECKPOINT_PATH
+
+# Per-process state, filled once by _init_worker
+_worker_agent = None
+_worker_envs = {}
+
+
+# =========================================================================
+# WORKER SIDE
+# =========================================================================
+
+def _init_worker(checkpoint_path, torch_threads):
+    """Load the checkpoint once per worker process (.npz = compiled TablePolicy)."""
+    global _worker_agent
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    if checkpoint_path.endswith(".npz"):
+        from table_policy import TablePolicy
+        _worker_agent = TablePolicy.load(checkpoint_path)
+        return
+    import torch
+    from agent import Agent
+
+    torch.set_num_threads(torch_threads)
+    # Without a checkpoint every worker must play the same random-init network, not one of its own
+    torch.manual_seed(0)
+    _worker_agent = Agent(device="cpu")
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        _worker_agent.load(checkpoint_path)
+    _worker_agent.policy_net.eval()
+
+
+def _get_env(difficulty):
+    """Envs are reused across episodes; reset(seed) gives each episode its own pipes."""
+    from env import FlappyBirdEnv
+
+    if difficulty not in _worker_envs:
+        _worker_envs[difficulty] = FlappyBirdEnv(difficulty=difficulty, render_mode=False)
+    return _worker_envs[difficulty]
+
+
+def _run_episode(difficulty, seed, target_score, max_steps):
+    res = run_episode(_get_env(difficulty), _worker_agent, seed, target_score, max_steps)
+    res["difficulty"] = difficulty
+    return res
+
+
+def run_episode(env, agent, seed=None, target_score=1000, max_steps=None):
+    """
+    Play one greedy episode.
+    Parameters:
+        env (FlappyBirdEnv): environment to play in
+        agent: anything with act(state, epsilon)
+        seed (int|None): pipe seed for env.reset
+        target_score (int): stop once this score is reached
+        max_steps (int|None): optional cap on episode length
+    Returns:
+        dict(seed, score, steps, reward, seconds, censored). `censored` is True when the episode
+        was cut by target_score or max_steps rather than ended by a crash.
+    """
+    state = env.reset(seed=seed)
+    done = False
+    ep_reward = 0.0
+    steps = 0
+    start = time.perf_counter()
+
+    while not done:
+        action = agent.act(state, epsilon=0.0)
+        state, reward, done, _ = env.step(action)
+        ep_reward += reward
+        steps += 1
+        if env.score >= target_score or (max_steps is not None and steps >= max_steps):
+            break
+
+    return {
+        "seed": seed,
+        "score": env.score,
+        "steps": steps,
+        "reward": ep_reward,
+        "seconds": time.perf_counter() - start,
+        "censored": not done,
+    }
+
+
+def evaluate_agent(agent, num_episodes=10, difficulty="normal", target_score=1000, max_steps=None,
+                   seed=0, env_overrides=None):
+    """
+    Serial, in-process evaluation of an already-built agent on seeded episodes.
+    Returns:
+        list of run_episode results
+    """
+    from env import FlappyBirdEnv
+
+    env = FlappyBirdEnv(difficulty=difficulty, render_mode=False, overrides=env_overrides)
+    results = [run_episode(env, agent, seed + i, target_score, max_steps) for i in range(num_episodes)]
+    env.close()
+    return results
+
+
+# =========================================================================
+# STATISTICS
+# =========================================================================
+
+def summarize_scores(scores, confidence=0.95, n_boot=2000, seed=0):
+    """
+    Aggregate episode scores.
+    Parameters:
+        scores (list): episode scores
+        confidence (float): level of the bootstrap confidence interval on the mean
+        n_boot (int): number of bootstrap resamples
+    Returns:
+        dict with n, mean, std, median, p5, p25, p75, p95, ci_low, ci_high
+    """
+    arr = np.asarray(scores, dtype=np.float64)
+    if arr.size == 0:
+        return {"n": 0}
+    p5, p25, p50, p75, p95 = np.percentile(arr, [5, 25, 50, 75, 95])
+
+    rng = np.random.default_rng(seed)
+    boot_means = arr[rng.integers(0, arr.size, size=(n_boot, arr.size))].mean(axis=1)
+    alpha = (1.0 - confidence) / 2.0
+    ci_low, ci_high = np.quantile(boot_means, [alpha, 1.0 - alpha])
+
+    return {
+        "n": int(arr.size),
+        "mean": float(arr.mean()),
+        "std": float(arr.std(ddof=1)) if arr.size > 1 else 0.0,
+        "median": float(p50),
+        "p5": float(p5),
+        "p25": float(p25),
+        "p75": float(p75),
+        "p95": float(p95),
+        "ci_low": float(ci_low),
+        "ci_high": float(ci_high),
+        "confidence": confidence,
+    }
+
+
+# =========================================================================
+# DRIVER
+# =========================================================================
+
+def iter_parallel_episodes(num_episodes=10, difficulties=("normal",), target_score=1000, max_steps=None,
+                           checkpoint_path=CHECKPOINT_PATH, seed=0, workers=None, torch_threads=1):
+    """
+    Run seeded greedy episodes on a process pool and yield results as they finish.
+    Episode i of every difficulty uses seed `seed + i`, so presets see the same seeds.
+    Parameters:
+        num_episodes (int): episodes per difficulty
+        difficulties (iterable): difficulty presets to evaluate
+        target_score (int): stop an episode early once this score is reached
+        max_steps (int|None): optional hard cap on episode length
+        checkpoint_path (str): checkpoint to load in each worker, or a table_policy .npz
+        seed (int): base seed
+        workers (int|None): pool size. Default: os.cpu_count()
+        torch_threads (int): torch intra-op threads per worker
+    Yields:
+        dict(difficulty, seed, score, steps, reward, seconds)
+    """
+    workers = workers or os.cpu_count() or 1
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                             initargs=(checkpoint_path, torch_threads)) as pool:
+        futures = [
+            pool.submit(_run_episode, dif, seed + i, target_score, max_steps)
+            for dif in difficulties
+            for i in range(num_episodes)
+        ]
+        for fut in as_completed(futures):
+            yield fut.result()
+
+
+def evaluate_parallel(num_episodes=10, difficulties=("normal",), target_score=1000, max_steps=None,
+                      checkpoint_path=CHECKPOINT_PATH, seed=0, workers=None, plot=True, confidence=0.95):
+    """
+    Parallel counterpart of play.play_model_no_render.
+    Parameters:
+        num_episodes (int): episodes per difficulty
+        difficulties (iterable): difficulty presets to evaluate in one call
+        target_score (int): early-stop score per episode
+        max_steps (int|None): optional hard cap on episode length
+        checkpoint_path (str): checkpoint to evaluate
+        seed (int): base seed for the pipe sequences
+        workers (int|None): number of worker processes. Default: os.cpu_count()
+        plot (bool): show the matplotlib summary at the end (disable for batch jobs)
+        confidence (float): confidence level for the interval on the mean
+    Returns:
+        dict difficulty -> {"episodes": [...], "summary": {...}}
+    """
+    difficulties = tuple(difficulties)
+    if not os.path.exists(checkpoint_path):
+        print("No checkpoint found - evaluating random-init policy.")
+
+    results = {dif: [] for dif in difficulties}
+    start = time.perf_counter()
+    for res in iter_parallel_episodes(num_episodes, difficulties, target_score, max_steps,
+                                      checkpoint_path, seed, workers):
+        results[res["difficulty"]].append(res)
+        print(f"[{res['difficulty']} seed {res['seed']}] Steps: {res['steps']} | Score: {res['score']} | "
+              f"Reward: {res['reward']:.2f} | {res['seconds']:.1f}s")
+    elapsed = time.perf_counter() - start
+
+    report = {}
+    print(f"\nSummary ({elapsed:.1f}s wall):")
+    for dif in difficulties:
+        # as_completed order is arbitrary; report episodes by seed
+        episodes = sorted(results[dif], key=lambda r: r["seed"])
+        summary = summarize_scores([r["score"] for r in episodes], confidence=confidence)
+        report[dif] = {"episodes": episodes, "summary": summary}
+        if summary["n"] == 0:
+            continue
+        print(f"  {dif:8s} n={summary['n']} | mean {summary['mean']:.2f} "
+              f"[{summary['ci_low']:.2f}, {summary['ci_high']:.2f}] @{confidence:.0%} | "
+              f"median {summary['median']:.1f} | p5 {summary['p5']:.1f} | p95 {summary['p95']:.1f} | "
+              f"mean steps {np.mean([r['steps'] for r in episodes]):.0f}")
+
+    if plot:
+        from play import plot_eval_scores
+        plot_eval_scores({dif: [r["score"] for r in report[dif]["episodes"]] for dif in difficulties},
+                         title="Flappy Bird — Parallel Evaluation Results")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Parallel seeded evaluation of a checkpoint.")
+    parser.add_argument("--episodes", type=int, default=10)
+    parser.add_argument("--difficulty", nargs="+", default=["normal"],
+                        choices=["easy", "normal", "hard", "extreme"])
+    parser.add_argument("--target-score", type=int, default=1000)
+    parser.add_argument("--max-steps", type=int, default=None)
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-plot", action="store_true")
+    args = parser.parse_args()
+
+    evaluate_parallel(num_episodes=args.episodes, difficulties=args.difficulty, target_score=args.target_score,
+                      max_steps=args.max_steps, checkpoint_path=args.checkpoint, seed=args.seed,
+                      workers=args.workers, plot=not args.no_plot)
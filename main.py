@@ -1,6 +1,11 @@
 import os
 import sys
+import queue
 import ctypes
+import importlib
+import threading
+import traceback
+import multiprocessing as mp
 from tkinter import (
     Tk, Frame, Canvas, Label, Button, Text, Scrollbar, Toplevel, Entry, StringVar,
     LEFT, RIGHT, BOTH, END, Y, NW, CENTER, Radiobutton
@@ -24,6 +29,9 @@ BTN_PLAY_NO_RENDER = os.path.join(ASSETS_DIR, "play_no_render.png")
 WINDOW_W = 1400
 WINDOW_H = 760
 
+CONSOLE_POLL_MS = 100        # How often queued console output is drained into the Text widget
+CONSOLE_MAX_LINES = 5000     # Scrollback cap; older lines are dropped
+
 # DPI fix Windows
 try:
     ctypes.windll.shcore.SetProcessDpiAwareness(1)
@@ -34,10 +42,9 @@ except Exception:
         pass
 
 # -------------------------
-# Import train/play functions
+# train / play (torch, pygame, matplotlib) are imported by the job worker
+# (see FlappyGUI._start_job), so the window opens without paying for them.
 # -------------------------
-from train import train_loop
-from play import play_model, play_model_no_render
 
 # -------------------------
 # Helpers
@@ -55,24 +62,34 @@ def load_image_pil(path):
 # Console redirector
 # -------------------------
 class ConsoleRedirector:
-    def __init__(self, text_widget):
-        self.text_widget = text_widget
+    """
+    File-like stdout/stderr replacement that only enqueues text.
+    Safe to call from worker threads; FlappyGUI drains the queue on the Tk main loop.
+    """
+    def __init__(self, out_queue):
+        self.queue = out_queue
 
     def write(self, s):
-        if not s:
-            return
-        try:
-            self.text_widget.configure(state="normal")
-            self.text_widget.insert(END, s)
-            self.text_widget.see(END)
-            self.text_widget.configure(state="disabled")
-            self.text_widget.update_idletasks()
-        except Exception:
-            pass
+        if s:
+            self.queue.put(s)
 
     def flush(self):
         pass
 
+
+def _run_job_process(target, kwargs, out_queue):
+    """
+    Entry point of process jobs (FlappyGUI._start_job(process=True)). The job owns this
+    process's main thread, which SDL needs for the pygame window; output goes back to the
+    GUI console through out_queue.
+    """
+    sys.stdout = sys.stderr = ConsoleRedirector(out_queue)
+    try:
+        module_name, fn_name = target.split(":")
+        getattr(importlib.import_module(module_name), fn_name)(**kwargs)
+    except Exception:
+        traceback.print_exc()
+
 # -------------------------
 # Main GUI
 # -------------------------
@@ -86,6 +103,12 @@ class FlappyGUI:
         self._images = {}
         self.difficulty_var = StringVar(value="normal")
 
+        # Background job state
+        self._console_queue = queue.Queue()
+        self._ui_calls = queue.Queue()  # callables queued by workers, run on the Tk thread
+        self._job = None
+        self._stop_event = threading.Event()
+
         # Layout: left 60%, right 40%
         left_w = int(WINDOW_W * 0.60)
         right_w = WINDOW_W - left_w
@@ -111,8 +134,9 @@ class FlappyGUI:
         # Redirect stdout/stderr -> console
         self._orig_stdout = sys.stdout
         self._orig_stderr = sys.stderr
-        sys.stdout = ConsoleRedirector(self.console_text)
-        sys.stderr = ConsoleRedirector(self.console_text)
+        sys.stdout = ConsoleRedirector(self._console_queue)
+        sys.stderr = ConsoleRedirector(self._console_queue)
+        self.root.after(CONSOLE_POLL_MS, self._drain_console)
 
         # Close handler
         root.protocol("WM_DELETE_WINDOW", self._on_close)
@@ -158,6 +182,8 @@ class FlappyGUI:
             (BTN_PLAY_RENDER, self._on_play_render),
             (BTN_PLAY_NO_RENDER, self._on_play_no_render),
         ]
+        # Buttons without artwork are drawn as text, sized like the image buttons
+        text_buttons = [("WATCH (FAST-FORWARD)", self._on_watch)]
         max_btn_w = int(left_w * 0.45)
         start_y = int(left_h * 0.32) + 18
         spacing = 26
@@ -187,6 +213,14 @@ class FlappyGUI:
                 y = start_y + idx * (50 + spacing)
                 self.left_canvas.create_window(x, y, anchor=NW, window=fallback)
 
+        btn_w, btn_h = max_btn_w, int(max_btn_w * 32 / 200)  # the artwork is 200x32
+        for idx, (text, cmd) in enumerate(text_buttons, start=len(btn_paths)):
+            btn = Button(self.left_canvas, text=text, command=cmd, bg="#5a5aa8", fg="#fff",
+                         activebackground="#7070c0", font=self.pixel_font_med)
+            x = max(40, (left_w - btn_w) // 2)
+            y = start_y + idx * (btn_h + spacing)
+            self.left_canvas.create_window(x, y, anchor=NW, window=btn, width=btn_w, height=btn_h)
+
     def _build_right_panel(self):
         padx, pady = 14, 12
         
@@ -217,9 +251,103 @@ class FlappyGUI:
         sb.pack(side=RIGHT, fill=Y)
         self.console_text.configure(yscrollcommand=sb.set)
 
-        # Clear console button
-        clear_btn = Button(self.right_frame, text="Clear Console", command=self._clear_console, bg="#20262a", fg="#fff")
-        clear_btn.pack(anchor="se", padx=padx, pady=(4, 12))
+        # Console buttons
+        btn_frame = Frame(self.right_frame, bg="#0f1214")
+        btn_frame.pack(anchor="se", padx=padx, pady=(4, 12))
+        self.cancel_btn = Button(btn_frame, text="Cancel Job", command=self._cancel_job, bg="#5a1f1f", fg="#fff",
+                                 state="disabled")
+        self.cancel_btn.pack(side=LEFT, padx=(0, 8))
+        clear_btn = Button(btn_frame, text="Clear Console", command=self._clear_console, bg="#20262a", fg="#fff")
+        clear_btn.pack(side=LEFT)
+
+    # -------------------------
+    # Background jobs
+    # -------------------------
+    def _drain_console(self):
+        """Move queued output into the console in one insert, then re-arm the timer."""
+        chunks = []
+        try:
+            while True:
+                chunks.append(self._console_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if chunks:
+            self.console_text.configure(state="normal")
+            self.console_text.insert(END, "".join(chunks))
+            line_count = int(self.console_text.index("end-1c").split(".")[0])
+            if line_count > CONSOLE_MAX_LINES:
+                self.console_text.delete("1.0", f"{line_count - CONSOLE_MAX_LINES + 1}.0")
+            self.console_text.see(END)
+            self.console_text.configure(state="disabled")
+
+        try:
+            while True:
+                self._ui_calls.get_nowait()()
+        except queue.Empty:
+            pass
+
+        self.root.after(CONSOLE_POLL_MS, self._drain_console)
+
+    def _job_running(self):
+        return self._job is not None and self._job.is_alive()
+
+    def _start_job(self, name, target, on_done=None, process=False, **kwargs):
+        """
+        Run target(**kwargs, stop_event=...) on a worker thread so the window stays responsive.
+        target is a "module:function" string; the module is imported on the worker, so the
+        first click does not freeze the window while torch / pygame load.
+        on_done(result) is called on the Tk thread afterwards.
+        With process=True the target runs on the main thread of a spawned process instead
+        (anything that opens a pygame window: SDL must not run on a worker thread); the worker
+        thread only relays its output, and on_done receives None.
+        """
+        if self._job_running():
+            print("[UI] A job is already running - cancel it first.")
+            return
+        if process:
+            ctx = mp.get_context("spawn")
+            self._stop_event = ctx.Event()
+            output = ctx.Queue()
+        else:
+            self._stop_event = threading.Event()
+        kwargs["stop_event"] = self._stop_event
+
+        def run():
+            result = None
+            try:
+                if process:
+                    proc = ctx.Process(target=_run_job_process, args=(target, kwargs, output), name=name, daemon=True)
+                    proc.start()
+                    while proc.is_alive() or not output.empty():
+                        try:
+                            self._console_queue.put(output.get(timeout=0.1))
+                        except queue.Empty:
+                            pass
+                    proc.join()
+                else:
+                    module_name, fn_name = target.split(":")
+                    fn = getattr(importlib.import_module(module_name), fn_name)
+                    result = fn(**kwargs)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                print(f"[UI] {name} finished.")
+                self._ui_calls.put(lambda: self._on_job_done(on_done, result))
+
+        print(f"[UI] Starting {name}...")
+        self.cancel_btn.configure(state="normal")
+        self._job = threading.Thread(target=run, name=name, daemon=True)
+        self._job.start()
+
+    def _on_job_done(self, on_done, result):
+        self.cancel_btn.configure(state="disabled")
+        if on_done is not None:
+            on_done(result)
+
+    def _cancel_job(self):
+        if self._job_running():
+            print("[UI] Cancelling...")
+            self._stop_event.set()
 
     # -------------------------
     # Actions
@@ -240,7 +368,7 @@ class FlappyGUI:
         except Exception:
             epis = 100
         diff = self._get_diff()
-        train_loop(num_episodes=epis, render=False, resume=False, difficulty=diff)
+        self._start_job("training", "train:train_loop", num_episodes=epis, render=False, resume=False, difficulty=diff)
 
     def _on_load_and_train(self):
         # Choice 2: train_loop(num_episodes=EPI_NUMS, render=False, resume=True)
@@ -250,12 +378,48 @@ class FlappyGUI:
         except Exception:
             epis = 100
         diff = self._get_diff()
-        train_loop(num_episodes=epis, render=False, resume=True, difficulty=diff)
+        self._start_job("training", "train:train_loop", num_episodes=epis, render=False, resume=True, difficulty=diff)
 
     def _on_play_render(self):
         # Choice 3: play_model(render=True, dif=input_dif)
         diff = self._get_diff()
-        play_model(render=True, dif=diff)
+        self._start_job("play", "play:play_model", process=True, render=True, dif=diff)
+
+    def _on_watch(self):
+        # Fast-forward watch: play.watch_model, pygame window in a spawned process like rendered play
+        from config import WATCH_SPEED
+        popup = Toplevel(self.root)
+        popup.title("Watch (fast-forward)")
+        popup.geometry("360x200")
+        popup.resizable(False, False)
+
+        Label(popup, text="Speed (frames per displayed frame):", font=("Fixedsys", 11)).pack(pady=(15, 5))
+        speed_entry = Entry(popup, width=20, font=("Fixedsys", 11))
+        speed_entry.pack(pady=(0, 10))
+        speed_entry.insert(0, str(WATCH_SPEED))
+
+        Label(popup, text="Number of episodes:", font=("Fixedsys", 11)).pack(pady=(5, 5))
+        num_entry = Entry(popup, width=20, font=("Fixedsys", 11))
+        num_entry.pack(pady=(0, 15))
+        num_entry.insert(0, "1")
+
+        def start():
+            try:
+                speed = float(speed_entry.get().strip())
+            except Exception:
+                print(f"[UI] Invalid speed; using {WATCH_SPEED}")
+                speed = WATCH_SPEED
+            try:
+                num = int(num_entry.get().strip())
+            except Exception:
+                print("[UI] Invalid num_episodes; using 1")
+                num = 1
+            popup.destroy()
+            print("[UI] Watch hotkeys: UP/DOWN speed, 1 real time, M max speed, J jump ahead, SPACE pause, ESC quit")
+            self._start_job("watch", "play:watch_model", process=True, speed=speed, num_episodes=num,
+                            dif=self._get_diff())
+
+        Button(popup, text="Run", command=start, width=12, bg="#20262a", fg="#fff", font=("Arial", 11)).pack(pady=10)
 
     def _on_play_no_render(self):
         # Choice 4: play_model_no_render(target_score=500, num_episodes=5, dif=input_dif)
@@ -290,11 +454,24 @@ class FlappyGUI:
                 num = 5
             popup.destroy()
             diff = self._get_diff()
-            play_model_no_render(target_score=target, num_episodes=num, dif=diff)
+
+            def show_plot(scores):
+                # matplotlib must run on the Tk thread
+                if scores:
+                    from play import plot_eval_scores
+                    plot_eval_scores({"Score per Episode": scores},
+                                     title="Flappy Bird — Evaluation Results (No Render)")
+
+            self._start_job("evaluation", "play:play_model_no_render", on_done=show_plot,
+                            target_score=target, num_episodes=num, dif=diff, plot=False)
 
         Button(popup, text="Run", command=start, width=12, bg="#20262a", fg="#fff", font=("Arial", 11)).pack(pady=10)
 
     def _on_close(self):
+        # Stop any running job so it can save / close pygame
+        if self._job_running():
+            self._stop_event.set()
+            self._job.join(timeout=5.0)
         # Restore stdout/stderr
         try:
             sys.stdout = self._orig_stdout
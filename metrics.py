@@ -0,0 +1,304 @@
+import os
+import json
+import queue
+import threading
+import numpy as np
+
+# On-disk record layouts. Files are raw little-endian records, appended in batches.
+STEP_DTYPE = np.dtype([("step", "<i8"), ("loss", "<f4"), ("epsilon", "<f4")])
+EPISODE_DTYPE = np.dtype([
+    ("episode", "<i8"), ("step", "<i8"), ("score", "<i4"),
+    ("reward", "<f4"), ("length", "<i4"), ("epsilon", "<f4"),
+])
+LOG_FILES = {"steps": ("steps.bin", STEP_DTYPE), "episodes": ("episodes.bin", EPISODE_DTYPE)}
+
+
+# =========================================================================
+# O(1)-MEMORY STATISTICS
+# =========================================================================
+
+class RollingWindow:
+    """
+    Fixed-size ring array with an O(1) running mean over the last `size` values.
+    Replaces `np.mean(values[-size:])` on an ever-growing list.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.values = np.zeros(size, dtype=np.float64)
+        self.pos = 0
+        self.count = 0
+        self._sum = 0.0
+
+    def push(self, x):
+        x = float(x)
+        if self.count == self.size:
+            self._sum -= self.values[self.pos]
+        else:
+            self.count += 1
+        self.values[self.pos] = x
+        self._sum += x
+        self.pos = (self.pos + 1) % self.size
+        # Re-sum once per lap so float drift cannot accumulate
+        if self.pos == 0:
+            self._sum = float(self.values.sum())
+
+    def mean(self, default=0.0):
+        return self._sum / self.count if self.count else default
+
+    def __len__(self):
+        return self.count
+
+
+class Welford:
+    """Streaming mean / variance over everything pushed so far (Welford's algorithm)."""
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def push(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+
+    @property
+    def var(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return self.var ** 0.5
+
+
+class RollingStat:
+    """Rolling window for recent values plus Welford totals for the whole run."""
+    def __init__(self, window):
+        self.recent = RollingWindow(window)
+        self.total = Welford()
+        self.last = 0.0
+
+    def push(self, x):
+        self.last = x
+        self.recent.push(x)
+        self.total.push(x)
+
+
+class Histogram:
+    """
+    Counts in fixed buckets, so memory does not grow with the number of samples.
+    Bucket i holds edges[i-1] < x <= edges[i]; values at or below edges[0] / above edges[-1] land in
+    under- / overflow buckets. Percentiles are upper bucket edges, so they are exact for integer
+    values with integer edges (batch sizes) and conservative otherwise (latencies).
+    """
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    @classmethod
+    def log(cls, low=1.0, high=1e7, per_octave=4):
+        """Log-spaced buckets, `per_octave` per doubling: constant relative resolution (latencies)."""
+        n = int(np.ceil(np.log2(high / low) * per_octave))
+        return cls(low * 2.0 ** (np.arange(n + 1) / per_octave))
+
+    def push(self, x):
+        self.counts[np.searchsorted(self.edges, x, side="left")] += 1
+        self.count += 1
+        self.sum += x
+        self.max = max(self.max, x)
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        i = int(np.searchsorted(np.cumsum(self.counts), q / 100.0 * self.count, side="left"))
+        return float(self.edges[i]) if i < len(self.edges) else self.max
+
+    def to_dict(self):
+        """Summary plus the non-empty buckets as [low, high, count] (JSON-friendly)."""
+        bounds = np.concatenate([[-np.inf], self.edges, [np.inf]])
+        return {
+            "count": self.count, "mean": self.sum / self.count if self.count else 0.0, "max": self.max,
+            "p50": self.percentile(50), "p90": self.percentile(90), "p99": self.percentile(99),
+            "buckets": [[float(bounds[i]), float(bounds[i + 1]), int(c)]
+                        for i, c in enumerate(self.counts) if c],
+        }
+
+
+# =========================================================================
+# APPEND-ONLY BINARY LOG
+# =========================================================================
+
+class _BatchedLog:
+    """Collects records in a preallocated chunk; full chunks are handed to the flush thread."""
+    def __init__(self, path, dtype, batch_size, put):
+        self.path = path
+        self.dtype = dtype
+        self.batch_size = batch_size
+        self._put = put
+        self._chunk = np.zeros(batch_size, dtype=dtype)
+        self._n = 0
+
+    def append(self, record):
+        self._chunk[self._n] = record
+        self._n += 1
+        if self._n == self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._n:
+            # The chunk is handed over whole; start a fresh one instead of copying
+            self._put((self.path, self._chunk[:self._n]))
+            self._chunk = np.zeros(self.batch_size, dtype=self.dtype)
+            self._n = 0
+
+
+class MetricsLogger:
+    """
+    Bounded-memory training metrics.
+    Keeps rolling windows for loss, score, episode reward and epsilon, and (if `run_dir`
+    is given) streams every step / episode record to append-only binary logs written
+    in batches by a background thread.
+    Parameters:
+        run_dir (str|None): directory for steps.bin / episodes.bin / meta.json. None = in-memory only
+        score_window (int): episodes in the rolling score / reward windows. Default: 50
+        loss_window (int): updates in the rolling loss window. Default: 100
+        batch_size (int): records per write. Default: 4096
+        max_pending (int): full chunks waiting for the writer thread; when the disk falls this far
+            behind, logging blocks until it catches up, so memory stays bounded. Default: 8
+
+    Example:
+        >>> metrics = MetricsLogger("runs/dqn")
+        >>> metrics.log_step(step, loss, epsilon)
+        >>> metrics.log_episode(ep, step, score, ep_reward, length, epsilon)
+        >>> metrics.close()
+    """
+    def __init__(self, run_dir=None, score_window=50, loss_window=100, batch_size=4096, max_pending=8):
+        self.loss = RollingStat(loss_window)
+        self.score = RollingStat(score_window)
+        self.reward = RollingStat(score_window)
+        self.epsilon = RollingStat(loss_window)
+        self.run_dir = run_dir
+        self._logs = {}
+        self._thread = None
+        self._error = None
+
+        if run_dir is not None:
+            os.makedirs(run_dir, exist_ok=True)
+            with open(os.path.join(run_dir, "meta.json"), "w") as f:
+                json.dump({name: {"file": fname, "dtype": dtype.descr}
+                           for name, (fname, dtype) in LOG_FILES.items()}, f, indent=2)
+            self._queue = queue.Queue(maxsize=max_pending)
+            for name, (fname, dtype) in LOG_FILES.items():
+                self._logs[name] = _BatchedLog(os.path.join(run_dir, fname), dtype, batch_size, self._put)
+            self._thread = threading.Thread(target=self._writer, name="metrics-writer", daemon=True)
+            self._thread.start()
+
+    def _writer(self):
+        handles = {}
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                path, records = item
+                if path not in handles:
+                    handles[path] = open(path, "ab")
+                handles[path].write(records.tobytes())
+                handles[path].flush()
+        except BaseException as e:
+            self._error = e
+        finally:
+            for fh in handles.values():
+                fh.close()
+
+    def _put(self, item):
+        # Blocks while the writer is max_pending chunks behind; fails instead of waiting on a dead writer
+        while True:
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if not self._thread.is_alive():
+                    raise RuntimeError("metrics writer thread failed") from self._error
+
+    def log_step(self, step, loss, epsilon):
+        if loss is not None:
+            self.loss.push(loss)
+        self.epsilon.push(epsilon)
+        if self._logs:
+            self._logs["steps"].append((step, np.nan if loss is None else loss, epsilon))
+
+    def log_episode(self, episode, step, score, reward, length, epsilon):
+        self.score.push(score)
+        self.reward.push(reward)
+        if self._logs:
+            self._logs["episodes"].append((episode, step, score, reward, length, epsilon))
+
+    def flush(self):
+        for log in self._logs.values():
+            log.flush()
+
+    def close(self):
+        """Flush pending records and stop the writer thread."""
+        if self._thread is None:
+            return
+        self.flush()
+        self._put(None)
+        self._thread.join()
+        self._thread = None
+
+
+# =========================================================================
+# READER
+# =========================================================================
+
+def read_log(path, dtype):
+    """
+    Memory-map a binary log without loading it. A trailing partial record
+    (e.g. from a crash mid-write) is ignored.
+    """
+    dtype = np.dtype(dtype)
+    n = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+    if n == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(n,))
+
+
+def load_run(run_dir):
+    """
+    Lazily open the logs of a run written by MetricsLogger.
+    Returns:
+        {"steps": memmap[STEP_DTYPE], "episodes": memmap[EPISODE_DTYPE]}
+    """
+    meta_path = os.path.join(run_dir, "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        layout = {name: (m["file"], np.dtype([tuple(d) for d in m["dtype"]])) for name, m in meta.items()}
+    else:
+        layout = LOG_FILES
+    return {name: read_log(os.path.join(run_dir, fname), dtype) for name, (fname, dtype) in layout.items()}
+
+
+def downsample(values, max_points=5000, chunk_rows=1 << 20):
+    """
+    Block-average a long (possibly memory-mapped) series to at most `max_points`
+    points for plotting, reading it `chunk_rows` at a time.
+    Returns:
+        x (block centres), y (block means)
+    """
+    n_total = len(values)
+    if n_total <= max_points:
+        return np.arange(n_total), np.asarray(values, dtype=np.float64)
+    block = int(np.ceil(n_total / max_points))
+    chunk_rows = max(block, chunk_rows // block * block)
+    n = n_total // block * block
+    means = []
+    for start in range(0, n, chunk_rows):
+        chunk = np.asarray(values[start:min(start + chunk_rows, n)], dtype=np.float64)
+        means.append(np.nanmean(chunk.reshape(-1, block), axis=1))
+    means = np.concatenate(means)
+    return np.arange(len(means)) * block + block // 2, means
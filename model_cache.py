@@ -0,0 +1,100 @@
+import os
+import random
+import threading
+from collections import OrderedDict
+
+import torch
+
+from agent import DQN
+from config import MODEL_CACHE_SIZE
+
+
+class InferencePolicy:
+    """
+    Inference-only policy: just the policy DQN in eval mode, no target net or optimizer.
+    Drop-in for Agent wherever only act(state, epsilon) is needed.
+    """
+    def __init__(self, net, device, n_actions=2, source=None):
+        self.net = net
+        self.device = device
+        self.n_actions = n_actions
+        self.source = source
+
+    def act(self, state, epsilon=0.0):
+        if epsilon > 0.0 and random.random() < epsilon:
+            return random.randrange(self.n_actions)
+        with torch.inference_mode():
+            q = self.net(torch.as_tensor(state, dtype=torch.float32, device=self.device).unsqueeze(0))
+            return int(q.argmax(dim=1).item())
+
+
+class ModelCache:
+    """
+    LRU cache of InferencePolicy objects keyed by (checkpoint path, mtime, device).
+    A rewritten checkpoint gets a new mtime, so it is reloaded rather than served stale.
+    Parameters:
+        maxsize (int): number of models kept in memory. Default: MODEL_CACHE_SIZE from config.py
+    """
+    def __init__(self, maxsize=MODEL_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, device=None, state_dim=4, n_actions=2, verbose=True):
+        """
+        Return a cached policy for `path`, loading it on a miss.
+        A missing checkpoint gives an uncached randomly initialised policy.
+        """
+        device = torch.device(device) if device is not None else (
+            torch.device("cuda") if torch.cuda.is_available() else torch.device("cpu")
+        )
+        abspath = os.path.abspath(path)
+        if not os.path.exists(abspath):
+            if verbose:
+                print("No checkpoint found - play with random policy.")
+            return InferencePolicy(DQN(state_dim, n_actions).to(device).eval(), device, n_actions)
+
+        key = (abspath, os.stat(abspath).st_mtime_ns, str(device))
+        with self._lock:
+            policy = self._entries.get(key)
+            if policy is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                if verbose:
+                    print(f"[model cache] hit: {path} ({self.hits} hits / {self.misses} misses)")
+                return policy
+
+            self.misses += 1
+            # Drop older versions of the same file before loading the new one
+            for old in [k for k in self._entries if k[0] == abspath]:
+                del self._entries[old]
+            policy = self._load(abspath, device, state_dim, n_actions)
+            self._entries[key] = policy
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            if verbose:
+                print(f"[model cache] miss: loaded {path} ({self.hits} hits / {self.misses} misses)")
+            return policy
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _load(path, device, state_dim, n_actions):
+        data = torch.load(path, map_location=device, weights_only=True)
+        net = DQN(state_dim, n_actions).to(device)
+        net.load_state_dict(data['policy_state_dict'])
+        net.eval()
+        return InferencePolicy(net, device, n_actions, source=path)
+
+
+# Process-wide cache shared by play.py and the GUI
+_default_cache = ModelCache()
+
+
+def get_policy(path, device=None, verbose=True):
+    """Fetch an inference policy for `path` from the process-wide cache."""
+    return _default_cache.get(path, device=device, verbose=verbose)
@@ -0,0 +1,207 @@
+import os
+import time
+import argparse
+import torch
+import torch.nn as nn
+
+from env import FlappyBirdEnv
+
+
+class SearchOracle:
+    """
+    Finds a surviving flap schedule for a seeded course by depth-first search over env.step.
+    Physics is deterministic given the pipe seed, and y / velocity only take values on a
+    0.5 grid (GRAVITY = 0.5, FLAP_VEL = -9), so (frame, y, velocity) identifies a search state
+    exactly: the frame fixes every pipe offset. States proven dead (no action sequence from them
+    reaches the goal) are memoized and never expanded again; flapping resets the velocity, so
+    many branches merge into the same states.
+    Parameters:
+        difficulty (str): difficulty preset
+        env_overrides (dict|None): per-instance env constants
+    """
+    FLAP_LINE = 0.7
+
+    def __init__(self, difficulty="normal", env_overrides=None):
+        self.env = FlappyBirdEnv(difficulty=difficulty, render_mode=False, overrides=env_overrides)
+
+    def _key(self, t):
+        return t, int(self.env.bird_y * 2), int(self.env.bird_vel * 2)
+
+    def _action_order(self):
+        # Flap first only when the bird would drop below FLAP_LINE of the next gap. Aiming at the
+        # gap centre instead makes the -9 flap overshoot and costs ~40x more backtracking.
+        env = self.env
+        _, gap_y = env._get_next_pipe()
+        line = gap_y + env.PIPE_GAP * self.FLAP_LINE
+        return (1, 0) if env.bird_y + env.bird_vel + env.GRAVITY > line else (0, 1)
+
+    def plan(self, seed, target_score=50, max_steps=None, max_nodes=1_000_000):
+        """
+        Search for actions that reach `target_score` (or survive `max_steps` frames).
+        Returns:
+            actions (list): the schedule found, or the longest surviving prefix if the search failed
+            info (dict): reached, nodes expanded, dead states memoized, frames, seconds
+        """
+        env = self.env
+        start = time.perf_counter()
+        env.reset(seed=seed)
+        dead = set()
+        # Each frame: (snapshot, memo key, remaining actions to try)
+        stack = [(env.snapshot(), self._key(0), list(self._action_order()))]
+        actions, best = [], []
+        nodes = 0
+        reached = False
+
+        while stack and nodes < max_nodes:
+            snap, key, todo = stack[-1]
+            if not todo:
+                dead.add(key)
+                stack.pop()
+                if actions:
+                    actions.pop()
+                continue
+            action = todo.pop(0)
+            env.restore(snap)
+            _, _, done, _ = env.step(action)
+            nodes += 1
+            if done:
+                continue
+            t = len(actions) + 1
+            child = self._key(t)
+            if child in dead:
+                continue
+            actions.append(action)
+            if len(actions) > len(best):
+                best = list(actions)
+            if env.score >= target_score or (max_steps is not None and t >= max_steps):
+                reached = True
+                break
+            stack.append((env.snapshot(), child, list(self._action_order())))
+
+        return (actions if reached else best), {
+            "reached": reached,
+            "nodes": nodes,
+            "dead_states": len(dead),
+            "frames": len(actions if reached else best),
+            "seconds": time.perf_counter() - start,
+        }
+
+    def replay(self, seed, actions, sink=None):
+        """
+        Play `actions` on the seeded course and push (state, action, reward, next_state, done)
+        into `sink` (ReplayBuffer, dataset.ShardWriter, ...). Returns (score, transitions).
+        """
+        env = self.env
+        state = env.reset(seed=seed)
+        if sink is None:
+            # Nothing needs the per-frame transitions: jump between flaps in closed form
+            _, _, n = env.advance(actions)
+            return env.score, n
+        n = 0
+        shaped = getattr(sink, "stores_reward_features", False)
+        for action in actions:
+            next_state, reward, done, _ = env.step(action)
+            if shaped:
+                sink.push(state, action, reward, next_state, float(done), env.reward_features, env.reward_event)
+            else:
+                sink.push(state, action, reward, next_state, float(done))
+            n += 1
+            state = next_state
+            if done:
+                break
+        return env.score, n
+
+    def close(self):
+        self.env.close()
+
+
+def generate_demos(sink, num_episodes=20, seed=0, target_score=50, difficulty="normal", max_nodes=1_000_000,
+                   verbose=True):
+    """
+    Plan and replay `num_episodes` seeded courses into `sink`.
+    Returns:
+        dict(episodes, transitions, reached, nodes, seconds, demos_per_sec)
+    """
+    oracle = SearchOracle(difficulty)
+    transitions = nodes = reached = 0
+    start = time.perf_counter()
+    for i in range(num_episodes):
+        actions, info = oracle.plan(seed + i, target_score, max_nodes=max_nodes)
+        score, n = oracle.replay(seed + i, actions, sink)
+        transitions += n
+        nodes += info["nodes"]
+        reached += info["reached"]
+        if verbose:
+            print(f"[seed {seed + i}] score {score:4d} | frames {n:6d} | nodes {info['nodes']:7d} | "
+                  f"dead states {info['dead_states']:6d} | {info['seconds']:.2f}s")
+    oracle.close()
+    elapsed = time.perf_counter() - start
+    report = {
+        "episodes": num_episodes,
+        "transitions": transitions,
+        "reached": reached,
+        "nodes": nodes,
+        "seconds": elapsed,
+        "demos_per_sec": transitions / elapsed if elapsed > 0 else 0.0,
+    }
+    if verbose:
+        print(f"{transitions:,} demo transitions from {num_episodes} courses ({reached} reached the target) "
+              f"in {elapsed:.1f}s: {report['demos_per_sec']:,.0f} transitions/s, {nodes / elapsed:,.0f} nodes/s")
+    return report
+
+
+def behavior_clone(agent, demos, updates=2000, batch_size=256, margin=0.8, margin_weight=1.0, sync_every=500,
+                   seed=0):
+    """
+    DQfD-style pretraining on demonstrations: the usual TD loss (agent.compute_loss) plus the
+    large-margin loss max_a [Q(s,a) + margin * (a != a_E)] - Q(s, a_E). The margin term makes the
+    demonstrated action greedy; the TD term keeps Q-values consistent with the rewards, so the
+    policy is not wiped out by the first DQN updates (margin-only pretraining is).
+    Parameters:
+        agent: Agent / DDQN Agent
+        demos (tuple): (states, actions, rewards, next_states, dones) arrays
+        updates (int): gradient steps
+        sync_every (int): hard target-net sync interval during pretraining
+    Returns:
+        accuracy of the greedy policy on the demonstrated actions
+    """
+    device = agent.device
+    tensors = [torch.as_tensor(x, device=device) for x in demos]
+    states_t, actions_t = tensors[0].float(), tensors[1].long()
+    gen = torch.Generator().manual_seed(seed)
+    for i in range(updates):
+        idx = torch.randint(0, len(states_t), (batch_size,), generator=gen).to(device)
+        batch = [t[idx] for t in tensors]
+        q = agent.policy_net(batch[0].float())
+        a = batch[1].long().unsqueeze(1)
+        margins = torch.full_like(q, margin).scatter_(1, a, 0.0)
+        margin_loss = ((q + margins).max(dim=1)[0] - q.gather(1, a).squeeze(1)).mean()
+        loss = agent.compute_loss(batch) + margin_weight * margin_loss
+        agent.optimizer.zero_grad()
+        loss.backward()
+        nn.utils.clip_grad_norm_(agent.policy_net.parameters(), 10.0)
+        agent.optimizer.step()
+        if (i + 1) % sync_every == 0:
+            agent.target_net.load_state_dict(agent.policy_net.state_dict())
+    agent.target_net.load_state_dict(agent.policy_net.state_dict())
+    with torch.inference_mode():
+        return float((agent.policy_net(states_t).argmax(dim=1) == actions_t).float().mean())
+
+
+if __name__ == "__main__":
+    from dataset import ShardWriter, write_manifest
+
+    parser = argparse.ArgumentParser(description="Generate oracle demonstrations into a dataset directory.")
+    parser.add_argument("out", help="dataset directory (see dataset.py)")
+    parser.add_argument("--episodes", type=int, default=20)
+    parser.add_argument("--target-score", type=int, default=50)
+    parser.add_argument("--difficulty", default="normal", choices=["easy", "normal", "hard", "extreme"])
+    parser.add_argument("--seed", type=int, default=1000)
+    parser.add_argument("--max-nodes", type=int, default=1_000_000, help="search budget per course")
+    args = parser.parse_args()
+
+    writer = ShardWriter(args.out, prefix="oracle")
+    stats = generate_demos(writer, args.episodes, args.seed, args.target_score, args.difficulty, args.max_nodes)
+    write_manifest(args.out, writer.close(), meta=dict(stats, source="oracle", difficulty=args.difficulty,
+                                                       target_score=args.target_score, seed=args.seed))
+    print(f"Saved demonstrations to {os.path.join(args.out, 'manifest.json')}")
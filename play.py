@@ -1,32 +1,35 @@
 from env import FlappyBirdEnv
 from utils import ReplayBuffer
-import os
 import numpy as np
 import pygame
 import time
-import matplotlib.pyplot as plt
-from agent import Agent
-from config import CHECKPOINT_PATH
+from collections import deque
+from model_cache import get_policy
+from profiler import PhaseTimer, NULL_TIMER
+from config import (CHECKPOINT_PATH, WATCH_SPEED, WATCH_LOOKAHEAD, WATCH_CLOSE_CALL_PX, WATCH_JUMP_STEPS,
+                    WATCH_MAX_RENDER_FPS)
 
 
-def play_model(num_episodes=1, dif="normal", render=True, target_score=1000):
+def play_model(num_episodes=1, dif="normal", render=True, target_score=1000, profile=False, stop_event=None,
+               checkpoint_path=CHECKPOINT_PATH):
     env = FlappyBirdEnv(difficulty=dif, render_mode=render)
-    agent = Agent()
+    timer = PhaseTimer() if profile else NULL_TIMER
 
-    # Load model
-    if os.path.exists(CHECKPOINT_PATH):
-        agent.load(CHECKPOINT_PATH)
-        print("Loaded model for play.")
-    else:
-        print("No checkpoint found - play with random policy.")
+    # Load model (warm cache: repeated plays skip construction and torch.load)
+    agent = get_policy(checkpoint_path)
 
     for ep in range(1, num_episodes + 1):
         state = env.reset()
         done = False
         ep_reward = 0.0
         steps = 0
+        timer.reset()
 
         while not done:
+            if stop_event is not None and stop_event.is_set():
+                print("Play cancelled.")
+                env.close()
+                return
             # Handle quit / escape
             for e in pygame.event.get():
                 if e.type == pygame.QUIT:
@@ -37,14 +40,17 @@ def play_model(num_episodes=1, dif="normal", render=True, target_score=1000):
                     return
 
             # Greedy action
-            action = agent.act(state, epsilon=0.0)
-            next_state, reward, done, _ = env.step(action)
+            with timer.phase("agent.act"):
+                action = agent.act(state, epsilon=0.0)
+            with timer.phase("env.step"):
+                next_state, reward, done, _ = env.step(action)
             state = next_state
             ep_reward += reward
             steps += 1
 
             if render:
-                env.render()
+                with timer.phase("render"):
+                    env.render()
 
             # Early stop if high score reached
             if env.score >= target_score:
@@ -52,6 +58,8 @@ def play_model(num_episodes=1, dif="normal", render=True, target_score=1000):
                 done = True
 
         print(f"[EP {ep}] Steps: {steps} | Score: {env.score} | Reward: {ep_reward:.2f}")
+        if timer.enabled:
+            print("    " + timer.report())
 
         # short delay before next episode
         if render:
@@ -61,16 +69,166 @@ def play_model(num_episodes=1, dif="normal", render=True, target_score=1000):
     print("\nAll episodes finished.")
 
 
-def play_model_no_render(num_episodes=10, target_score=1000, dif="normal"):
+def _close_call(env, margin):
+    """Bird inside a pipe's columns and within `margin` px of the gap edges."""
+    r = env.bird_radius
+    for pipe_x, gap_y in env.pipes:
+        if pipe_x - r <= env.bird_x <= pipe_x + env.pipe_width + r:
+            return (env.bird_y - r - gap_y < margin) or (gap_y + env.PIPE_GAP - env.bird_y - r < margin)
+    return False
+
+
+def watch_model(num_episodes=1, dif="normal", speed=WATCH_SPEED, target_score=1000, checkpoint_path=CHECKPOINT_PATH,
+                seed=None, lookahead=WATCH_LOOKAHEAD, close_call_px=WATCH_CLOSE_CALL_PX, jump_steps=WATCH_JUMP_STEPS,
+                stop_event=None):
+    """
+    Rendered play with a speed multiplier: `speed` frames are simulated per displayed frame and the
+    in-between frames are never drawn. The simulation runs `lookahead` frames ahead of the display
+    (as env snapshots), so an upcoming crash is known before it is shown; playback drops to real time
+    for the last `lookahead` frames before a crash and while the bird squeezes past a pipe edge.
+    Hotkeys: UP/+ double speed, DOWN/- halve it, 1 real time, M as fast as possible (uncapped,
+    display at WATCH_MAX_RENDER_FPS), J jump ahead `jump_steps` frames, SPACE pause, ESC quit.
+    Parameters:
+        speed (float|None): frames per displayed frame; < 1 is slow motion, None = as fast as possible
+        seed (int|None): pipe seed of the first episode (episode i uses seed + i)
+    Returns:
+        list of episode scores
+    """
+    env = FlappyBirdEnv(difficulty=dif, render_mode=True)
+    agent = get_policy(checkpoint_path)
+    scores = []
+    batch = 256  # frames per displayed frame in uncapped mode, adapted to WATCH_MAX_RENDER_FPS
+
+    def show(snap, fps, hud):
+        # Draw a buffered frame, then put the simulation head back
+        head = env.snapshot()
+        env.restore(snap)
+        env.render(fps=fps, hud=hud)
+        env.restore(head)
+
+    for ep in range(1, num_episodes + 1):
+        state = env.reset(seed=None if seed is None else seed + ep - 1)
+        # frames[0] is on screen, frames[-1] is the simulation head; entries are (snapshot, close call)
+        frames = deque([(env.snapshot(), False)])
+        crashed = finished = paused = False
+        ep_reward = 0.0
+        shown = 0
+        jump_left = 0
+
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                print("Watch cancelled.")
+                env.close()
+                return scores
+            for e in pygame.event.get():
+                if e.type == pygame.QUIT or (e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE):
+                    env.close()
+                    return scores
+                if e.type != pygame.KEYDOWN:
+                    continue
+                if e.key in (pygame.K_UP, pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    speed = 2.0 if speed is None else min(speed * 2, 4096.0)
+                elif e.key in (pygame.K_DOWN, pygame.K_MINUS, pygame.K_KP_MINUS):
+                    speed = 4096.0 if speed is None else max(speed / 2, 0.125)
+                elif e.key == pygame.K_1:
+                    speed = 1.0
+                elif e.key == pygame.K_m:
+                    speed = None
+                elif e.key == pygame.K_j:
+                    jump_left = jump_steps
+                elif e.key == pygame.K_SPACE:
+                    paused = not paused
+
+            if paused:
+                show(frames[0][0], env.FPS, "PAUSED")
+                continue
+
+            tick_start = time.perf_counter()
+            if jump_left:
+                want = jump_left
+            elif speed is None:
+                want = batch
+            else:
+                want = max(1, int(speed))
+
+            # Keep the head at least `lookahead` frames past where this display step lands
+            while not finished and len(frames) <= want + lookahead:
+                action = agent.act(state, epsilon=0.0)
+                state, reward, done, _ = env.step(action)
+                ep_reward += reward
+                frames.append((env.snapshot(), _close_call(env, close_call_px)))
+                crashed = done
+                finished = done or env.score >= target_score
+
+            # Clamp the jump so the last `lookahead` frames before a crash, and the approach to a close
+            # call, are shown in real time
+            k = min(want, len(frames) - 1)
+            if crashed:
+                k = min(k, max(len(frames) - 1 - lookahead, 1))
+            lead = lookahead // 3
+            for i in range(1, min(k + lead, len(frames) - 1) + 1):
+                if frames[i][1]:
+                    k = min(k, max(i - lead, 1))
+                    break
+            real_time = k == 1 and (want > 1 or (speed is not None and speed > 1))
+            if jump_left:
+                jump_left = 0 if real_time else jump_left - k
+
+            if len(frames) == 1:
+                break
+            for _ in range(k):
+                frames.popleft()
+            shown += k
+
+            if real_time:
+                fps, label = env.FPS, "REAL TIME"
+            elif speed is None:
+                fps, label = 0, "MAX"
+            else:
+                fps, label = env.FPS * min(speed, 1.0), f"x{speed:g}"
+            show(frames[0][0], fps, f"{label} | frame {shown}" + (" | JUMP" if jump_left else ""))
+
+            if speed is None and not jump_left:
+                # Aim for WATCH_MAX_RENDER_FPS displayed frames per second
+                # (capped: every buffered frame holds a snapshot including the pipe RNG state)
+                fast = time.perf_counter() - tick_start < 1 / WATCH_MAX_RENDER_FPS
+                batch = max(16, min(batch * 2 if fast else batch // 2, 4096))
+
+        scores.append(env.score)
+        print(f"[EP {ep}] Steps: {shown} | Score: {env.score} | Reward: {ep_reward:.2f}")
+        time.sleep(1.0)
+
+    env.close()
+    print("\nAll episodes finished.")
+    return scores
+
+
+def play_model_no_render(num_episodes=10, target_score=1000, dif="normal", profile=False, stop_event=None,
+                         plot=True, checkpoint_path=CHECKPOINT_PATH, policy_server=None):
+    """
+    Headless greedy evaluation.
+    Parameters:
+        num_episodes (int): episodes to play
+        target_score (int): stop an episode once this score is reached
+        dif (str): difficulty preset
+        profile (bool): print a per-episode phase breakdown
+        stop_event (threading.Event|None): stop after the current step when set
+        plot (bool): show the matplotlib summary (callers on a worker thread should plot themselves)
+        checkpoint_path (str): checkpoint to evaluate, served from the model cache
+        policy_server (str|None): address of a running policy_server.py; actions come from it and
+            checkpoint_path is ignored
+    Returns:
+        list of episode scores
+    """
     env = FlappyBirdEnv(difficulty=dif, render_mode=False)
-    agent = Agent()
+    timer = PhaseTimer() if profile else NULL_TIMER
 
-    # Load model
-    if os.path.exists(CHECKPOINT_PATH):
-        agent.load(CHECKPOINT_PATH)
-        print("Loaded model for play (headless).")
+    if policy_server is not None:
+        from policy_server import PolicyClient
+        agent = PolicyClient(policy_server)
     else:
-        print("No checkpoint found - play with random policy.")
+        # Load model (warm cache: repeated plays skip construction and torch.load)
+        agent = get_policy(checkpoint_path)
 
     scores = []
 
@@ -79,10 +237,15 @@ def play_model_no_render(num_episodes=10, target_score=1000, dif="normal"):
         done = False
         ep_reward = 0.0
         steps = 0
+        timer.reset()
 
         while not done:
-            action = agent.act(state, epsilon=0.0)  # greedy policy
-            next_state, reward, done, _ = env.step(action)
+            if stop_event is not None and stop_event.is_set():
+                break
+            with timer.phase("agent.act"):
+                action = agent.act(state, epsilon=0.0)  # greedy policy
+            with timer.phase("env.step"):
+                next_state, reward, done, _ = env.step(action)
             state = next_state
             ep_reward += reward
             steps += 1
@@ -92,23 +255,53 @@ def play_model_no_render(num_episodes=10, target_score=1000, dif="normal"):
                 print(f"[EP {ep}] Reached {target_score} at step {steps}, stopping early.")
                 done = True
 
+        if stop_event is not None and stop_event.is_set():
+            print("Evaluation cancelled.")
+            break
         scores.append(env.score)
         print(f"[EP {ep}] Steps: {steps} | Score: {env.score} | Reward: {ep_reward:.2f}")
+        if timer.enabled:
+            print("    " + timer.report())
 
     env.close()
+    if policy_server is not None:
+        agent.close()
+    if not scores:
+        return scores
 
     # --- Plot results ---
+    if plot:
+        plot_eval_scores({"Score per Episode": scores}, title="Flappy Bird — Evaluation Results (No Render)")
+
+    # Print summary
+    print("\nSummary:")
+    print(f"Scores: {scores}")
+    print(f"Average score: {sum(scores)/len(scores):.2f}")
+    return scores
+
+
+def plot_eval_scores(scores_by_label, title="Flappy Bird — Evaluation Results"):
+    """
+    Plot per-episode scores with an average line for each series.
+    Parameters:
+        scores_by_label (dict): label -> list of episode scores
+        title (str): figure title
+    """
+    # Imported here: matplotlib is the slowest import in the project and only needed to show a plot
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(8, 5))
-    plt.plot(range(1, num_episodes + 1), scores, marker='o', label='Score per Episode')
-    plt.axhline(y=sum(scores)/len(scores), color='r', linestyle='--', label=f'Average ({sum(scores)/len(scores):.2f})')
+    for label, scores in scores_by_label.items():
+        if not scores:
+            continue
+        avg = sum(scores) / len(scores)
+        line, = plt.plot(range(1, len(scores) + 1), scores, marker='o', label=label)
+        color = 'r' if len(scores_by_label) == 1 else line.get_color()
+        name = 'Average' if len(scores_by_label) == 1 else f'{label} avg'
+        plt.axhline(y=avg, color=color, linestyle='--', label=f'{name} ({avg:.2f})')
     plt.xlabel('Episode')
     plt.ylabel('Score')
-    plt.title('Flappy Bird — Evaluation Results (No Render)')
+    plt.title(title)
     plt.legend()
     plt.grid(True)
     plt.show()
-
-    # Print summary
-    print("\nSummary:")
-    print(f"Scores: {scores}")
-    print(f"Average score: {sum(scores)/len(scores):.2f}")
\ No newline at end of file
@@ -1,17 +1,57 @@
+import os
+import argparse
 import matplotlib.pyplot as plt
+from metrics import load_run, downsample
 
-episodes = list(range(1, 11))
 
-double_score = [500, 500, 500, 500, 19, 243, 216, 142, 25, 285]
-dqn_score = [163, 28, 142, 28, 44, 54, 500, 88, 29, 109]
+def plot_runs(run_dirs, labels=None, max_points=5000, save_path=None):
+    """
+    Plot score per episode and training loss for one or more runs written by
+    MetricsLogger (train_loop(metrics_dir=...)). Logs are memory-mapped and
+    block-averaged, so multi-million-step runs plot without loading everything.
+    Parameters:
+        run_dirs (list): run directories
+        labels (list|None): legend labels. Default: directory names
+        max_points (int): maximum points per curve
+        save_path (str|None): write the figure here instead of showing it
+    """
+    labels = labels or [os.path.basename(os.path.normpath(d)) for d in run_dirs]
+    fig, (ax_score, ax_loss) = plt.subplots(2, 1, figsize=(9, 8))
 
-plt.figure(figsize=(8, 5))
-plt.plot(episodes, double_score, marker='o', label='Double DQN', linewidth=2)
-plt.plot(episodes, dqn_score, marker='s', label='DQN', linewidth=2)
-plt.title("Score per Episode", fontsize=14)
-plt.xlabel("Episode", fontsize=12)
-plt.ylabel("Score", fontsize=12)
-plt.grid(True, linestyle="--", alpha=0.6)
-plt.legend()
-plt.tight_layout()
-plt.show()
+    for run_dir, label in zip(run_dirs, labels):
+        logs = load_run(run_dir)
+        episodes = logs["episodes"]
+        if len(episodes):
+            x, y = downsample(episodes["score"], max_points)
+            ax_score.plot(x + 1, y, label=label, linewidth=1.5)
+        steps = logs["steps"]
+        if len(steps):
+            x, y = downsample(steps["loss"], max_points)
+            ax_loss.plot(x, y, label=label, linewidth=1.0)
+
+    ax_score.set_title("Score per Episode", fontsize=14)
+    ax_score.set_xlabel("Episode", fontsize=12)
+    ax_score.set_ylabel("Score", fontsize=12)
+    ax_loss.set_title("Training Loss", fontsize=14)
+    ax_loss.set_xlabel("Step", fontsize=12)
+    ax_loss.set_ylabel("Loss", fontsize=12)
+    for ax in (ax_score, ax_loss):
+        ax.grid(True, linestyle="--", alpha=0.6)
+        ax.legend()
+    fig.tight_layout()
+
+    if save_path:
+        fig.savefig(save_path, dpi=120)
+        plt.close(fig)
+    else:
+        plt.show()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plot training runs logged with train_loop(metrics_dir=...).")
+    parser.add_argument("runs", nargs="+", help="run directories, e.g. runs/dqn runs/ddqn")
+    parser.add_argument("--labels", nargs="+", default=None)
+    parser.add_argument("--max-points", type=int, default=5000)
+    parser.add_argument("--save", default=None, help="save to PNG instead of showing")
+    args = parser.parse_args()
+    plot_runs(args.runs, args.labels, args.max_points, args.save)
@@ -0,0 +1,381 @@
+"""
+Local policy inference server: one process loads the checkpoint once and answers act()
+requests from many clients (GUI replays, evaluators, scripts) over a Unix socket or
+localhost TCP. Requests that arrive within a short window are answered by one batched
+forward, and the weights are reloaded when the checkpoint file changes.
+
+    python policy_server.py --checkpoint best.pth --address unix:/tmp/flappy.sock
+    python policy_server.py --stats --address unix:/tmp/flappy.sock
+
+Wire protocol (little-endian, one outstanding request per connection):
+    request  = op:u8  n:u16  payload
+      ACT    payload = n x f32 state          reply = action:u8  model_version:u32
+      STATS  n = 0                            reply = length:u32  JSON
+"""
+import os
+import json
+import time
+import queue
+import random
+import socket
+import struct
+import argparse
+import threading
+import socketserver
+
+import numpy as np
+
+from metrics import Histogram
+from config import (CHECKPOINT_PATH, POLICY_SERVER_ADDRESS, POLICY_SERVER_MAX_LATENCY_MS, POLICY_SERVER_MAX_BATCH,
+                    POLICY_SERVER_RELOAD_SECONDS)
+
+OP_ACT = 1
+OP_STATS = 2
+HEADER = struct.Struct("<BH")
+ACT_REPLY = struct.Struct("<BI")
+LENGTH = struct.Struct("<I")
+
+
+def parse_address(address):
+    """'unix:/path.sock' -> (AF_UNIX, path); 'host:port' -> (AF_INET, (host, port))."""
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    host, _, port = address.rpartition(":")
+    return socket.AF_INET, (host or "127.0.0.1", int(port))
+
+
+def _recv_exact(sock, n):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:])
+        if k == 0:
+            raise ConnectionError("connection closed")
+        got += k
+    return bytes(buf)
+
+
+# =========================================================================
+# SERVER
+# =========================================================================
+
+class _Request:
+    __slots__ = ("state", "arrived", "action", "version", "ready")
+
+    def __init__(self, state, ready):
+        self.state = state
+        self.arrived = time.perf_counter()
+        self.action = 0
+        self.version = 0
+        self.ready = ready
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """One thread per client connection: read a request, queue it, wait for the batcher, reply."""
+    def handle(self):
+        server = self.server.policy_server
+        sock = self.request
+        if sock.family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        ready = threading.Event()
+        server.connected(1)
+        try:
+            while True:
+                op, n = HEADER.unpack(_recv_exact(sock, HEADER.size))
+                if op == OP_ACT:
+                    state = np.frombuffer(_recv_exact(sock, 4 * n), dtype="<f4")
+                    if n != server.state_dim:
+                        break
+                    req = _Request(state, ready)
+                    server.requests.put(req)
+                    ready.wait()
+                    ready.clear()
+                    sock.sendall(ACT_REPLY.pack(req.action, req.version))
+                elif op == OP_STATS:
+                    body = json.dumps(server.stats()).encode()
+                    sock.sendall(LENGTH.pack(len(body)) + body)
+                else:
+                    break
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            server.connected(-1)
+
+
+# socketserver's default listen backlog of 5 refuses bursts of clients connecting at once
+class _TCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class PolicyServer:
+    """
+    Serves greedy actions of a checkpoint to many clients with dynamic batching.
+    Parameters:
+        checkpoint_path (str): Agent.save checkpoint; polled for changes and hot-reloaded. Default: CHECKPOINT_PATH
+        address (str): 'host:port' or 'unix:/path.sock'. Default: POLICY_SERVER_ADDRESS
+        max_latency_ms (float): how long the first request of a batch may wait for more requests;
+            0 answers whatever is already queued. Default: POLICY_SERVER_MAX_LATENCY_MS
+        max_batch (int): requests per forward. Default: POLICY_SERVER_MAX_BATCH
+        reload_seconds (float|None): checkpoint mtime poll interval; None disables hot reload.
+            Default: POLICY_SERVER_RELOAD_SECONDS
+        device (str): torch device for the forward. Default: 'cpu'
+
+    Example:
+        >>> with PolicyServer("best.pth", "unix:/tmp/flappy.sock").start():
+        ...     play_model_no_render(10, policy_server="unix:/tmp/flappy.sock", plot=False)
+    """
+    def __init__(self, checkpoint_path=CHECKPOINT_PATH, address=POLICY_SERVER_ADDRESS,
+                 max_latency_ms=POLICY_SERVER_MAX_LATENCY_MS, max_batch=POLICY_SERVER_MAX_BATCH,
+                 reload_seconds=POLICY_SERVER_RELOAD_SECONDS, device="cpu", state_dim=4, n_actions=2):
+        self.checkpoint_path = checkpoint_path
+        self.address = address
+        self.max_latency = max_latency_ms / 1000.0
+        self.max_batch = max_batch
+        self.reload_seconds = reload_seconds
+        self.device = device
+        self.state_dim = state_dim
+        self.n_actions = n_actions
+        self.requests = queue.Queue()
+        self.connections = 0
+        self._conn_lock = threading.Lock()
+
+        self.version = 0
+        self._mtime = None
+        self._net = None
+        self._last_poll = 0.0
+        self._reload()
+
+        # Latency from request arrival to reply ready, in microseconds; batch sizes exactly
+        self._stats_lock = threading.Lock()
+        self.latency_us = Histogram.log(1.0, 1e7, per_octave=4)
+        self.batch_sizes = Histogram(np.arange(0, max_batch + 1))
+        self.reloads = 0
+        self._started = time.perf_counter()
+
+        self._stop = threading.Event()
+        self._server = None
+        self._threads = []
+
+    # --- weights -----------------------------------------------------------
+
+    def _reload(self):
+        """(Re)load the checkpoint if its mtime changed. A half-written file keeps the old weights."""
+        import torch
+        from agent import DQN
+
+        self._last_poll = time.perf_counter()
+        try:
+            mtime = os.stat(self.checkpoint_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        # Unchanged, or briefly missing while being replaced: keep serving the current weights
+        if self._net is not None and (mtime == self._mtime or mtime is None):
+            return False
+        net = DQN(self.state_dim, self.n_actions).to(self.device)
+        if mtime is not None:
+            try:
+                data = torch.load(self.checkpoint_path, map_location=self.device, weights_only=True)
+                net.load_state_dict(data['policy_state_dict'])
+            except Exception as e:
+                if self._net is not None:
+                    self._mtime = mtime  # retried once the writer touches the file again
+                    print(f"[policy server] reload of {self.checkpoint_path} failed ({e}); keeping version {self.version}")
+                    return False
+                raise
+        elif self._net is None:
+            print(f"[policy server] {self.checkpoint_path} not found - serving a random policy until it appears.")
+        net.eval()
+        self._net, self._mtime = net, mtime
+        self.version += 1
+        if self.version > 1:
+            self.reloads += 1
+            print(f"[policy server] reloaded {self.checkpoint_path} (version {self.version})")
+        return True
+
+    # --- batching ------------------------------------------------------------
+
+    def connected(self, delta):
+        with self._conn_lock:
+            self.connections += delta
+
+    def _collect(self, first):
+        """
+        `first` plus whatever arrives before its latency budget runs out (up to max_batch).
+        Each connection has at most one request in flight, so once every connected client is in
+        the batch nobody else can join and it is sent without waiting out the window.
+        """
+        batch = [first]
+        deadline = first.arrived + self.max_latency
+        while len(batch) < min(self.max_batch, self.connections):
+            timeout = deadline - time.perf_counter()
+            try:
+                batch.append(self.requests.get(timeout=timeout) if timeout > 0 else self.requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _batcher(self):
+        import torch
+
+        torch.set_num_threads(1)
+        while not self._stop.is_set():
+            if self.reload_seconds is not None and time.perf_counter() - self._last_poll >= self.reload_seconds:
+                self._reload()
+            try:
+                first = self.requests.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            batch = self._collect(first)
+            states = torch.from_numpy(np.stack([r.state for r in batch]))
+            with torch.inference_mode():
+                actions = self._net(states.to(self.device)).argmax(dim=1).tolist()
+            version = self.version
+            for r, a in zip(batch, actions):
+                r.action, r.version = a, version
+                r.ready.set()
+            now = time.perf_counter()
+            with self._stats_lock:
+                self.batch_sizes.push(len(batch))
+                for r in batch:
+                    self.latency_us.push((now - r.arrived) * 1e6)
+
+    # --- lifecycle -----------------------------------------------------------
+
+    def start(self):
+        """Bind the socket and start the accept and batcher threads. Returns self."""
+        family, target = parse_address(self.address)
+        if family == socket.AF_UNIX:
+            if os.path.exists(target):
+                os.unlink(target)
+            self._server = _UnixServer(target, _Handler)
+        else:
+            self._server = _TCPServer(target, _Handler)
+        self._server.policy_server = self
+        self._threads = [
+            threading.Thread(target=self._server.serve_forever, name="policy-server-accept", daemon=True),
+            threading.Thread(target=self._batcher, name="policy-server-batcher", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        print(f"[policy server] serving {self.checkpoint_path} on {self.address} "
+              f"(max latency {self.max_latency * 1000:.1f} ms, max batch {self.max_batch})")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            family, target = parse_address(self.address)
+            if family == socket.AF_UNIX and os.path.exists(target):
+                os.unlink(target)
+        for t in self._threads:
+            t.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        """Request / batch counters and latency (us) and batch-size histograms."""
+        with self._stats_lock:
+            batches = self.batch_sizes.count
+            return {
+                "checkpoint": os.path.abspath(self.checkpoint_path), "version": self.version,
+                "reloads": self.reloads, "uptime_s": time.perf_counter() - self._started,
+                "connections": self.connections, "requests": self.latency_us.count, "batches": batches,
+                "mean_batch": self.batch_sizes.sum / batches if batches else 0.0,
+                "latency_us": self.latency_us.to_dict(), "batch_size": self.batch_sizes.to_dict(),
+            }
+
+
+# =========================================================================
+# CLIENT
+# =========================================================================
+
+class PolicyClient:
+    """
+    Drop-in for InferencePolicy / Agent wherever only act(state, epsilon) is needed; actions come
+    from a running PolicyServer. Exploration (epsilon) is drawn locally. Needs no torch.
+    Parameters:
+        address (str): server address. Default: POLICY_SERVER_ADDRESS
+        n_actions (int): for epsilon-random actions. Default: 2
+        timeout (float|None): socket timeout in seconds. Default: 30
+    """
+    def __init__(self, address=POLICY_SERVER_ADDRESS, n_actions=2, timeout=30.0):
+        family, target = parse_address(address)
+        self.address = address
+        self.n_actions = n_actions
+        self.version = 0
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(target)
+        if family == socket.AF_INET:
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def act(self, state, epsilon=0.0):
+        if epsilon > 0.0 and random.random() < epsilon:
+            return random.randrange(self.n_actions)
+        payload = np.asarray(state, dtype="<f4").ravel()
+        self.sock.sendall(HEADER.pack(OP_ACT, payload.size) + payload.tobytes())
+        action, self.version = ACT_REPLY.unpack(_recv_exact(self.sock, ACT_REPLY.size))
+        return action
+
+    def stats(self):
+        self.sock.sendall(HEADER.pack(OP_STATS, 0))
+        (length,) = LENGTH.unpack(_recv_exact(self.sock, LENGTH.size))
+        return json.loads(_recv_exact(self.sock, length))
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def format_stats(stats):
+    lat, bs = stats["latency_us"], stats["batch_size"]
+    return (f"version {stats['version']} ({stats['reloads']} reloads) | {stats['requests']:,} requests in "
+            f"{stats['batches']:,} batches (mean {stats['mean_batch']:.1f}, p99 {bs['p99']:.0f}, max {bs['max']:.0f}) | "
+            f"latency p50 {lat['p50']:.0f} us, p90 {lat['p90']:.0f} us, p99 {lat['p99']:.0f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batched policy inference server for Flappy Bird checkpoints.")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--address", default=POLICY_SERVER_ADDRESS, help="'host:port' or 'unix:/path.sock'")
+    parser.add_argument("--max-latency-ms", type=float, default=POLICY_SERVER_MAX_LATENCY_MS)
+    parser.add_argument("--max-batch", type=int, default=POLICY_SERVER_MAX_BATCH)
+    parser.add_argument("--reload-seconds", type=float, default=POLICY_SERVER_RELOAD_SECONDS)
+    parser.add_argument("--report-seconds", type=float, default=60.0, help="print stats this often")
+    parser.add_argument("--stats", action="store_true", help="print the stats of a running server and exit")
+    args = parser.parse_args()
+
+    if args.stats:
+        with PolicyClient(args.address) as client:
+            print(json.dumps(client.stats(), indent=2))
+    else:
+        server = PolicyServer(args.checkpoint, args.address, args.max_latency_ms, args.max_batch,
+                              args.reload_seconds).start()
+        try:
+            while True:
+                time.sleep(args.report_seconds)
+                print("[policy server] " + format_stats(server.stats()))
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
+            print("[policy server] " + format_stats(server.stats()))
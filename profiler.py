@@ -0,0 +1,149 @@
+import os
+import time
+import cProfile
+import pstats
+import tracemalloc
+from contextlib import nullcontext
+
+_perf_ns = time.perf_counter_ns
+
+
+class _Phase:
+    __slots__ = ("timer", "name", "t0")
+
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+        self.t0 = 0
+
+    def __enter__(self):
+        self.t0 = _perf_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, _perf_ns() - self.t0)
+        return False
+
+
+class PhaseTimer:
+    """
+    Accumulates wall time per named phase using time.perf_counter_ns.
+
+    Example:
+        >>> timer = PhaseTimer()
+        >>> with timer.phase("env.step"):
+        ...     env.step(action)
+        >>> print(timer.report())
+    """
+    enabled = True
+
+    def __init__(self):
+        self.totals = {}
+        self.counts = {}
+        self._window_start = _perf_ns()
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def add(self, name, elapsed_ns):
+        self.totals[name] = self.totals.get(name, 0) + elapsed_ns
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def reset(self):
+        self.totals.clear()
+        self.counts.clear()
+        self._window_start = _perf_ns()
+
+    def report(self, reset=True):
+        """
+        One-line breakdown since the last reset: share of wall time and mean time per call.
+        Nested phases are named "parent/child" (e.g. "agent.update/backward"); they are
+        listed on their own but left out of the top-level tracked total.
+        """
+        wall = max(1, _perf_ns() - self._window_start)
+        parts = []
+        for name, total in sorted(self.totals.items(), key=lambda kv: -kv[1]):
+            mean_us = total / self.counts[name] / 1e3
+            parts.append(f"{name} {100.0 * total / wall:.1f}% ({mean_us:.1f}us)")
+        tracked = 100.0 * sum(v for k, v in self.totals.items() if "/" not in k) / wall
+        line = f"[prof] {' | '.join(parts)} | top-level tracked {tracked:.0f}% of {wall / 1e9:.2f}s"
+        if reset:
+            self.reset()
+        return line
+
+
+class NullTimer:
+    """Drop-in PhaseTimer that records nothing; phase() returns a shared no-op context."""
+    enabled = False
+    _ctx = nullcontext()
+
+    def phase(self, name):
+        return self._ctx
+
+    def add(self, name, elapsed_ns):
+        pass
+
+    def reset(self):
+        pass
+
+    def report(self, reset=True):
+        return ""
+
+
+NULL_TIMER = NullTimer()
+
+
+class StepWindowProfiler:
+    """
+    Runs cProfile (and optionally tracemalloc) for env steps in [start, end)
+    and dumps the results to `out_dir` when the window closes.
+    Parameters:
+        start (int): first global step to profile
+        end (int): step at which profiling stops
+        out_dir (str): output directory for .prof / .txt files
+        trace_memory (bool): also take a tracemalloc snapshot
+    """
+    def __init__(self, start, end, out_dir="profiles", trace_memory=True):
+        self.start = start
+        self.end = end
+        self.out_dir = out_dir
+        self.trace_memory = trace_memory
+        self._profile = None
+        self.finished = False
+
+    def on_step(self, step):
+        if self.finished:
+            return
+        if self._profile is None and step >= self.start:
+            self._profile = cProfile.Profile()
+            if self.trace_memory:
+                tracemalloc.start()
+            self._profile.enable()
+        elif self._profile is not None and step >= self.end:
+            self._dump(step)
+
+    def close(self, step=None):
+        """Flush a window that is still open (e.g. training ended inside it)."""
+        if self._profile is not None and not self.finished:
+            self._dump(step if step is not None else self.end)
+
+    def _dump(self, step):
+        self._profile.disable()
+        self.finished = True
+        os.makedirs(self.out_dir, exist_ok=True)
+        tag = f"steps_{self.start}_{step}"
+
+        prof_path = os.path.join(self.out_dir, f"{tag}.prof")
+        self._profile.dump_stats(prof_path)
+        with open(os.path.join(self.out_dir, f"{tag}_cumtime.txt"), "w") as f:
+            pstats.Stats(self._profile, stream=f).sort_stats("cumulative").print_stats(40)
+        print(f"[prof] cProfile for steps {self.start}-{step} written to {prof_path}")
+
+        if self.trace_memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            mem_path = os.path.join(self.out_dir, f"{tag}_tracemalloc.txt")
+            with open(mem_path, "w") as f:
+                for stat in snapshot.statistics("lineno")[:40]:
+                    f.write(f"{stat}\n")
+            print(f"[prof] tracemalloc top allocations written to {mem_path}")
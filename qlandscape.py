@@ -0,0 +1,156 @@
+import os
+import time
+import hashlib
+import argparse
+import numpy as np
+import torch
+
+from config import CHECKPOINT_PATH
+from table_policy import STATE_NAMES, state_bounds, load_net
+
+CACHE_DIR = ".qcache"
+
+
+def checkpoint_hash(path):
+    """Content hash of a checkpoint, so cached grids are invalidated when weights change."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:16]
+
+
+def build_slice(x_axis, y_axis, fixed, res=(400, 400), difficulty="normal", x_range=None, y_range=None):
+    """
+    Build a 2-D slice of the state space.
+    Parameters:
+        x_axis, y_axis (str): state components that vary (see STATE_NAMES)
+        fixed (dict): values for the remaining components, e.g. {"pipe_dist_norm": 0.3, "gap_y_norm": 0.5}
+        res (tuple): (nx, ny) grid points
+        difficulty (str): preset used for default axis ranges
+        x_range, y_range (tuple|None): override the default (low, high) ranges
+    Returns:
+        states (ny*nx, 4) float32, xs (nx,), ys (ny,)
+    """
+    lows, highs = state_bounds(difficulty)
+    xi, yi = STATE_NAMES.index(x_axis), STATE_NAMES.index(y_axis)
+    xs = np.linspace(*(x_range or (lows[xi], highs[xi])), res[0], dtype=np.float32)
+    ys = np.linspace(*(y_range or (lows[yi], highs[yi])), res[1], dtype=np.float32)
+
+    states = np.empty((res[1], res[0], 4), dtype=np.float32)
+    for i, name in enumerate(STATE_NAMES):
+        if name not in (x_axis, y_axis):
+            if name not in fixed:
+                raise ValueError(f"Missing fixed value for {name}")
+            states[..., i] = fixed[name]
+    states[..., xi] = xs[None, :]
+    states[..., yi] = ys[:, None]
+    return states.reshape(-1, 4), xs, ys
+
+
+def evaluate_q(net, states, batch_size=1 << 18, device="cpu"):
+    """Q-values for an (N, 4) array in large batches under inference mode. Returns (N, 2) float32."""
+    net = net.to(device).eval()
+    out = np.empty((len(states), 2), dtype=np.float32)
+    with torch.inference_mode():
+        for i in range(0, len(states), batch_size):
+            batch = torch.from_numpy(np.ascontiguousarray(states[i:i + batch_size])).to(device)
+            out[i:i + batch_size] = net(batch).cpu().numpy()
+    return out
+
+
+def q_slice(checkpoint_path, x_axis, y_axis, fixed, res=(400, 400), difficulty="normal", use_cache=True):
+    """
+    Q-values over a 2-D slice for a checkpoint, cached on disk by checkpoint hash + slice spec.
+    Returns:
+        q (ny, nx, 2), xs, ys
+    """
+    spec = f"{x_axis}|{y_axis}|{sorted(fixed.items())}|{res}|{difficulty}"
+    key = f"{checkpoint_hash(checkpoint_path)}_{hashlib.sha1(spec.encode()).hexdigest()[:12]}"
+    cache_path = os.path.join(CACHE_DIR, key + ".npz")
+    if use_cache and os.path.exists(cache_path):
+        data = np.load(cache_path)
+        return data["q"], data["xs"], data["ys"]
+
+    states, xs, ys = build_slice(x_axis, y_axis, fixed, res, difficulty)
+    start = time.perf_counter()
+    q = evaluate_q(load_net(checkpoint_path), states).reshape(len(ys), len(xs), 2)
+    elapsed = time.perf_counter() - start
+    print(f"Evaluated {len(states):,} states in {elapsed:.2f}s ({len(states) / elapsed / 1e6:.2f} M states/s)")
+
+    if use_cache:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        np.savez_compressed(cache_path, q=q, xs=xs, ys=ys)
+    return q, xs, ys
+
+
+def render_landscape(checkpoint_path, x_axis="dy_norm", y_axis="vel_norm", fixed=None, panel_axis=None,
+                     panel_values=None, res=(400, 400), difficulty="normal", out="q_landscape.png", use_cache=True):
+    """
+    Render Q(no flap), Q(flap) and the advantage Q(flap) - Q(no flap) with the decision
+    boundary, one row per value of `panel_axis`, to a PNG (headless, Agg backend).
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fixed = dict(fixed or {})
+    rows = panel_values if panel_axis else [None]
+    fig, axes = plt.subplots(len(rows), 3, figsize=(15, 4.2 * len(rows)), squeeze=False)
+
+    for r, value in enumerate(rows):
+        if panel_axis:
+            fixed[panel_axis] = value
+        q, xs, ys = q_slice(checkpoint_path, x_axis, y_axis, fixed, res, difficulty, use_cache)
+        extent = (xs[0], xs[-1], ys[0], ys[-1])
+        gap = q[..., 1] - q[..., 0]
+        label = ", ".join(f"{k}={v:g}" for k, v in sorted(fixed.items()))
+        panels = [(q[..., 0], "Q(no flap)", "viridis", None),
+                  (q[..., 1], "Q(flap)", "viridis", None),
+                  (gap, "Q(flap) - Q(no flap)", "coolwarm", max(abs(gap.min()), abs(gap.max())) or 1.0)]
+        for c, (img, title, cmap, lim) in enumerate(panels):
+            ax = axes[r][c]
+            kwargs = {"vmin": -lim, "vmax": lim} if lim else {}
+            im = ax.imshow(img, origin="lower", extent=extent, aspect="auto", cmap=cmap, **kwargs)
+            if c == 2:
+                ax.contour(xs, ys, gap, levels=[0.0], colors="k", linewidths=1.0)
+            ax.set_title(f"{title}\n{label}", fontsize=9)
+            ax.set_xlabel(x_axis)
+            ax.set_ylabel(y_axis)
+            fig.colorbar(im, ax=ax)
+
+    fig.suptitle(f"Q landscape — {os.path.basename(checkpoint_path)} ({difficulty})")
+    fig.tight_layout()
+    fig.savefig(out, dpi=110)
+    plt.close(fig)
+    print(f"Saved {out}")
+
+
+def _parse_fixed(items):
+    fixed = {}
+    for item in items or []:
+        name, value = item.split("=")
+        fixed[name] = float(value)
+    return fixed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batched Q-value landscape heatmaps for a checkpoint.")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--x", default="dy_norm", choices=STATE_NAMES)
+    parser.add_argument("--y", default="vel_norm", choices=STATE_NAMES)
+    parser.add_argument("--fix", nargs="*", default=["pipe_dist_norm=0.3", "gap_y_norm=0.4"],
+                        help="fixed values for the other components, name=value")
+    parser.add_argument("--panel", default=None, help="one row per value: name=v1,v2,v3")
+    parser.add_argument("--res", type=int, nargs=2, default=[400, 400])
+    parser.add_argument("--difficulty", default="normal")
+    parser.add_argument("--out", default="q_landscape.png")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args()
+
+    panel_axis, panel_values = None, None
+    if args.panel:
+        panel_axis, vals = args.panel.split("=")
+        panel_values = [float(v) for v in vals.split(",")]
+    render_landscape(args.checkpoint, args.x, args.y, _parse_fixed(args.fix), panel_axis, panel_values,
+                     tuple(args.res), args.difficulty, args.out, use_cache=not args.no_cache)
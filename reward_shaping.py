@@ -0,0 +1,156 @@
+"""
+Replay-time reward shaping: rewards recomputed from stored features instead of baked in.
+
+FlappyBirdEnv's shaped reward is a pure function of (dy_norm, vel_norm, dx_norm), the step's
+event (alive / scored a pipe / died) and the reward constants in config.py. Storing the first
+two with each transition lets one buffer or dataset be trained under any reward configuration:
+shaped_reward() reproduces env.step's reward bit for bit, vectorized over a batch.
+
+    python reward_shaping.py --steps 100000 --override VERTICAL_WEIGHT=0.5   # exactness check vs env.step
+"""
+import random
+import argparse
+
+import numpy as np
+
+import config as cf
+from utils import ReplayBuffer
+
+# Per-step event recorded next to the features; UNKNOWN rows (demos, old datasets) keep their stored reward
+EVENT_UNKNOWN = -1
+EVENT_ALIVE = 0
+EVENT_SCORED = 1
+EVENT_DIED = 2
+
+REWARD_KEYS = ("LIVING_REWARD", "SCORE_REWARD", "DEATH_PENALTY", "VERTICAL_WEIGHT", "VELOCITY_WEIGHT",
+               "CENTER_BONUS_MULT", "APPROACHING_THRESHOLD", "APPROACHING_MULTIPLIER")
+
+
+def reward_params(overrides=None):
+    """The reward constants from config.py, with `overrides` (e.g. {"VERTICAL_WEIGHT": 0.5}) applied."""
+    params = {k: getattr(cf, k) for k in REWARD_KEYS}
+    for name, value in (overrides or {}).items():
+        if name not in params:
+            raise ValueError(f"Unknown reward constant: {name} (expected one of {', '.join(REWARD_KEYS)})")
+        params[name] = value
+    return params
+
+
+def shaped_reward(features, events, params):
+    """
+    Vectorized FlappyBirdEnv reward (_reward_alive / _reward_score / _reward_death).
+    The float64 operations are applied in the same order as the env's scalar code, so the
+    result equals what env.step returned under the same constants exactly.
+    Parameters:
+        features (np.ndarray): (N, 3) float64 [dy_norm, vel_norm, dx_norm] after the step
+        events (np.ndarray): (N,) EVENT_* codes
+        params (dict): reward constants, see reward_params
+    Returns:
+        np.ndarray: (N,) float64 rewards (NaN where the event is EVENT_UNKNOWN)
+    """
+    features = np.asarray(features, dtype=np.float64)
+    dy, vel, dx = features[:, 0], features[:, 1], features[:, 2]
+
+    alignment = -np.abs(dy) * params["VERTICAL_WEIGHT"]
+    alignment = np.where(dx < params["APPROACHING_THRESHOLD"], alignment * params["APPROACHING_MULTIPLIER"],
+                         alignment)
+    alive = (params["LIVING_REWARD"] + alignment) + -np.abs(vel) * params["VELOCITY_WEIGHT"]
+    scored = params["SCORE_REWARD"] + np.maximum(0.0, (1.0 - np.abs(dy)) * params["CENTER_BONUS_MULT"])
+
+    return np.select([events == EVENT_ALIVE, events == EVENT_SCORED, events == EVENT_DIED],
+                     [alive, scored, np.full_like(alive, params["DEATH_PENALTY"])], default=np.nan)
+
+
+def recompute_rewards(rewards, features, events, params):
+    """Shaped rewards as float32 (the buffer's reward dtype); EVENT_UNKNOWN rows keep `rewards`."""
+    out = shaped_reward(features, events, params)
+    return np.where(events == EVENT_UNKNOWN, rewards, out).astype(np.float32)
+
+
+class ShapedReplayBuffer(ReplayBuffer):
+    """
+    ReplayBuffer that also stores each step's reward features and event, and recomputes the
+    rewards of every sampled batch from `params` (sample / PrefetchSampler both go through
+    _sample_locked). The stored env reward is kept for transitions pushed without features.
+    Parameters:
+        capacity (int): Maximum number of experiences to store. Default: 100000
+        reward_overrides (dict|None): reward constants that differ from config.py. Default: None
+
+    Example:
+        >>> buffer = ShapedReplayBuffer(50000, {"VERTICAL_WEIGHT": 0.5})
+        >>> buffer.push(state, action, reward, next_state, done, env.reward_features, env.reward_event)
+        >>> buffer.set_reward_params({"VERTICAL_WEIGHT": 0.1})   # same experience, new rewards
+    """
+    stores_reward_features = True
+
+    def __init__(self, capacity=100000, reward_overrides=None):
+        super().__init__(capacity)
+        self.params = reward_params(reward_overrides)
+
+    def set_reward_params(self, reward_overrides=None):
+        with self.lock:
+            self.params = reward_params(reward_overrides)
+
+    def _allocate(self, state):
+        super()._allocate(state)
+        self.features = np.zeros((self.capacity, 3), dtype=np.float64)
+        self.events = np.full(self.capacity, EVENT_UNKNOWN, dtype=np.int8)
+
+    def push(self, state, action, reward, next_state, done, features=None, event=EVENT_UNKNOWN):
+        with self.lock:
+            if self.states is None:
+                self._allocate(state)
+            self.features[self.pos] = features if features is not None else 0.0
+            self.events[self.pos] = event
+            self._push_locked(state, action, reward, next_state, done)
+
+    def _sample_locked(self, batch_size, rng=random):
+        idx = self._indices(batch_size, rng)
+        rewards = recompute_rewards(self.rewards[idx], self.features[idx], self.events[idx], self.params)
+        return (self.states[idx], self.actions[idx], rewards, self.next_states[idx], self.dones[idx])
+
+
+# =========================================================================
+# EXACTNESS CHECK
+# =========================================================================
+
+def check_against_env(steps=100_000, difficulty="normal", overrides=None, seed=0, flap_noise=0.05):
+    """
+    Play `steps` steps with env constants `overrides` and compare every reward env.step returned
+    with shaped_reward on the recorded features.
+    Returns:
+        tuple: (steps, mismatches, {event name: count})
+    """
+    from env import FlappyBirdEnv
+
+    rng = np.random.default_rng(seed)
+    env = FlappyBirdEnv(difficulty=difficulty, render_mode=False, seed=seed, overrides=overrides)
+    rewards = np.empty(steps)
+    features = np.empty((steps, 3))
+    events = np.empty(steps, dtype=np.int8)
+    env.reset()
+    for t in range(steps):
+        # Flap when low, plus random flaps: crashes everywhere, and enough pipes passed to cover scoring
+        _, rewards[t], done, _ = env.step(int(env.bird_y > env.SCREEN_HEIGHT / 2 or rng.random() < flap_noise))
+        features[t], events[t] = env.reward_features, env.reward_event
+        if done:
+            env.reset()
+    env.close()
+    recomputed = shaped_reward(features, events, reward_params(overrides))
+    counts = {name: int((events == code).sum()) for name, code in
+              (("alive", EVENT_ALIVE), ("scored", EVENT_SCORED), ("died", EVENT_DIED))}
+    return steps, int((recomputed != rewards).sum()), counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check replay-time reward shaping against env.step.")
+    parser.add_argument("--steps", type=int, default=100_000)
+    parser.add_argument("--difficulty", default="normal", choices=["easy", "normal", "hard", "extreme"])
+    parser.add_argument("--override", nargs="*", default=[], metavar="NAME=VALUE")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    overrides = {k: float(v) for k, v in (o.split("=", 1) for o in args.override)}
+    n, bad, counts = check_against_env(args.steps, args.difficulty, overrides, args.seed)
+    print(f"{n} steps ({counts}): {bad} reward mismatches" + (" - exact" if bad == 0 else ""))
+    raise SystemExit(1 if bad else 0)
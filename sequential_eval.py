@@ -0,0 +1,253 @@
+import os
+import math
+import time
+import argparse
+import itertools
+import multiprocessing as mp
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config import CHECKPOINT_PATH
+
+# Per-process policies, filled once by _init_worker
+_worker_policies = []
+
+
+def load_policy(path):
+    """Greedy policy for a checkpoint (.pth) or a compiled table policy (.npz)."""
+    if path.endswith(".npz"):
+        from table_policy import TablePolicy
+        return TablePolicy.load(path)
+    from model_cache import get_policy
+    return get_policy(path, device="cpu", verbose=False)
+
+
+def _init_worker(checkpoint_paths, torch_threads):
+    global _worker_policies
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import torch
+
+    torch.set_num_threads(torch_threads)
+    _worker_policies = [load_policy(p) for p in checkpoint_paths]
+
+
+def _run_paired(difficulty, seed, target_score, max_steps):
+    """Play the same seeded episode with every policy."""
+    from evaluate import _get_env, run_episode
+
+    env = _get_env(difficulty)
+    return [run_episode(env, policy, seed, target_score, max_steps) for policy in _worker_policies]
+
+
+# =========================================================================
+# STATISTICS
+# =========================================================================
+
+def paired_outcome(a, b):
+    """
+    Compare two results of the same seeded episode: +1 if `a` lasted longer, -1 if `b` did, 0 for a tie.
+    With identical pipes the score is a function of frames survived, so frames are compared.
+    A censored episode (cut by the step cap / target score) only says "survived at least this long":
+    censored vs crashed is decided only if the crash came earlier; two censored episodes are a tie.
+    """
+    if a["censored"] and b["censored"]:
+        return 0
+    if a["censored"]:
+        return 1 if a["steps"] >= b["steps"] else -1
+    if b["censored"]:
+        return -1 if b["steps"] >= a["steps"] else 1
+    return (a["steps"] > b["steps"]) - (a["steps"] < b["steps"])
+
+
+class PairedSPRT:
+    """
+    Wald sequential probability ratio test on paired wins (ties are dropped).
+    H0: P(A beats B) = 0.5 - delta  vs  H1: P(A beats B) = 0.5 + delta.
+    Parameters:
+        alpha (float): probability of wrongly declaring A better
+        beta (float): probability of wrongly declaring B better
+        delta (float): indifference half-width around 0.5
+    """
+    def __init__(self, alpha=0.05, beta=0.05, delta=0.1):
+        self.step = math.log((0.5 + delta) / (0.5 - delta))
+        self.upper = math.log((1 - beta) / alpha)
+        self.lower = math.log(beta / (1 - alpha))
+        self.wins = 0
+        self.losses = 0
+        self.ties = 0
+
+    def update(self, outcome):
+        if outcome > 0:
+            self.wins += 1
+        elif outcome < 0:
+            self.losses += 1
+        else:
+            self.ties += 1
+
+    @property
+    def llr(self):
+        return (self.wins - self.losses) * self.step
+
+    @property
+    def decision(self):
+        """'A', 'B' or None while still undecided."""
+        if self.llr >= self.upper:
+            return "A"
+        if self.llr <= self.lower:
+            return "B"
+        return None
+
+
+def mean_ci_halfwidth(values, confidence=0.95):
+    """Normal-approximation half-width of the confidence interval on the mean."""
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.size < 2:
+        return float("inf")
+    z = math.sqrt(2.0) * _erfinv(confidence)
+    return float(z * arr.std(ddof=1) / math.sqrt(arr.size))
+
+
+def _erfinv(y):
+    # Newton iterations on math.erf; only used for a handful of confidence levels
+    x = 0.0
+    for _ in range(50):
+        x -= (math.erf(x) - y) / (2.0 / math.sqrt(math.pi) * math.exp(-x * x))
+    return x
+
+
+# =========================================================================
+# DRIVER
+# =========================================================================
+
+def _iter_paired(checkpoint_paths, difficulty, seed, max_episodes, target_score, max_steps, workers):
+    """
+    Yield per-seed result lists in seed order.
+    Results are consumed strictly in seed order even when running on a pool: taking whichever
+    episode finishes first would favour short (crashed) episodes and bias the sequential test.
+    """
+    if workers <= 1:
+        _init_worker(checkpoint_paths, 1)
+        for i in range(max_episodes):
+            yield _run_paired(difficulty, seed + i, target_score, max_steps)
+        return
+
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                             initargs=(list(checkpoint_paths), 1)) as pool:
+        pending = deque()
+        next_seed = 0
+        try:
+            while next_seed < max_episodes or pending:
+                while next_seed < max_episodes and len(pending) < 2 * workers:
+                    pending.append(pool.submit(_run_paired, difficulty, seed + next_seed, target_score, max_steps))
+                    next_seed += 1
+                yield pending.popleft().result()
+        finally:
+            for fut in pending:
+                fut.cancel()
+
+
+def sequential_evaluate(checkpoint_paths, difficulty="normal", confidence=0.95, delta=0.1, tolerance=None,
+                        min_episodes=10, max_episodes=1000, target_score=1000, max_steps=20000, seed=0,
+                        workers=1, stop_event=None):
+    """
+    Paired, seeded evaluation of two or more policies that stops as soon as the result is conclusive.
+    Every policy plays the same seeds. The run stops when either
+      - every pair of policies has a decision from a PairedSPRT at the given confidence, or
+      - `tolerance` is set and every policy's mean-score CI half-width is <= tolerance,
+    or when `max_episodes` seeds have been played.
+    Parameters:
+        checkpoint_paths (list): checkpoints (.pth) or table policies (.npz)
+        difficulty (str): difficulty preset
+        confidence (float): 1 - alpha (= 1 - beta) for the SPRTs and the level of the score CIs
+        delta (float): SPRT indifference zone on P(A beats B) around 0.5
+        tolerance (float|None): CI half-width on the mean score that is precise enough
+        min_episodes (int): seeds played before any stopping rule is checked
+        max_episodes (int): hard cap on seeds
+        target_score (int): episodes are cut (censored) at this score
+        max_steps (int|None): episodes are cut (censored) after this many frames
+        seed (int): first seed
+        workers (int): process pool size; 1 runs in-process
+        stop_event (threading.Event|None): optional cancel flag
+    Returns:
+        dict(episodes, stopped_by, pairs, policies)
+    """
+    paths = list(checkpoint_paths)
+    if len(paths) < 2 and tolerance is None:
+        raise ValueError("Need two or more checkpoints, or a tolerance for a single one")
+    alpha = 1.0 - confidence
+    pairs = {(i, j): PairedSPRT(alpha, alpha, delta) for i, j in itertools.combinations(range(len(paths)), 2)}
+    scores = [[] for _ in paths]
+    censored = [0 for _ in paths]
+    stopped_by = "max_episodes"
+    n = 0
+    start = time.perf_counter()
+
+    for results in _iter_paired(paths, difficulty, seed, max_episodes, target_score, max_steps, workers):
+        n += 1
+        for k, res in enumerate(results):
+            scores[k].append(res["score"])
+            censored[k] += res["censored"]
+        for (i, j), test in pairs.items():
+            if test.decision is None:
+                test.update(paired_outcome(results[i], results[j]))
+
+        line = " | ".join(f"{os.path.basename(p)} {r['score']}{'+' if r['censored'] else ''}"
+                          for p, r in zip(paths, results))
+        print(f"[seed {seed + n - 1}] {line}")
+
+        if stop_event is not None and stop_event.is_set():
+            stopped_by = "cancelled"
+            break
+        if n < min_episodes:
+            continue
+        if pairs and all(t.decision is not None for t in pairs.values()):
+            stopped_by = "sprt"
+            break
+        if tolerance is not None and all(mean_ci_halfwidth(s, confidence) <= tolerance for s in scores):
+            stopped_by = "tolerance"
+            break
+
+    elapsed = time.perf_counter() - start
+    policies = []
+    print(f"\nStopped by {stopped_by} after {n} paired episodes ({elapsed:.1f}s)")
+    for k, path in enumerate(paths):
+        arr = np.asarray(scores[k], dtype=np.float64)
+        half = mean_ci_halfwidth(arr, confidence)
+        policies.append({"checkpoint": path, "n": n, "mean": float(arr.mean()) if n else 0.0,
+                         "ci_halfwidth": half, "censored": censored[k]})
+        print(f"  {path}: mean {policies[-1]['mean']:.2f} ± {half:.2f} @{confidence:.0%} | "
+              f"censored {censored[k]}/{n}")
+    pair_report = []
+    for (i, j), t in pairs.items():
+        winner = {"A": paths[i], "B": paths[j]}.get(t.decision, "undecided")
+        pair_report.append({"a": paths[i], "b": paths[j], "wins": t.wins, "losses": t.losses, "ties": t.ties,
+                            "llr": t.llr, "winner": winner})
+        print(f"  {paths[i]} vs {paths[j]}: W {t.wins} / L {t.losses} / T {t.ties} | "
+              f"LLR {t.llr:.2f} [{t.lower:.2f}, {t.upper:.2f}] -> {winner}")
+    if any(censored):
+        print("  ('+' marks censored episodes; means are restricted to the score/step cap)")
+
+    return {"episodes": n, "stopped_by": stopped_by, "pairs": pair_report, "policies": policies}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sequential paired evaluation of checkpoints.")
+    parser.add_argument("checkpoints", nargs="*", default=[CHECKPOINT_PATH])
+    parser.add_argument("--difficulty", default="normal", choices=["easy", "normal", "hard", "extreme"])
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--delta", type=float, default=0.1, help="SPRT indifference zone around p=0.5")
+    parser.add_argument("--tolerance", type=float, default=None, help="stop once every mean-score CI is this tight")
+    parser.add_argument("--min-episodes", type=int, default=10)
+    parser.add_argument("--max-episodes", type=int, default=1000)
+    parser.add_argument("--target-score", type=int, default=1000)
+    parser.add_argument("--max-steps", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    sequential_evaluate(args.checkpoints, args.difficulty, args.confidence, args.delta, args.tolerance,
+                        args.min_episodes, args.max_episodes, args.target_score, args.max_steps, args.seed,
+                        args.workers)
@@ -0,0 +1,307 @@
+import os
+import json
+import math
+import time
+import random
+import sqlite3
+import argparse
+import itertools
+import traceback
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Parameters routed to Agent(...) and to train_loop(...); UPPERCASE names go to the env.
+AGENT_PARAMS = {"lr", "gamma"}
+TRAIN_PARAMS = {"batch_size", "buffer_size", "epsilon_decay"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trials (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sweep TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    checkpoint TEXT,
+    steps INTEGER,
+    episodes INTEGER,
+    train_avg_score REAL,
+    eval_mean REAL,
+    eval_median REAL,
+    seconds REAL,
+    started REAL,
+    finished REAL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    trial_id INTEGER NOT NULL,
+    report INTEGER NOT NULL,
+    episode INTEGER,
+    steps INTEGER,
+    avg_score REAL,
+    avg_loss REAL,
+    epsilon REAL,
+    PRIMARY KEY (trial_id, report)
+);
+"""
+
+
+# =========================================================================
+# SEARCH SPACE
+# =========================================================================
+
+def _sample_value(space, rng):
+    """A list is a categorical choice; a dict {"low", "high", "log", "int"} is a range."""
+    if isinstance(space, list):
+        return rng.choice(space)
+    low, high = space["low"], space["high"]
+    if space.get("log"):
+        value = math.exp(rng.uniform(math.log(low), math.log(high)))
+    else:
+        value = rng.uniform(low, high)
+    return int(round(value)) if space.get("int") else value
+
+
+def generate_trials(spec):
+    """
+    Expand a sweep spec into a list of parameter dicts.
+    Spec:
+        {"method": "grid" | "random", "num_trials": N (random only), "seed": 0,
+         "params": {"VERTICAL_WEIGHT": [0.1, 0.3], "lr": {"low": 1e-4, "high": 1e-3, "log": true}}}
+    Grid search needs every parameter to be a list.
+    """
+    params = spec["params"]
+    if spec.get("method", "grid") == "grid":
+        names = sorted(params)
+        for name in names:
+            if not isinstance(params[name], list):
+                raise ValueError(f"Grid search needs a list of values for {name}")
+        return [dict(zip(names, combo)) for combo in itertools.product(*(params[n] for n in names))]
+
+    rng = random.Random(spec.get("seed", 0))
+    return [{name: _sample_value(space, rng) for name, space in sorted(params.items())}
+            for _ in range(spec["num_trials"])]
+
+
+def split_params(params):
+    """Route a flat parameter dict to (env_overrides, agent_kwargs, train_kwargs)."""
+    env_overrides, agent_kwargs, train_kwargs = {}, {}, {}
+    for name, value in params.items():
+        if name.isupper():
+            env_overrides[name] = value
+        elif name in AGENT_PARAMS:
+            agent_kwargs[name] = value
+        elif name in TRAIN_PARAMS:
+            train_kwargs[name] = value
+        else:
+            raise ValueError(f"Unknown sweep parameter: {name}")
+    return env_overrides, agent_kwargs, train_kwargs
+
+
+# =========================================================================
+# RESULTS STORE
+# =========================================================================
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=60)
+    conn.executescript(SCHEMA)
+    # Results files created before failed trials were recorded lack the error column
+    if "error" not in [row[1] for row in conn.execute("PRAGMA table_info(trials)")]:
+        conn.execute("ALTER TABLE trials ADD COLUMN error TEXT")
+    return conn
+
+
+def _mark_failed(conn, trial_id, error):
+    conn.execute("UPDATE trials SET status = 'failed', error = ?, finished = ? WHERE id = ?",
+                 (error, time.time(), trial_id))
+    conn.commit()
+
+
+def _should_prune(conn, sweep, trial_id, report, avg_score, min_reports, quantile):
+    """
+    Median-style stopping rule: stop a trial whose best-so-far average score is below
+    the `quantile` of other trials' best-so-far scores at the same report index.
+    """
+    if report < min_reports:
+        return False
+    rows = conn.execute(
+        "SELECT MAX(m.avg_score) FROM metrics m JOIN trials t ON t.id = m.trial_id "
+        "WHERE t.sweep = ? AND m.trial_id != ? AND m.report <= ? GROUP BY m.trial_id "
+        "HAVING MAX(m.report) >= ?",
+        (sweep, trial_id, report, report),
+    ).fetchall()
+    if len(rows) < 2:
+        return False
+    others = sorted(r[0] for r in rows)
+    cutoff = others[int(quantile * (len(others) - 1))]
+    best = conn.execute("SELECT MAX(avg_score) FROM metrics WHERE trial_id = ?", (trial_id,)).fetchone()[0]
+    return max(best if best is not None else avg_score, avg_score) < cutoff
+
+
+# =========================================================================
+# WORKER
+# =========================================================================
+
+def _init_worker(threads):
+    # Must happen before torch is imported in this process
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import torch
+    torch.set_num_threads(threads)
+
+
+def _run_trial(db_path, sweep, trial_id, params, settings):
+    """
+    Train and evaluate one trial. Errors (bad override, NaN loss, missing asset, ...) are recorded
+    as status 'failed' with the traceback instead of propagating, so the rest of the sweep goes on.
+    Returns:
+        tuple: (trial_id, params, status, eval_mean) with status 'done', 'pruned' or 'failed'
+    """
+    conn = connect(db_path)
+    conn.execute("UPDATE trials SET status = 'running', started = ? WHERE id = ?", (time.time(), trial_id))
+    conn.commit()
+    try:
+        return _train_trial(conn, sweep, trial_id, params, settings)
+    except Exception:
+        _mark_failed(conn, trial_id, traceback.format_exc())
+        return trial_id, params, "failed", None
+    finally:
+        conn.close()
+
+
+def _train_trial(conn, sweep, trial_id, params, settings):
+    from train import train_loop
+    from evaluate import evaluate_agent, summarize_scores
+
+    env_overrides, agent_kwargs, train_kwargs = split_params(params)
+
+    state = {"report": 0, "pruned": False, "last": {}}
+
+    def on_log(info):
+        state["report"] += 1
+        state["last"] = info
+        conn.execute("INSERT OR REPLACE INTO metrics VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     (trial_id, state["report"], info["episode"], info["steps"], info["avg_score"],
+                      info["avg_loss"], info["epsilon"]))
+        conn.commit()
+        if settings["prune"] and _should_prune(conn, sweep, trial_id, state["report"], info["avg_score"],
+                                               settings["min_reports"], settings["prune_quantile"]):
+            state["pruned"] = True
+            return True
+        return False
+
+    start = time.perf_counter()
+    checkpoint = os.path.join(settings["out_dir"], f"trial_{trial_id}.pth")
+    agent = train_loop(num_episodes=settings["episodes"], difficulty=settings["difficulty"],
+                       env_overrides=env_overrides, agent_kwargs=agent_kwargs, checkpoint_path=checkpoint,
+                       seed=settings["seed"], callback=on_log, **train_kwargs)
+
+    eval_mean = eval_median = None
+    if not state["pruned"] and settings["eval_episodes"] > 0:
+        results = evaluate_agent(agent, settings["eval_episodes"], settings["difficulty"],
+                                 target_score=settings["eval_target"], seed=10_000,
+                                 env_overrides=env_overrides)
+        summary = summarize_scores([r["score"] for r in results])
+        eval_mean, eval_median = summary["mean"], summary["median"]
+
+    conn.execute(
+        "UPDATE trials SET status = ?, checkpoint = ?, steps = ?, episodes = ?, train_avg_score = ?, "
+        "eval_mean = ?, eval_median = ?, seconds = ?, finished = ? WHERE id = ?",
+        ("pruned" if state["pruned"] else "done", checkpoint, state["last"].get("steps"),
+         state["last"].get("episode"), state["last"].get("avg_score"), eval_mean, eval_median,
+         time.perf_counter() - start, time.time(), trial_id),
+    )
+    conn.commit()
+    return trial_id, params, "pruned" if state["pruned"] else "done", eval_mean
+
+
+# =========================================================================
+# DRIVER
+# =========================================================================
+
+def run_sweep(spec, db_path="sweeps/sweeps.db", out_dir=None, workers=None, threads_per_worker=1):
+    """
+    Run a hyperparameter sweep on a process pool and record results in SQLite.
+    Parameters:
+        spec (dict): search spec (see generate_trials) plus optional settings:
+            name, episodes, difficulty, seed, eval_episodes, eval_target,
+            prune (bool), min_reports, prune_quantile
+        db_path (str): SQLite results file
+        out_dir (str|None): where trial checkpoints go. Default: sweeps/<name>
+        workers (int|None): concurrent trials. Default: os.cpu_count() // threads_per_worker
+        threads_per_worker (int): torch / BLAS threads per trial process
+    Returns:
+        list of (trial_id, params, status, eval_mean) sorted best first; status is 'done', 'pruned'
+        or 'failed' (the error is in the trials table)
+    """
+    name = spec.get("name", time.strftime("sweep_%Y%m%d_%H%M%S"))
+    out_dir = out_dir or os.path.join(os.path.dirname(db_path) or ".", name)
+    os.makedirs(out_dir, exist_ok=True)
+    settings = {
+        "episodes": spec.get("episodes", 300),
+        "difficulty": spec.get("difficulty", "normal"),
+        "seed": spec.get("seed", 0),
+        "eval_episodes": spec.get("eval_episodes", 10),
+        "eval_target": spec.get("eval_target", 200),
+        "prune": spec.get("prune", True),
+        "min_reports": spec.get("min_reports", 5),
+        "prune_quantile": spec.get("prune_quantile", 0.5),
+        "out_dir": out_dir,
+    }
+
+    trials = generate_trials(spec)
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = connect(db_path)
+    trial_ids = []
+    for params in trials:
+        cur = conn.execute("INSERT INTO trials (sweep, params, status) VALUES (?, ?, 'queued')",
+                           (name, json.dumps(params, sort_keys=True)))
+        trial_ids.append(cur.lastrowid)
+    conn.commit()
+    conn.close()
+
+    workers = workers or max(1, (os.cpu_count() or 1) // threads_per_worker)
+    print(f"Sweep '{name}': {len(trials)} trials on {workers} workers x {threads_per_worker} threads -> {db_path}")
+
+    finished = []
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                             initargs=(threads_per_worker,)) as pool:
+        futures = {pool.submit(_run_trial, db_path, name, tid, params, settings): (tid, params)
+                   for tid, params in zip(trial_ids, trials)}
+        for fut in as_completed(futures):
+            try:
+                result = fut.result()
+            except Exception as e:
+                # The worker itself died (e.g. killed by the OOM killer); _run_trial could not record it
+                tid, params = futures[fut]
+                conn = connect(db_path)
+                _mark_failed(conn, tid, f"{type(e).__name__}: {e}")
+                conn.close()
+                result = (tid, params, "failed", None)
+            finished.append(result)
+            tid, params, status, eval_mean = result
+            if status == "failed":
+                status = "failed (error recorded in the trials table)"
+            elif eval_mean is not None:
+                status = f"eval mean {eval_mean:.2f}"
+            print(f"[trial {tid}] {status} | {params}")
+
+    finished.sort(key=lambda r: (r[3] is None, -(r[3] or 0.0)))
+    print("\nTop trials:")
+    for tid, params, status, eval_mean in finished[:5]:
+        if eval_mean is not None:
+            print(f"  trial {tid}: eval mean {eval_mean:.2f} | {params}")
+    return finished
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grid / random hyperparameter sweep over train_loop.")
+    parser.add_argument("spec", help="JSON file with the sweep spec")
+    parser.add_argument("--db", default="sweeps/sweeps.db")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threads", type=int, default=1, help="torch threads per trial")
+    args = parser.parse_args()
+
+    with open(args.spec) as f:
+        sweep_spec = json.load(f)
+    run_sweep(sweep_spec, db_path=args.db, workers=args.workers, threads_per_worker=args.threads)
@@ -0,0 +1,257 @@
+import os
+import time
+import random
+import argparse
+import numpy as np
+import torch
+
+import config as cf
+from agent import DQN
+from env import DIFFICULTY_PRESETS
+from config import CHECKPOINT_PATH
+
+STATE_NAMES = ("dy_norm", "vel_norm", "pipe_dist_norm", "gap_y_norm")
+
+
+def state_bounds(difficulty="normal"):
+    """
+    Range of each state component while the bird is alive, derived from the env geometry.
+    Returns:
+        lows, highs: float64 arrays of shape (4,)
+    """
+    gap = DIFFICULTY_PRESETS[difficulty]["PIPE_GAP"]
+    ground_y = cf.SCREEN_HEIGHT - cf.GROUND_HEIGHT
+    gap_min = cf.MIN_GAP_Y
+    gap_max = cf.SCREEN_HEIGHT - cf.MIN_GAP_Y - gap - cf.GROUND_HEIGHT
+    y_min, y_max = cf.BIRD_RADIUS, ground_y - cf.BIRD_RADIUS
+
+    lows = np.array([
+        (gap_min + gap / 2 - y_max) / gap,
+        -1.0,
+        -cf.PIPE_WIDTH / cf.SCREEN_WIDTH,
+        gap_min / ground_y,
+    ])
+    highs = np.array([
+        (gap_max + gap / 2 - y_min) / gap,
+        1.0,
+        (cf.SCREEN_WIDTH + cf.INIT_PIPE_OFFSET - cf.BIRD_X_POS) / cf.SCREEN_WIDTH,
+        gap_max / ground_y,
+    ])
+    return lows, highs
+
+
+class TablePolicy:
+    """
+    Greedy policy compiled from a DQN into a dense 4-D grid over the state space.
+    act(state) is pure index arithmetic plus one bit lookup; no torch call.
+    States outside the grid are clamped to the nearest edge cell.
+    """
+    def __init__(self, bits, shape, lows, highs, q_gap=None, meta=None):
+        self.shape = tuple(int(n) for n in shape)
+        self.lows = np.asarray(lows, dtype=np.float64)
+        self.highs = np.asarray(highs, dtype=np.float64)
+        self.bits = np.asarray(bits, dtype=np.uint8)
+        self.q_gap = q_gap
+        self.meta = meta or {}
+        self.n_actions = 2
+
+        # Plain-python copies for the per-frame path (numpy scalar ops are slower than floats)
+        self._bytes = self.bits.tobytes()
+        self._lo = [float(x) for x in self.lows]
+        self._scale = [n / float(h - l) for n, l, h in zip(self.shape, self.lows, self.highs)]
+        self._max = [n - 1 for n in self.shape]
+        strides = []
+        acc = 1
+        for n in reversed(self.shape):
+            strides.append(acc)
+            acc *= n
+        self._strides = strides[::-1]
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    def act(self, state, epsilon=0.0):
+        if epsilon > 0.0 and random.random() < epsilon:
+            return random.randrange(self.n_actions)
+        idx = 0
+        for x, lo, sc, mx, st in zip(state.tolist(), self._lo, self._scale, self._max, self._strides):
+            i = int((x - lo) * sc)
+            idx += (0 if i < 0 else mx if i > mx else i) * st
+        return (self._bytes[idx >> 3] >> (7 - (idx & 7))) & 1
+
+    def cell_index(self, states):
+        """Flat cell index for a (N, 4) array of states."""
+        states = np.asarray(states, dtype=np.float64)
+        scale = np.array(self._scale)
+        idx = np.floor((states - self.lows) * scale).astype(np.int64)
+        idx = np.clip(idx, 0, np.array(self._max))
+        return idx @ np.array(self._strides, dtype=np.int64)
+
+    def act_batch(self, states):
+        idx = self.cell_index(states)
+        return (self.bits[idx >> 3] >> (7 - (idx & 7))) & 1
+
+    def save(self, path):
+        extra = {} if self.q_gap is None else {"q_gap": self.q_gap}
+        np.savez_compressed(path, bits=self.bits, shape=np.array(self.shape), lows=self.lows, highs=self.highs,
+                            meta=np.array(repr(self.meta)), **extra)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        q_gap = data["q_gap"] if "q_gap" in data.files else None
+        return cls(data["bits"], data["shape"], data["lows"], data["highs"], q_gap=q_gap,
+                   meta={"source": str(data["meta"])})
+
+
+# =========================================================================
+# COMPILER
+# =========================================================================
+
+def cell_centers(shape, lows, highs):
+    """Per-axis cell centre coordinates."""
+    return [lows[d] + (np.arange(n) + 0.5) * (highs[d] - lows[d]) / n for d, n in enumerate(shape)]
+
+
+def compile_table(net, shape=(48, 48, 48, 48), difficulty="normal", batch_size=1 << 20, with_q_gap=False,
+                  device="cpu", verbose=True):
+    """
+    Evaluate `net` at every cell centre of the grid in large batched forward passes.
+    Parameters:
+        net (DQN): trained Q-network
+        shape (tuple): bins per state dimension
+        difficulty (str): preset used to derive the state bounds
+        batch_size (int): states per forward pass
+        with_q_gap (bool): also keep |Q(flap) - Q(no flap)| per cell as float16
+    Returns:
+        TablePolicy
+    """
+    lows, highs = state_bounds(difficulty)
+    axes = cell_centers(shape, lows, highs)
+    total = int(np.prod(shape))
+    actions = np.empty(total, dtype=np.uint8)
+    q_gap = np.empty(total, dtype=np.float16) if with_q_gap else None
+
+    net = net.to(device).eval()
+    # Enumerate cells in C order without materialising the full (total, 4) grid
+    inner = int(np.prod(shape[1:]))
+    rows_per_batch = max(1, batch_size // inner)
+    tail = np.stack(np.meshgrid(*axes[1:], indexing="ij"), axis=-1).reshape(-1, 3).astype(np.float32)
+    start = time.perf_counter()
+    with torch.inference_mode():
+        for i0 in range(0, shape[0], rows_per_batch):
+            i1 = min(shape[0], i0 + rows_per_batch)
+            first = np.repeat(axes[0][i0:i1].astype(np.float32), inner)[:, None]
+            batch = np.concatenate([first, np.tile(tail, (i1 - i0, 1))], axis=1)
+            q = net(torch.from_numpy(batch).to(device))
+            actions[i0 * inner:i1 * inner] = q.argmax(dim=1).to(torch.uint8).cpu().numpy()
+            if with_q_gap:
+                q_gap[i0 * inner:i1 * inner] = (q[:, 1] - q[:, 0]).abs().cpu().numpy().astype(np.float16)
+    elapsed = time.perf_counter() - start
+    if verbose:
+        print(f"Compiled {total:,} cells in {elapsed:.1f}s ({total / elapsed / 1e6:.2f} M states/s), "
+              f"{(total + 7) // 8 / 1e6:.2f} MB bitmap")
+
+    return TablePolicy(np.packbits(actions), shape, lows, highs, q_gap=q_gap,
+                       meta={"difficulty": difficulty, "shape": tuple(shape)})
+
+
+def load_net(checkpoint_path):
+    net = DQN()
+    data = torch.load(checkpoint_path, map_location="cpu", weights_only=True)
+    net.load_state_dict(data["policy_state_dict"])
+    return net.eval()
+
+
+# =========================================================================
+# REPORT
+# =========================================================================
+
+def parity_report(net, table, difficulty="normal", num_episodes=10, target_score=200, seed=0):
+    """
+    Compare the table with the network it was compiled from.
+    - disagreement on uniformly random states and on states the network actually visits
+    - score parity on identical seeded episodes
+    - per-decision cost of both policies
+    """
+    from model_cache import InferencePolicy
+    from evaluate import run_episode
+    from env import FlappyBirdEnv
+
+    net_policy = InferencePolicy(net, torch.device("cpu"))
+    rng = np.random.default_rng(seed)
+
+    # Uniform states over the grid bounds
+    uniform = rng.uniform(table.lows, table.highs, size=(200_000, 4)).astype(np.float32)
+    with torch.inference_mode():
+        net_uniform = net(torch.from_numpy(uniform)).argmax(dim=1).numpy()
+    uniform_dis = float(np.mean(net_uniform != table.act_batch(uniform)))
+
+    env = FlappyBirdEnv(difficulty=difficulty, render_mode=False)
+    visited = []
+    rows = []
+    for i in range(num_episodes):
+        # Record network-visited states while playing with the network
+        state = env.reset(seed=seed + i)
+        done, steps = False, 0
+        while not done and env.score < target_score:
+            visited.append(state)
+            state, _, done, _ = env.step(net_policy.act(state))
+            steps += 1
+        net_res = {"score": env.score, "steps": steps}
+        tab_res = run_episode(env, table, seed + i, target_score)
+        rows.append((seed + i, net_res["score"], tab_res["score"]))
+        print(f"[seed {seed + i}] net score {net_res['score']:4d} | table score {tab_res['score']:4d}")
+
+    visited = np.stack(visited).astype(np.float32)
+    with torch.inference_mode():
+        net_visited = net(torch.from_numpy(visited)).argmax(dim=1).numpy()
+    visited_dis = float(np.mean(net_visited != table.act_batch(visited)))
+
+    # Per-decision cost
+    sample = [visited[i] for i in rng.integers(0, len(visited), 5000)]
+    t0 = time.perf_counter()
+    for s in sample:
+        net_policy.act(s)
+    net_us = (time.perf_counter() - t0) / len(sample) * 1e6
+    t0 = time.perf_counter()
+    for s in sample:
+        table.act(s)
+    table_us = (time.perf_counter() - t0) / len(sample) * 1e6
+
+    net_scores = np.array([r[1] for r in rows])
+    tab_scores = np.array([r[2] for r in rows])
+    print(f"\nDisagreement: uniform states {uniform_dis:.2%} | visited states {visited_dis:.2%}")
+    print(f"Mean score: net {net_scores.mean():.2f} | table {tab_scores.mean():.2f} | "
+          f"identical episodes {int(np.sum(net_scores == tab_scores))}/{len(rows)}")
+    print(f"Decision cost: net {net_us:.1f} us | table {table_us:.2f} us ({net_us / table_us:.0f}x faster)")
+    return {
+        "uniform_disagreement": uniform_dis,
+        "visited_disagreement": visited_dis,
+        "net_mean_score": float(net_scores.mean()),
+        "table_mean_score": float(tab_scores.mean()),
+        "net_us": net_us,
+        "table_us": table_us,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile a DQN checkpoint into a lookup-table policy.")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_PATH)
+    parser.add_argument("--difficulty", default="normal", choices=list(DIFFICULTY_PRESETS))
+    parser.add_argument("--bins", type=int, nargs="+", default=[48], help="one value, or one per state dim")
+    parser.add_argument("--q-gap", action="store_true", help="also store |Q gap| per cell")
+    parser.add_argument("--out", default=None, help="output .npz. Default: <checkpoint>_table.npz")
+    parser.add_argument("--report-episodes", type=int, default=5, help="seeded episodes for the parity report")
+    parser.add_argument("--target-score", type=int, default=200)
+    args = parser.parse_args()
+
+    bins = args.bins * 4 if len(args.bins) == 1 else args.bins
+    q_net = load_net(args.checkpoint)
+    policy = compile_table(q_net, tuple(bins), args.difficulty, with_q_gap=args.q_gap)
+    out = args.out or os.path.splitext(args.checkpoint)[0] + "_table.npz"
+    policy.save(out)
+    print(f"Saved table policy to {out}")
+    if args.report_episodes > 0:
+        parity_report(q_net, policy, args.difficulty, args.report_episodes, args.target_score)
@@ -0,0 +1,189 @@
+import os
+import copy
+import time
+import argparse
+import numpy as np
+import torch
+from torch.func import functional_call, stack_module_state
+
+from env import FlappyBirdEnv
+from evaluate import summarize_scores, evaluate_agent
+from table_policy import load_net
+
+DEFAULT_CHECKPOINTS = ["best.pth", "checkpoint.pth", "checkpoint_double.pth", "checkpoint_hard.pth"]
+
+
+class StackedPolicy:
+    """
+    M DQNs with identical architecture evaluated in one vmapped forward pass.
+    q(states) takes (M, K, 4) and returns (M, K, 2): model m sees only its own K states.
+    """
+    def __init__(self, nets):
+        nets = [net.eval() for net in nets]
+        self.params, self.buffers = stack_module_state(nets)
+        # Structure-only copy; weights come from the stacked tensors on every call
+        self.base = copy.deepcopy(nets[0]).to("meta")
+        self.num_models = len(nets)
+
+        def forward(params, buffers, x):
+            return functional_call(self.base, (params, buffers), (x,))
+
+        self._forward = torch.vmap(forward, in_dims=(0, 0, 0))
+
+    def q(self, states):
+        with torch.inference_mode():
+            return self._forward(self.params, self.buffers, torch.as_tensor(states, dtype=torch.float32))
+
+    def act(self, states):
+        return self.q(states).argmax(dim=-1).numpy()
+
+
+def run_tournament(checkpoint_paths, num_courses=20, difficulty="normal", target_score=1000, max_steps=20000,
+                   seed=0):
+    """
+    Play every checkpoint on the same `num_courses` seeded courses, all M x K episodes in lockstep.
+    Each frame does one batched forward for every live episode, then steps the envs.
+    Parameters:
+        checkpoint_paths (list): checkpoints with the standard DQN architecture
+        num_courses (int): K, seeded pipe sequences shared by all models (seed, seed+1, ...)
+        difficulty (str): difficulty preset
+        target_score (int): episodes stop (censored) at this score
+        max_steps (int|None): episodes stop (censored) after this many frames
+        seed (int): first course seed
+    Returns:
+        dict(scores (M, K), steps (M, K), censored (M, K), forward_s, env_s, seconds)
+    """
+    m, k = len(checkpoint_paths), num_courses
+    policy = StackedPolicy([load_net(p) for p in checkpoint_paths])
+    envs = [[FlappyBirdEnv(difficulty=difficulty, render_mode=False) for _ in range(k)] for _ in range(m)]
+    states = np.stack([[envs[i][j].reset(seed=seed + j) for j in range(k)] for i in range(m)]).astype(np.float32)
+
+    alive = np.ones((m, k), dtype=bool)
+    scores = np.zeros((m, k), dtype=np.int64)
+    steps = np.zeros((m, k), dtype=np.int64)
+    censored = np.zeros((m, k), dtype=bool)
+    forward_s = env_s = 0.0
+    start = time.perf_counter()
+
+    while alive.any():
+        t0 = time.perf_counter()
+        actions = policy.act(states)
+        t1 = time.perf_counter()
+        for i, j in zip(*np.nonzero(alive)):
+            env = envs[i][j]
+            states[i, j], _, done, _ = env.step(int(actions[i, j]))
+            steps[i, j] += 1
+            capped = env.score >= target_score or (max_steps is not None and steps[i, j] >= max_steps)
+            if done or capped:
+                alive[i, j] = False
+                scores[i, j] = env.score
+                censored[i, j] = not done
+        forward_s += t1 - t0
+        env_s += time.perf_counter() - t1
+
+    for row in envs:
+        for env in row:
+            env.close()
+    return {
+        "checkpoints": list(checkpoint_paths),
+        "scores": scores,
+        "steps": steps,
+        "censored": censored,
+        "forward_s": forward_s,
+        "env_s": env_s,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def rank_table(result, confidence=0.95):
+    """Rows sorted by mean score, with CI, head-to-head course wins and censoring counts."""
+    scores, steps = result["scores"], result["steps"]
+    # A model wins a course when it survives strictly longer than every other model
+    best = steps.max(axis=0)
+    sole_best = (steps == best) & ((steps == best).sum(axis=0) == 1)
+    rows = []
+    for i, path in enumerate(result["checkpoints"]):
+        summary = summarize_scores(scores[i], confidence=confidence)
+        rows.append({
+            "checkpoint": path,
+            "mean": summary["mean"],
+            "ci_low": summary["ci_low"],
+            "ci_high": summary["ci_high"],
+            "median": summary["median"],
+            "min": int(scores[i].min()),
+            "max": int(scores[i].max()),
+            "course_wins": int(sole_best[i].sum()),
+            "censored": int(result["censored"][i].sum()),
+        })
+    rows.sort(key=lambda r: (r["mean"], r["course_wins"]), reverse=True)
+    return rows
+
+
+def print_table(rows, num_courses):
+    print(f"\n{'#':>2}  {'checkpoint':28s} {'mean':>8s} {'95% CI':>17s} {'median':>7s} {'min':>5s} {'max':>5s} "
+          f"{'wins':>5s} {'capped':>7s}")
+    for rank, r in enumerate(rows, 1):
+        print(f"{rank:>2}  {os.path.basename(r['checkpoint']):28s} {r['mean']:8.2f} "
+              f"[{r['ci_low']:7.2f},{r['ci_high']:7.2f}] {r['median']:7.1f} {r['min']:5d} {r['max']:5d} "
+              f"{r['course_wins']:5d} {r['censored']:4d}/{num_courses}")
+
+
+def plot_tournament(result, rows, save_path=None):
+    import matplotlib.pyplot as plt
+
+    order = [result["checkpoints"].index(r["checkpoint"]) for r in rows]
+    labels = [os.path.basename(result["checkpoints"][i]) for i in order]
+    fig, ax = plt.subplots(figsize=(9, 5))
+    ax.boxplot([result["scores"][i] for i in order], showmeans=True)
+    ax.set_xticks(range(1, len(labels) + 1), labels)
+    for pos, i in enumerate(order, 1):
+        jitter = np.random.default_rng(i).uniform(-0.12, 0.12, result["scores"].shape[1])
+        ax.scatter(pos + jitter, result["scores"][i], s=10, alpha=0.5)
+    ax.set_title(f"Tournament — {result['scores'].shape[1]} shared courses", fontsize=14)
+    ax.set_ylabel("Score", fontsize=12)
+    ax.grid(True, linestyle="--", alpha=0.6)
+    fig.tight_layout()
+    if save_path:
+        fig.savefig(save_path, dpi=120)
+        plt.close(fig)
+    else:
+        plt.show()
+
+
+def serial_baseline(checkpoint_paths, num_courses, difficulty, target_score, max_steps, seed):
+    """Same episodes, one model at a time with per-state act() calls, for the speed comparison."""
+    from model_cache import InferencePolicy
+
+    start = time.perf_counter()
+    for path in checkpoint_paths:
+        policy = InferencePolicy(load_net(path), torch.device("cpu"))
+        evaluate_agent(policy, num_courses, difficulty, target_score, max_steps, seed)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank checkpoints on identical seeded courses.")
+    parser.add_argument("checkpoints", nargs="*", default=DEFAULT_CHECKPOINTS)
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--difficulty", default="normal", choices=["easy", "normal", "hard", "extreme"])
+    parser.add_argument("--target-score", type=int, default=1000)
+    parser.add_argument("--max-steps", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", default=None, help="save the plot to PNG instead of showing it")
+    parser.add_argument("--no-plot", action="store_true")
+    parser.add_argument("--baseline", action="store_true", help="also time M separate serial runs")
+    args = parser.parse_args()
+
+    res = run_tournament(args.checkpoints, args.courses, args.difficulty, args.target_score, args.max_steps,
+                         args.seed)
+    ranked = rank_table(res)
+    print_table(ranked, args.courses)
+    total_frames = int(res["steps"].sum())
+    print(f"\n{len(args.checkpoints)} models x {args.courses} courses: {total_frames:,} frames in "
+          f"{res['seconds']:.1f}s (forward {res['forward_s']:.1f}s | env {res['env_s']:.1f}s)")
+    if args.baseline:
+        serial_s = serial_baseline(args.checkpoints, args.courses, args.difficulty, args.target_score,
+                                   args.max_steps, args.seed)
+        print(f"Serial baseline: {serial_s:.1f}s ({serial_s / res['seconds']:.1f}x slower)")
+    if not args.no_plot:
+        plot_tournament(res, ranked, args.save)
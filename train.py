@@ -1,14 +1,33 @@
 import os
 import time
+import random
 import numpy as np
+import torch
 import pygame
 from env import FlappyBirdEnv
 from agent import Agent
-from utils import ReplayBuffer
-from config import EPI_NUMS, CHECKPOINT_PATH
+from utils import ReplayBuffer, PrefetchSampler, IntervalTrigger
+from reward_shaping import ShapedReplayBuffer, reward_params
+from profiler import PhaseTimer, NULL_TIMER, StepWindowProfiler
+from metrics import MetricsLogger, RollingWindow
+from config import EPI_NUMS, CHECKPOINT_PATH, CURRICULUM_STAGES, CURRICULUM_PROMOTE_SCORE, CURRICULUM_WINDOW
+import config as cf
 
 
-def train_loop(num_episodes=EPI_NUMS, render=False, resume=False, difficulty="normal"):
+def train_loop(num_episodes=EPI_NUMS, render=False, resume=False, difficulty="normal",
+               profile=False, profile_window=None, profile_dir="profiles", metrics_dir=None,
+               env_overrides=None, agent_kwargs=None, batch_size=64, buffer_size=50000, epsilon_decay=15000,
+               checkpoint_path=CHECKPOINT_PATH, seed=None, callback=None,
+               curriculum=False, promote_score=CURRICULUM_PROMOTE_SCORE, curriculum_window=CURRICULUM_WINDOW,
+               stop_event=None, prefetch=0, offline=False, dataset_dir=None, offline_epochs=1,
+               demo_dir=None, bc_updates=0, epsilon_start=1.0,
+               max_episode_steps=cf.MAX_EPISODE_STEPS, log_every_episodes=cf.LOG_EVERY_EPISODES,
+               log_every_steps=cf.LOG_EVERY_STEPS, log_every_seconds=cf.LOG_EVERY_SECONDS,
+               checkpoint_every_steps=cf.CHECKPOINT_EVERY_STEPS, checkpoint_every_seconds=cf.CHECKPOINT_EVERY_SECONDS,
+               eval_every_steps=cf.EVAL_EVERY_STEPS, eval_every_seconds=cf.EVAL_EVERY_SECONDS,
+               eval_episodes=cf.EVAL_EPISODES, best_k=cf.BEST_K, snapshot_dir=cf.SNAPSHOT_DIR,
+               snapshot_every_steps=cf.SNAPSHOT_EVERY_STEPS, snapshot_every_seconds=cf.SNAPSHOT_EVERY_SECONDS,
+               snapshot_eval_episodes=cf.SNAPSHOT_EVAL_EPISODES, reward_overrides=None):
     """
     Main training loop for DQN agent in Flappy Bird environment.
     Parameters:
@@ -16,34 +35,140 @@ def train_loop(num_episodes=EPI_NUMS, render=False, resume=False, difficulty="no
         render (bool): Whether to render the environment. Default: False
         resume (bool): Whether to resume training from checkpoint. Default: False
         difficulty (str): Difficulty level of the game ('easy', 'normal', 'hard', 'extreme'). Default: 'normal'
+        profile (bool): Print a per-phase time breakdown with every log line. Default: False
+        profile_window (tuple|None): (start_step, end_step) to capture with cProfile + tracemalloc. Default: None
+        profile_dir (str): Where profile_window dumps are written. Default: 'profiles'
+        metrics_dir (str|None): Stream per-step / per-episode metrics to binary logs here (see metrics.py). Default: None
+        env_overrides (dict|None): Per-run env constants, e.g. {"VERTICAL_WEIGHT": 0.5}; config.py is not modified. Default: None
+        agent_kwargs (dict|None): Extra Agent arguments, e.g. {"lr": 5e-4, "gamma": 0.98}. Default: None
+        batch_size (int): Minibatch size per update. Default: 64
+        buffer_size (int): Replay buffer capacity. Default: 50000
+        epsilon_decay (int): Steps over which epsilon decays linearly. Default: 15000
+        checkpoint_path (str): Where checkpoints are loaded from / saved to. Default: CHECKPOINT_PATH from config.py
+        seed (int|None): Seed for python, numpy, torch and the env. Default: None
+        callback (callable|None): Called with a dict of progress metrics at every episode-cadence log
+            line (every log line if log_every_episodes is None); returning True stops training early.
+            Default: None
+        curriculum (bool): Start on 'easy' and promote through CURRICULUM_STAGES up to `difficulty`,
+            keeping the same agent and replay buffer. PIPE_GAP / PIPE_SPACING / SCROLL_SPEED in env_overrides
+            win over every stage's preset. Default: False
+        promote_score (float): Rolling average score that triggers promotion. Default: CURRICULUM_PROMOTE_SCORE
+        curriculum_window (int): Episodes in the promotion rolling average. Default: CURRICULUM_WINDOW
+        stop_event (threading.Event|None): When set (e.g. by the GUI cancel button), training stops
+            after the current step and the checkpoint is saved. Default: None
+        prefetch (int): Prepare this many minibatches ahead on a background thread (see
+            utils.PrefetchSampler); 0 samples synchronously. Default: 0
+        offline (bool): Learn from a recorded dataset instead of the env (see train_offline);
+            num_episodes, render, difficulty and the epsilon / curriculum options are unused. Default: False
+        dataset_dir (str|None): Dataset written by dataset.py, required when offline=True. Default: None
+        offline_epochs (int): Passes over the dataset in offline mode. Default: 1
+        demo_dir (str|None): Demonstration dataset (e.g. from oracle.py) pushed into the replay buffer
+            before warmup; newer experience overwrites it once the buffer is full. Default: None
+        bc_updates (int): Behavior-cloning updates on the demonstrations before DQN training
+            (oracle.behavior_clone). Default: 0
+        epsilon_start (float): Initial exploration rate; lower it when starting from a pretrained policy. Default: 1.0
+        max_episode_steps (int|None): Truncate episodes after this many steps. The last transition is stored
+            as non-terminal, so the target still bootstraps through the cut. Default: MAX_EPISODE_STEPS
+        log_every_episodes (int|None): Log line, checkpoint and callback every N finished episodes. Default: LOG_EVERY_EPISODES
+        log_every_steps, log_every_seconds (int|float|None): Extra log line and checkpoint every N env steps /
+            seconds, mid-episode included (marked "in progress"). The callback stays on the episode cadence,
+            so its calls are comparable across runs (sweep.py pruning). Default: LOG_EVERY_STEPS, LOG_EVERY_SECONDS
+        checkpoint_every_steps, checkpoint_every_seconds (int|float|None): Extra checkpoint saves between log
+            lines. Default: CHECKPOINT_EVERY_STEPS, CHECKPOINT_EVERY_SECONDS
+        eval_every_steps, eval_every_seconds (int|float|None): Greedy evaluation on `eval_episodes` seeded
+            courses (evaluate.evaluate_agent). Default: EVAL_EVERY_STEPS, EVAL_EVERY_SECONDS
+        best_k (int): When > 0, snapshots are evaluated by a background process (checkpoint_eval.py) on
+            `snapshot_eval_episodes` seeded courses at `difficulty`; the k best are kept in snapshot_dir and
+            the leader is promoted to checkpoint_path, which regular saves no longer touch (they go to
+            <snapshot_dir>/last.pth, also the file resume prefers). 0 = off. Default: BEST_K
+        snapshot_dir (str): Default: SNAPSHOT_DIR
+        snapshot_every_steps, snapshot_every_seconds (int|float|None): Snapshot cadence.
+            Default: SNAPSHOT_EVERY_STEPS, SNAPSHOT_EVERY_SECONDS
+        snapshot_eval_episodes (int): Default: SNAPSHOT_EVAL_EPISODES
+        reward_overrides (dict|None): Train on rewards recomputed at sample time from stored features
+            (reward_shaping.ShapedReplayBuffer) with these reward constants; {} = config.py values. The env,
+            and so the logged episode rewards, keep env_overrides. In offline mode the dataset must have been
+            recorded with features (dataset.py). None = stored rewards. Default: None
+    Returns:
+        Agent: the trained agent (None if the render window was closed)
     """
 
+    if seed is not None:
+        random.seed(seed)
+        np.random.seed(seed)
+        torch.manual_seed(seed)
+
+    if offline:
+        if dataset_dir is None:
+            raise ValueError("offline=True needs dataset_dir")
+        return train_offline(dataset_dir, epochs=offline_epochs, resume=resume, profile=profile,
+                             metrics_dir=metrics_dir, agent_kwargs=agent_kwargs, batch_size=batch_size,
+                             checkpoint_path=checkpoint_path, seed=seed, callback=callback, stop_event=stop_event,
+                             reward_overrides=reward_overrides)
+
+    # === Curriculum stages ===
+    if curriculum:
+        if difficulty not in CURRICULUM_STAGES:
+            raise ValueError(f"Curriculum target must be one of {CURRICULUM_STAGES}")
+        stages = CURRICULUM_STAGES[:CURRICULUM_STAGES.index(difficulty) + 1]
+    else:
+        stages = [difficulty]
+    stage_idx = 0
+    stage_scores = RollingWindow(curriculum_window)
+    stage_episodes = 0  # finished on the current stage; stage_scores only holds the last curriculum_window
+    stage_log = []  # (difficulty, episodes, steps, seconds) per finished stage
+
     # === Initialize environment, agent, and replay buffer ===
-    env = FlappyBirdEnv(difficulty=difficulty, render_mode=render)
-    agent = Agent()
-    buffer = ReplayBuffer(50000)
+    env = FlappyBirdEnv(difficulty=stages[0], render_mode=render, seed=seed, overrides=env_overrides)
+    agent = Agent(**(agent_kwargs or {}))
+    shaped = reward_overrides is not None
+    buffer = ShapedReplayBuffer(buffer_size, reward_overrides) if shaped else ReplayBuffer(buffer_size)
+    timer = PhaseTimer() if profile else NULL_TIMER
+    window = StepWindowProfiler(*profile_window, out_dir=profile_dir) if profile_window else None
 
-    if resume and os.path.exists(CHECKPOINT_PATH):
-        print("Loading checkpoint...")
-        agent.load(CHECKPOINT_PATH)
+    # With best-k retention checkpoint_path only ever receives evaluated promotions
+    save_path = os.path.join(snapshot_dir, "last.pth") if best_k else checkpoint_path
+    if best_k:
+        os.makedirs(snapshot_dir, exist_ok=True)
+    resume_path = save_path if os.path.exists(save_path) else checkpoint_path
+    if resume and os.path.exists(resume_path):
+        print(f"Loading checkpoint {resume_path}...")
+        agent.load(resume_path)
         print("Loaded.")
 
-    epsilon_start = 1.0
+    if demo_dir is not None:
+        from dataset import ShardedDataset
+        demos = ShardedDataset(demo_dir)
+        records = np.concatenate([np.asarray(demos.shard(i)) for i in range(len(demos.shards))])
+        # Demos recorded with features are re-shaped too; older ones keep their stored reward
+        with_features = shaped and "event" in records.dtype.names
+        for r in records:
+            extra = (r["features"], int(r["event"])) if with_features else ()
+            buffer.push(r["state"], int(r["action"]), float(r["reward"]), r["next_state"], float(r["done"]), *extra)
+        print(f"Loaded {len(records)} demonstration transitions from {demo_dir}")
+        if bc_updates > 0:
+            from oracle import behavior_clone
+            fields = ("state", "action", "reward", "next_state", "done")
+            accuracy = behavior_clone(agent, tuple(np.ascontiguousarray(records[f]) for f in fields),
+                                      updates=bc_updates)
+            print(f"Behavior cloning: {bc_updates} updates, greedy accuracy on demos {accuracy:.1%}")
+
     epsilon_final = 0.02
-    epsilon_decay = 15000  # steps
 
     total_steps = 0
-    losses = []
-    all_scores = []
+    metrics = MetricsLogger(metrics_dir)
 
     # --- WARMUP PHASE --- 
     warmup_steps = 5000
     print(f"Collecting {warmup_steps} random transitions for warmup...")
     state = env.reset()
     for step in range(warmup_steps):
+        if stop_event is not None and stop_event.is_set():
+            break
         action = np.random.randint(0, agent.n_actions)  # random 0 hoặc 1
         next_state, reward, done, _ = env.step(action)
-        buffer.push(state, action, reward, next_state, float(done))
+        extra = (env.reward_features, env.reward_event) if shaped else ()
+        buffer.push(state, action, reward, next_state, float(done), *extra)
 
         if done:
             state = env.reset()
@@ -51,49 +176,329 @@ def train_loop(num_episodes=EPI_NUMS, render=False, resume=False, difficulty="no
             state = next_state
 
     print(f"Warmup finished. Replay buffer size = {len(buffer)}")
+    if curriculum:
+        print(f"Curriculum: {' -> '.join(stages)} (promote at avg score {promote_score} over {curriculum_window} episodes)")
+    sampler = PrefetchSampler(buffer, batch_size, depth=prefetch, device=agent.device) if prefetch > 0 else buffer
+    timer.reset()
+    stage_start = (0, 0, time.perf_counter())
+    log_due = IntervalTrigger(log_every_steps, log_every_seconds)
+    save_due = IntervalTrigger(checkpoint_every_steps, checkpoint_every_seconds)
+    eval_due = IntervalTrigger(eval_every_steps, eval_every_seconds)
+    snapshot_due = IntervalTrigger(snapshot_every_steps, snapshot_every_seconds)
+    evaluator = None
+    if best_k:
+        from checkpoint_eval import BackgroundEvaluator, format_result
+        evaluator = BackgroundEvaluator(snapshot_dir, keep=best_k, best_path=checkpoint_path,
+                                        episodes=snapshot_eval_episodes, difficulty=difficulty,
+                                        max_steps=max_episode_steps, env_overrides=env_overrides)
 
+    def report(ep, ep_reward, epsilon, mid_episode=False):
+        """
+        Log line + checkpoint + callback. Returns True when the callback asks to stop.
+        Mid-episode lines (step / time triggers) show the running episode's score and reward so far and
+        only reach the callback when there is no episode cadence.
+        """
+        avg_score = metrics.score.recent.mean()
+        avg_loss = metrics.loss.recent.mean()
+        # Save before timer.report() closes the window, so the save is charged to this window
+        with timer.phase("agent.save"):
+            agent.save(save_path)
+        print(f"Ep {ep:4d}{' (in progress)' if mid_episode else ''} | Steps {total_steps:6d} | Score {env.score:3d} | EpReward {ep_reward:.2f} | "
+              f"Epsilon {epsilon:.3f} | AvgScore50 {avg_score:.2f} | AvgLoss100 {avg_loss:.4f}"
+              + (f" | Stage {stages[stage_idx]}" if curriculum else ""))
+        if timer.enabled:
+            print("    " + timer.report())
+        if evaluator is not None:
+            for r in evaluator.poll():
+                print("    " + format_result(r))
+        log_due.reset(total_steps)
+        save_due.reset(total_steps)
+        if callback is None or (mid_episode and log_every_episodes):
+            return False
+        return callback({
+            "episode": ep, "steps": total_steps, "score": env.score, "avg_score": avg_score,
+            "avg_loss": avg_loss, "epsilon": epsilon, "difficulty": stages[stage_idx],
+            "stage_avg_score": stage_scores.mean(), "stage_episodes": stage_episodes,
+            "mid_episode": mid_episode,
+        })
+
+    def evaluate():
+        from evaluate import evaluate_agent, summarize_scores
+        with timer.phase("evaluate"):
+            results = evaluate_agent(agent, eval_episodes, stages[stage_idx], max_steps=max_episode_steps,
+                                     seed=10_000, env_overrides=env_overrides)
+        summary = summarize_scores([r["score"] for r in results])
+        print(f"    Eval @ {total_steps} steps: mean score {summary['mean']:.2f} "
+              f"[{summary['ci_low']:.2f}, {summary['ci_high']:.2f}] over {eval_episodes} seeded episodes")
+
+    stop = False
     for ep in range(1, num_episodes + 1):
         state = env.reset()
         ep_reward = 0.0
         steps = 0
-        done = False
+        done = truncated = False
 
-        while not done:
+        while not (done or truncated):
+            if stop_event is not None and stop_event.is_set():
+                break
+            if window is not None:
+                window.on_step(total_steps)
             epsilon = epsilon_final + (epsilon_start - epsilon_final) * max(0, (1 - total_steps / epsilon_decay))
-            action = agent.act(state, epsilon)
+            with timer.phase("agent.act"):
+                action = agent.act(state, epsilon)
 
-            next_state, reward, done, _ = env.step(action)
-            buffer.push(state, action, reward, next_state, float(done))
+            with timer.phase("env.step"):
+                next_state, reward, done, _ = env.step(action)
+            # Only a crash is terminal; a time-limit cut still bootstraps from next_state
+            with timer.phase("buffer.push"):
+                extra = (env.reward_features, env.reward_event) if shaped else ()
+                buffer.push(state, action, reward, next_state, float(done), *extra)
 
-            loss = agent.update(buffer, batch_size=64, target_update=1000)
-            if loss is not None:
-                losses.append(loss)
+            with timer.phase("agent.update"):
+                loss = agent.update(sampler, batch_size=batch_size, target_update=1000, timer=timer)
+            metrics.log_step(total_steps, loss, epsilon)
 
             state = next_state
             ep_reward += reward
             total_steps += 1
             steps += 1
+            truncated = not done and max_episode_steps is not None and steps >= max_episode_steps
 
             if render:
                 for e in pygame.event.get():
-                    if e.type == pygame.QUIT:
+                    if e.type == pygame.QUIT or (e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE):
+                        metrics.close()
+                        if sampler is not buffer:
+                            sampler.close()
+                        if evaluator is not None:
+                            evaluator.close(wait=False)
                         env.close()
                         return
-                    if e.type == pygame.KEYDOWN and e.key == pygame.K_ESCAPE:
-                        env.close()
-                        return
-                env.render()
+                with timer.phase("render"):
+                    env.render()
+
+            # Step / wall-clock cadence, so long episodes still log, save and evaluate
+            if eval_due(total_steps):
+                evaluate()
+            if evaluator is not None and snapshot_due(total_steps):
+                with timer.phase("snapshot"):
+                    evaluator.submit(agent, total_steps)
+            if log_due(total_steps):
+                if report(ep, ep_reward, epsilon, mid_episode=not (done or truncated)):
+                    stop = True
+                    break
+            elif save_due(total_steps):
+                with timer.phase("agent.save"):
+                    agent.save(save_path)
 
-        all_scores.append(env.score)
-        if ep % 10 == 0:
-            avg_score = np.mean(all_scores[-50:]) if len(all_scores) >= 1 else env.score
-            avg_loss = np.mean(losses[-100:]) if len(losses) >= 1 else 0.0
-            print(f"Ep {ep:4d} | Steps {total_steps:6d} | Score {env.score:3d} | EpReward {ep_reward:.2f} | "
-                  f"Epsilon {epsilon:.3f} | AvgScore50 {avg_score:.2f} | AvgLoss100 {avg_loss:.4f}")
-            # save checkpoint
-            agent.save(CHECKPOINT_PATH)
+        if stop:
+            print(f"Stopped early by callback at episode {ep}.")
+            break
+        if stop_event is not None and stop_event.is_set():
+            print(f"Training cancelled at episode {ep}.")
+            break
+
+        metrics.log_episode(ep, total_steps, env.score, ep_reward, steps, epsilon)
+
+        # --- Curriculum promotion ---
+        stage_scores.push(env.score)
+        stage_episodes += 1
+        if (stage_idx + 1 < len(stages) and len(stage_scores) >= curriculum_window
+                and stage_scores.mean() >= promote_score):
+            stage_log.append((stages[stage_idx], ep - stage_start[0], total_steps - stage_start[1],
+                              time.perf_counter() - stage_start[2]))
+            print(f"Curriculum: {stages[stage_idx]} -> {stages[stage_idx + 1]} after "
+                  f"{stage_log[-1][1]} episodes / {stage_log[-1][2]} steps / {stage_log[-1][3]:.1f}s")
+            stage_idx += 1
+            env.set_difficulty(stages[stage_idx])
+            stage_scores = RollingWindow(curriculum_window)
+            stage_episodes = 0
+            stage_start = (ep, total_steps, time.perf_counter())
+
+        if log_every_episodes and ep % log_every_episodes == 0:
+            if report(ep, ep_reward, epsilon):
+                print(f"Stopped early by callback at episode {ep}.")
+                break
+
+    if window is not None:
+        window.close(total_steps)
+
+    if curriculum:
+        stage_log.append((stages[stage_idx], ep - stage_start[0], total_steps - stage_start[1],
+                          time.perf_counter() - stage_start[2]))
+        print("Curriculum summary:")
+        for name, n_eps, n_steps, secs in stage_log:
+            print(f"  {name:8s} | Episodes {n_eps:5d} | Steps {n_steps:8d} | {secs:.1f}s")
+
+    metrics.close()
+    if sampler is not buffer:
+        sampler.close()
 
     # final save
-    agent.save(CHECKPOINT_PATH)
+    agent.save(save_path)
     env.close()
-    print("Training finished. Model saved to", CHECKPOINT_PATH)
\ No newline at end of file
+    print("Training finished. Model saved to", save_path)
+    if evaluator is not None and stop_event is not None and stop_event.is_set():
+        # Cancel must return promptly: drop pending snapshots instead of playing their episodes
+        for r in evaluator.poll() + evaluator.close(wait=False):
+            print("    " + format_result(r))
+        print(f"Snapshot evaluation stopped; best so far is in {checkpoint_path}")
+    elif evaluator is not None:
+        # The final weights get their turn too; this is the only place the learner waits for the evaluator
+        evaluator.submit(agent, total_steps)
+        print(f"Evaluating the remaining snapshots ({evaluator.dropped} of {evaluator.submitted} dropped as stale)...")
+        for r in evaluator.poll() + evaluator.close(wait=True):
+            print("    " + format_result(r))
+        print(f"Best snapshot promoted to {checkpoint_path}")
+    return agent
+
+
+def train_offline(dataset_dir, epochs=1, resume=False, profile=False, metrics_dir=None, agent_kwargs=None,
+                  batch_size=64, checkpoint_path=CHECKPOINT_PATH, seed=None, callback=None, stop_event=None,
+                  log_every=1000, shards_in_memory=2, reward_overrides=None):
+    """
+    Train an agent from a sharded transition dataset (dataset.py) without touching the env.
+    Minibatches are streamed through dataset.iter_minibatches and fed to Agent.update.
+    Parameters:
+        dataset_dir (str): dataset directory with manifest.json
+        epochs (int): passes over the dataset. Default: 1
+        log_every (int): updates between log lines / checkpoint saves. Default: 1000
+        shards_in_memory (int): shards shuffled together in RAM. Default: 2
+        (other parameters as in train_loop)
+    Returns:
+        Agent: the trained agent
+    """
+    from dataset import ShardedDataset, iter_minibatches, BatchStream
+
+    dataset = ShardedDataset(dataset_dir)
+    agent = Agent(**(agent_kwargs or {}))
+    if resume and os.path.exists(checkpoint_path):
+        print("Loading checkpoint...")
+        agent.load(checkpoint_path)
+        print("Loaded.")
+    timer = PhaseTimer() if profile else NULL_TIMER
+    metrics = MetricsLogger(metrics_dir)
+    params = reward_params(reward_overrides) if reward_overrides is not None else None
+    stream = BatchStream(iter_minibatches(dataset, batch_size, epochs, shards_in_memory, seed, reward_params=params),
+                         len(dataset))
+    print(f"Offline training on {len(dataset):,} transitions from {dataset_dir} for {epochs} epoch(s)")
+
+    updates = 0
+    start = last = time.perf_counter()
+    while True:
+        if stop_event is not None and stop_event.is_set():
+            print(f"Training cancelled at update {updates}.")
+            break
+        try:
+            with timer.phase("agent.update"):
+                loss = agent.update(stream, batch_size=batch_size, timer=timer)
+        except StopIteration:
+            break
+        metrics.log_step(updates, loss, 0.0)
+        updates += 1
+
+        if updates % log_every == 0:
+            now = time.perf_counter()
+            avg_loss = metrics.loss.recent.mean()
+            print(f"Update {updates:7d} | Samples {updates * batch_size:9d} | AvgLoss100 {avg_loss:.4f} | "
+                  f"{log_every / (now - last):.0f} updates/s")
+            last = now
+            if timer.enabled:
+                print("    " + timer.report())
+            with timer.phase("agent.save"):
+                agent.save(checkpoint_path)
+            if callback is not None and callback({"updates": updates, "avg_loss": avg_loss}):
+                print(f"Stopped early by callback at update {updates}.")
+                break
+
+    elapsed = time.perf_counter() - start
+    metrics.close()
+    agent.save(checkpoint_path)
+    print(f"Offline training finished: {updates} updates in {elapsed:.1f}s "
+          f"({updates / max(elapsed, 1e-9):.0f} updates/s). Model saved to {checkpoint_path}")
+    return agent
+
+
+def train_ensemble(num_members=8, total_steps=200_000, difficulty="normal", double=False, agent_kwargs=None,
+                   batch_size=64, buffer_size=50000, epsilon_decay=15000, seed=0, checkpoint_prefix="ensemble/dqn",
+                   log_every=5000, stop_event=None):
+    """
+    Train E DQN members in one process (agent_ensemble.EnsembleAgent). Member i plays its own env
+    (seed + i) with its own replay ring, as train_loop(seed=seed + i) would, but all members step
+    in lockstep and share one vmapped forward/backward per step.
+    Parameters:
+        num_members (int): E
+        total_steps (int): env steps per member, after the 5000-step random warmup
+        double (bool): Double-DQN targets. Default: False
+        checkpoint_prefix (str): members are saved to <prefix>_member<i>.pth (loadable by Agent.load)
+        log_every (int): steps between log lines / checkpoint saves
+        (other parameters as in train_loop)
+    Returns:
+        EnsembleAgent
+    """
+    from agent_ensemble import EnsembleAgent, EnsembleReplayBuffer
+
+    random.seed(seed)
+    np.random.seed(seed)
+    agent = EnsembleAgent(num_members, double=double, seed=seed, **(agent_kwargs or {}))
+    envs = [FlappyBirdEnv(difficulty=difficulty, render_mode=False, seed=seed + i) for i in range(num_members)]
+    buffer = EnsembleReplayBuffer(num_members, buffer_size)
+    scores = [RollingWindow(50) for _ in range(num_members)]
+    episodes = np.zeros(num_members, dtype=np.int64)
+    losses = RollingWindow(100)
+
+    def step_all(actions):
+        out = [env.step(int(a)) for env, a in zip(envs, actions)]
+        next_states = np.stack([o[0] for o in out])
+        rewards = np.array([o[1] for o in out], dtype=np.float32)
+        dones = np.array([o[2] for o in out], dtype=np.float32)
+        return next_states, rewards, dones
+
+    def reset_done(next_states, dones):
+        for i in np.nonzero(dones)[0]:
+            scores[i].push(envs[i].score)
+            episodes[i] += 1
+            next_states[i] = envs[i].reset()
+        return next_states
+
+    # --- WARMUP PHASE ---
+    warmup_steps = 5000
+    print(f"Collecting {warmup_steps} random transitions per member for warmup...")
+    states = np.stack([env.reset() for env in envs])
+    for _ in range(warmup_steps):
+        actions = np.random.randint(0, agent.n_actions, num_members)
+        next_states, rewards, dones = step_all(actions)
+        buffer.push(states, actions, rewards, next_states, dones)
+        states = reset_done(next_states.copy(), dones)
+    scores = [RollingWindow(50) for _ in range(num_members)]
+    episodes[:] = 0
+
+    epsilon_start, epsilon_final = 1.0, 0.02
+    start = last = time.perf_counter()
+    for step in range(1, total_steps + 1):
+        if stop_event is not None and stop_event.is_set():
+            print(f"Training cancelled at step {step}.")
+            break
+        epsilon = epsilon_final + (epsilon_start - epsilon_final) * max(0, (1 - step / epsilon_decay))
+        actions = agent.act(states, epsilon)
+        next_states, rewards, dones = step_all(actions)
+        buffer.push(states, actions, rewards, next_states, dones)
+        loss = agent.update(buffer, batch_size=batch_size)
+        losses.push(loss.mean())
+        states = reset_done(next_states.copy(), dones)
+
+        if step % log_every == 0:
+            now = time.perf_counter()
+            avg = np.array([s.mean() for s in scores])
+            print(f"Step {step:7d} | Episodes {int(episodes.sum()):6d} | AvgScore50 mean {avg.mean():.2f} "
+                  f"best {avg.max():.2f} (member {int(avg.argmax())}) | AvgLoss100 {losses.mean():.4f} | "
+                  f"Epsilon {epsilon:.3f} | {log_every * num_members / (now - last):.0f} member-steps/s")
+            last = now
+            agent.save(checkpoint_prefix)
+
+    paths = agent.save(checkpoint_prefix)
+    for env in envs:
+        env.close()
+    elapsed = time.perf_counter() - start
+    print(f"Ensemble training finished in {elapsed:.1f}s. Members saved to {paths[0]} ... {paths[-1]}")
+    return agent
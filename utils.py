@@ -1,40 +1,186 @@
+import time
+import queue
 import random
+import threading
 import numpy as np
-from collections import deque, namedtuple
+from collections import namedtuple
 
 Transition = namedtuple('Transition', ('state', 'action', 'reward', 'next_state', 'done'))
 
 class ReplayBuffer:
     """
     A simple replay buffer for storing and sampling experiences.
+    Transitions live in preallocated NumPy ring arrays, so sampling is one fancy-index
+    gather per field instead of a python loop over Transition objects.
     Parameters:
         capacity (int): Maximum number of experiences to store. Default: 100000
-        
+
     Methods:
         push: Add a new experience to buffer
         sample: Randomly sample a batch of experiences
         __len__: Return current buffer size
-        
+
+    Locking:
+        `lock` is held while a slot is written (push) and while a batch is drawn and
+        copied out (sample / PrefetchSampler). Gathered arrays are copies, so a batch is
+        never torn by a later push overwriting the same slot.
+
     Example:
         >>> buffer = ReplayBuffer(capacity=1000)
         >>> buffer.push(state, action, reward, next_state, done)
         >>> states, actions, rewards, next_states, dones = buffer.sample(32)
     """
     def __init__(self, capacity=100000):
-        self.buffer = deque(maxlen=capacity)
+        self.capacity = capacity
+        self.pos = 0
+        self.size = 0
+        self.lock = threading.Lock()
+        # Allocated on the first push, once the state shape is known
+        self.states = None
+
+    def _allocate(self, state):
+        shape = (self.capacity,) + np.shape(state)
+        self.states = np.zeros(shape, dtype=np.float32)
+        self.next_states = np.zeros(shape, dtype=np.float32)
+        self.actions = np.zeros(self.capacity, dtype=np.int64)
+        self.rewards = np.zeros(self.capacity, dtype=np.float32)
+        self.dones = np.zeros(self.capacity, dtype=np.float32)
+
+    def push(self, state, action, reward, next_state, done):
+        with self.lock:
+            self._push_locked(state, action, reward, next_state, done)
+
+    def _push_locked(self, state, action, reward, next_state, done):
+        if self.states is None:
+            self._allocate(state)
+        i = self.pos
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self.pos = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def _indices(self, batch_size, rng=random):
+        # Uniform without replacement over stored slots, same as random.sample over the old deque
+        return np.fromiter(rng.sample(range(self.size), batch_size), dtype=np.int64, count=batch_size)
+
+    def _sample_locked(self, batch_size, rng=random):
+        idx = self._indices(batch_size, rng)
+        return (self.states[idx], self.actions[idx], self.rewards[idx],
+                self.next_states[idx], self.dones[idx])
+
+    def sample(self, batch_size):
+        with self.lock:
+            return self._sample_locked(batch_size)
+
+    def __len__(self):
+        return self.size
+
+
+class PrefetchSampler:
+    """
+    Prepares the next `depth` minibatches (indices, gathered arrays, tensors) on a background
+    thread while the main thread steps the env and runs backward.
+    Drop-in for the buffer in Agent.update: it has sample(batch_size) and __len__.
+    Parameters:
+        buffer (ReplayBuffer): buffer to draw from
+        batch_size (int): minibatch size
+        depth (int): number of ready batches kept in the queue. Default: 4
+        device (torch.device|str|None): where tensors are placed. Default: CPU
+
+    Each batch is drawn uniformly from the buffer contents at the moment it is prepared, so a
+    batch can miss at most the last `depth` pushed transitions; the distribution over stored
+    transitions is otherwise the same as ReplayBuffer.sample.
+    The thread draws indices from its own random.Random, seeded from the global `random` when the
+    sampler is built, so it does not interleave with the main thread's draws (epsilon, actions)
+    on the shared generator.
+    An exception on the background thread (sampling, pin_memory, out of memory) is re-raised
+    by the next sample() call instead of leaving the learner waiting on an empty queue.
+    """
+    def __init__(self, buffer, batch_size, depth=4, device=None):
+        import torch
+
+        self.buffer = buffer
+        self.batch_size = batch_size
+        self.device = torch.device(device) if device is not None else torch.device("cpu")
+        self._queue = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._error = None
+        self._rng = random.Random(random.getrandbits(64))
+        self._thread = threading.Thread(target=self._worker, name="replay-prefetch", daemon=True)
+        self._thread.start()
 
-    def push(self, *args):
-        self.buffer.append(Transition(*args))
+    def _worker(self):
+        try:
+            self._prefetch()
+        except BaseException as e:
+            self._error = e
+
+    def _prefetch(self):
+        import torch
+
+        pin = self.device.type == "cuda"
+        while not self._stop.is_set():
+            if len(self.buffer) < self.batch_size:
+                self._stop.wait(0.01)
+                continue
+            with self.buffer.lock:
+                arrays = self.buffer._sample_locked(self.batch_size, self._rng)
+            tensors = tuple(torch.from_numpy(a) for a in arrays)
+            if pin:
+                tensors = tuple(t.pin_memory().to(self.device, non_blocking=True) for t in tensors)
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(tensors, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
 
     def sample(self, batch_size):
-        batch = random.sample(self.buffer, batch_size)
-        # return as tensors when needed; keep here as numpy arrays
-        states = np.stack([t.state for t in batch]).astype(np.float32)
-        actions = np.array([t.action for t in batch], dtype=np.int64)
-        rewards = np.array([t.reward for t in batch], dtype=np.float32)
-        next_states = np.stack([t.next_state for t in batch]).astype(np.float32)
-        dones = np.array([t.done for t in batch], dtype=np.float32)
-        return states, actions, rewards, next_states, dones
+        if batch_size != self.batch_size:
+            raise ValueError(f"PrefetchSampler prepares batches of {self.batch_size}, got {batch_size}")
+        while True:
+            try:
+                return self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if not self._thread.is_alive():
+                    if self._error is not None:
+                        raise RuntimeError("replay prefetch thread failed") from self._error
+                    raise RuntimeError("PrefetchSampler is closed")
 
     def __len__(self):
         return len(self.buffer)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+
+
+class IntervalTrigger:
+    """
+    Fires every `steps` env steps and/or every `seconds` of wall-clock, whichever comes first.
+    Either interval may be None; with both None the trigger never fires.
+
+    Example:
+        >>> save_due = IntervalTrigger(steps=50_000, seconds=300)
+        >>> if save_due(total_steps):
+        ...     agent.save(path)
+    """
+    def __init__(self, steps=None, seconds=None):
+        self.steps = steps
+        self.seconds = seconds
+        self.reset(0)
+
+    def reset(self, step):
+        self.last_step = step
+        self.last_time = time.perf_counter()
+
+    def __call__(self, step):
+        """True (and restart both intervals) when an interval has elapsed since the last fire / reset."""
+        if ((self.steps is not None and step - self.last_step >= self.steps)
+                or (self.seconds is not None and time.perf_counter() - self.last_time >= self.seconds)):
+            self.reset(step)
+            return True
+        return False